@@ -0,0 +1,46 @@
+"""Micro-benchmark: command classification cost per message.
+
+Compares the compiled CommandRouter against the linear prefix scan it
+replaced. Run from the financial_wa_bot directory:
+
+    python -m benchmarks.command_router [iterations]
+"""
+import sys
+import timeit
+from typing import Optional
+
+from config.settings import COMMAND_PREFIXES
+from core.command_router import command_router
+
+MESSAGES = [
+    "catat pengeluaran 50000 untuk makan",
+    "catat pemasukan 1000000 dari gaji",
+    "keluar 25000 buat parkir",
+    "masuk 200000 dari bonus",
+    "cek saldo",
+    "laporan bulanan",
+    "atur budget 2000000 per bulan",
+    "buka dashboard",
+    "bantuan",
+    "halo apa kabar",
+]
+
+def linear_scan(text: str) -> Optional[str]:
+    for command, prefixes in COMMAND_PREFIXES.items():
+        if any(text.startswith(prefix) for prefix in prefixes):
+            return command
+    return None
+
+def main(iterations: int = 20000) -> None:
+    for text in MESSAGES:
+        assert command_router.classify(text) == linear_scan(text), text
+
+    for name, classify in (("linear scan", linear_scan), ("command router", command_router.classify)):
+        elapsed = min(timeit.repeat(
+            lambda: [classify(text) for text in MESSAGES], number=iterations, repeat=5
+        ))
+        per_message = elapsed / (iterations * len(MESSAGES)) * 1e9
+        print(f"{name:>15}: {per_message:8.1f} ns/message")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -20,10 +20,74 @@ WHATSAPP_CONFIG: Dict[str, Any] = {
 # Database Configuration
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/database/financial_bot.db")
 
+# Async driver used by DatabaseManager; derived from DATABASE_URL when not set
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+_db_scheme, _db_rest = DATABASE_URL.split(":", 1)
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", f"{ASYNC_DRIVERS.get(_db_scheme, _db_scheme)}:{_db_rest}"
+)
+
+# Connection pool configuration for the async engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_ECHO = os.getenv("DB_ECHO", "False").lower() == "true"
+# Sessions held longer than this many seconds are logged as possible leaks
+DB_SESSION_LEAK_THRESHOLD = float(os.getenv("DB_SESSION_LEAK_THRESHOLD", "30"))
+# Statements slower than this many seconds are logged and listed on /metrics
+DB_SLOW_QUERY_SECONDS = float(os.getenv("DB_SLOW_QUERY_SECONDS", "0.1"))
+
+# Per-user dashboard snapshots: maximum entries and seconds before a snapshot is rebuilt
+# even without writes (budget windows move with time)
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "1000"))
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+
+# Reports and trends from per-user NumPy columns: "auto" (when numpy is installed), "columnar"
+# or "sql" (daily rollups), the memory budget in MB before cold users are evicted, and seconds
+# before a user's columns are reloaded even when their row count still matches the ledger
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "auto")
+ANALYTICS_CACHE_MB = float(os.getenv("ANALYTICS_CACHE_MB", "256"))
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+
+# Background budget alerts and insights: seconds between scheduler passes, users per batch
+# (one unit of work), and stored insights: maximum entries and seconds before recomputing
+INSIGHT_INTERVAL = float(os.getenv("INSIGHT_INTERVAL", "1.0"))
+INSIGHT_BATCH_SIZE = int(os.getenv("INSIGHT_BATCH_SIZE", "100"))
+INSIGHT_CACHE_SIZE = int(os.getenv("INSIGHT_CACHE_SIZE", "10000"))
+INSIGHT_CACHE_TTL = float(os.getenv("INSIGHT_CACHE_TTL", "300"))
+
+# Rows per multi-row INSERT/commit for bulk transaction imports
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+
+# Phone number -> User cache: maximum entries and seconds before an entry is reloaded
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+
+# Inbound message pipeline: worker count and maximum queued/in-flight messages
+MESSAGE_WORKERS = int(os.getenv("MESSAGE_WORKERS", "8"))
+MESSAGE_QUEUE_SIZE = int(os.getenv("MESSAGE_QUEUE_SIZE", "1000"))
+
+# WebSocket fan-out: per-socket send queue length, what to do when it is full
+# ("drop" the message or "disconnect" the socket), and the balance/budget debounce window
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "disconnect")
+WS_DEBOUNCE_SECONDS = float(os.getenv("WS_DEBOUNCE_SECONDS", "0.25"))
+# Pub/sub between server workers: "memory" (single worker) or "unix" (workers on one host,
+# which must share WS_BROKER_DIR)
+WS_BROKER = os.getenv("WS_BROKER", "memory")
+WS_BROKER_DIR = os.getenv("WS_BROKER_DIR", os.path.join(BASE_DIR, ".ws_broker"))
+
 # Web Server Configuration
 WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
 WEB_PORT = int(os.getenv("WEB_PORT", "8000"))
 DEBUG_MODE = os.getenv("DEBUG_MODE", "True").lower() == "true"
+# JSON encoder for API and WebSocket payloads: "auto" (orjson if installed), "orjson" or "stdlib"
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
 
 # Security Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -31,6 +95,8 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 
 # Language Processing Configuration
 LANGUAGE_MODEL = os.getenv("LANGUAGE_MODEL", "indonesian")
+# Informal -> formal word mappings; edits are picked up without a restart
+INFORMAL_WORDS_PATH = os.getenv("INFORMAL_WORDS_PATH", os.path.join(BASE_DIR, "config", "informal_words.json"))
 
 # Logging Configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -0,0 +1,44 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import COMMAND_PREFIXES
+
+class CommandRouter:
+    """Classifies a message by its command prefix in a single regex match.
+
+    All prefixes are compiled into one anchored alternation, longest first,
+    so overlapping prefixes ("dashboard" / "buka dashboard", "saldo" /
+    "cek saldo") always resolve to the longest one regardless of the order
+    of ``COMMAND_PREFIXES``. A prefix listed under two commands is rejected
+    at construction instead of being resolved by dict order.
+    """
+
+    def __init__(self, prefixes: Dict[str, List[str]]):
+        self._commands: Dict[str, str] = {}
+        for command, command_prefixes in prefixes.items():
+            for prefix in command_prefixes:
+                prefix = prefix.lower().strip()
+                owner = self._commands.setdefault(prefix, command)
+                if owner != command:
+                    raise ValueError(f"Prefix {prefix!r} is used by both {owner!r} and {command!r}")
+
+        alternation = "|".join(
+            re.escape(prefix) for prefix in sorted(self._commands, key=len, reverse=True)
+        )
+        self._pattern = re.compile(f"(?:{alternation})")
+
+    def match(self, text: str) -> Optional[Tuple[str, str]]:
+        """Return (command, matched prefix) for normalized text, or None"""
+        match = self._pattern.match(text)
+        if match is None:
+            return None
+        prefix = match.group()
+        return self._commands[prefix], prefix
+
+    def classify(self, text: str) -> Optional[str]:
+        """Return the command type for normalized text, or None"""
+        match = self._pattern.match(text)
+        return self._commands[match.group()] if match else None
+
+# Create global command router instance
+command_router = CommandRouter(COMMAND_PREFIXES)
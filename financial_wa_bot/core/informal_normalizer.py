@@ -0,0 +1,111 @@
+from decimal import Decimal
+from typing import Dict, Optional
+import json
+import logging
+import os
+import re
+import time
+
+from config.settings import INFORMAL_WORDS_PATH
+
+logger = logging.getLogger(__name__)
+
+# Amount suffixes; "k"/"m" must be attached to the number ("50k"), the
+# spelled-out ones may follow a space ("50 rb")
+MULTIPLIERS = {
+    "k": 1000,
+    "rb": 1000,
+    "ribu": 1000,
+    "m": 1000000,
+    "jt": 1000000,
+    "juta": 1000000,
+}
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?<![\w.,])
+    (?P<prefix>rp\.?)?                               # rp50k / rp.50.000, kept as written
+    (?:(?P<grouped>\d{1,3}(?:\.\d{3})+(?:,\d+)?)(?![\d.])   # 50.000 / 1.500.000 / 50.000,50
+      |(?P<plain>\d+(?:[.,]\d+)?))                  # 50000 / 1,5 / 1.5
+    (?:(?P<unit>k|m)|\s*(?P<word_unit>rb|ribu|jt|juta))?\b
+    |
+    \b(?P<word>[a-z]+)\b
+    """,
+    re.VERBOSE,
+)
+
+class InformalNormalizer:
+    """Single-pass rewrite of informal Indonesian chat text.
+
+    One precompiled regex walks the text once, expanding amounts ("50k",
+    "1,5 jt", "50.000,50", also after an "rp"/"rp." prefix) to plain numbers
+    and replacing slang words from a JSON dictionary. The dictionary file is re-read when its modification
+    time changes, checked at most every ``check_interval`` seconds.
+    """
+
+    def __init__(self, path: Optional[str] = None, words: Optional[Dict[str, str]] = None,
+                 check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.words: Dict[str, str] = dict(words or {})
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        if path is not None:
+            self.reload()
+
+    def reload(self) -> bool:
+        """Re-read the dictionary file. Returns False and keeps the old mappings on error."""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding="utf-8") as f:
+                words = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading informal words from {self.path}: {e}")
+            return False
+        # Swap the whole mapping so a concurrent normalize never sees a partial dict
+        self.words = {informal.lower(): formal for informal, formal in words.items()}
+        self._mtime = mtime
+        logger.info(f"Loaded {len(self.words)} informal word mappings")
+        return True
+
+    def normalize(self, text: str) -> str:
+        """Rewrite slang and shorthand amounts in lowercase text"""
+        self._reload_if_changed()
+        return TOKEN_PATTERN.sub(self._replace, text)
+
+    def _reload_if_changed(self) -> None:
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return
+        if changed:
+            self.reload()
+
+    def _replace(self, match: "re.Match[str]") -> str:
+        word = match.group("word")
+        if word is not None:
+            return self.words.get(word, word)
+
+        prefix = match.group("prefix") or ""
+        unit = match.group("unit") or match.group("word_unit")
+        grouped = match.group("grouped")
+        if grouped is not None:
+            number = grouped.replace(".", "").replace(",", ".")
+            if unit is None:
+                return prefix + number
+        else:
+            number = match.group("plain").replace(",", ".")
+            if unit is None:
+                # Plain numbers only need the decimal comma made parseable
+                return prefix + number
+        value = Decimal(number) * MULTIPLIERS[unit]
+        return prefix + format(value.normalize(), "f")
+
+# Create global informal normalizer instance
+informal_normalizer = InformalNormalizer(INFORMAL_WORDS_PATH)
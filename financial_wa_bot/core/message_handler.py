@@ -1,9 +1,12 @@
 import re
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Tuple, Optional, Union
 import logging
 from datetime import datetime
 
-from config.settings import EXPENSE_CATEGORIES, INCOME_CATEGORIES, COMMAND_PREFIXES
+from config.settings import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+from database.money import Money
+from .command_router import command_router
+from .informal_normalizer import informal_normalizer
 
 logger = logging.getLogger(__name__)
 
@@ -43,10 +46,7 @@ class MessageHandler:
 
     def _identify_command_type(self, text: str) -> Optional[str]:
         """Identify the type of command from the message"""
-        for command, prefixes in COMMAND_PREFIXES.items():
-            if any(text.startswith(prefix) for prefix in prefixes):
-                return command
-        return None
+        return command_router.classify(text)
 
     def _parse_expense(self, text: str) -> Dict[str, Any]:
         """Parse expense command text"""
@@ -56,7 +56,7 @@ class MessageHandler:
             amount_match = self.amount_pattern.search(text)
             if not amount_match:
                 raise ValueError("Jumlah pengeluaran tidak ditemukan")
-            amount = float(amount_match.group(1))
+            amount = Money.parse(amount_match.group(1))
 
             # Extract category
             category_match = self.category_pattern.search(text)
@@ -86,7 +86,7 @@ class MessageHandler:
             amount_match = self.amount_pattern.search(text)
             if not amount_match:
                 raise ValueError("Jumlah pemasukan tidak ditemukan")
-            amount = float(amount_match.group(1))
+            amount = Money.parse(amount_match.group(1))
 
             # Extract category
             category_match = self.category_pattern.search(text)
@@ -116,7 +116,7 @@ class MessageHandler:
             amount_match = self.amount_pattern.search(text)
             if not amount_match:
                 raise ValueError("Jumlah budget tidak ditemukan")
-            amount = float(amount_match.group(1))
+            amount = Money.parse(amount_match.group(1))
 
             # Extract period
             period_pattern = re.compile(r'per\s+(hari|minggu|bulan|tahun)')
@@ -134,10 +134,10 @@ class MessageHandler:
             logger.error(f"Error parsing budget: {e}")
             raise ValueError("Format budget tidak valid. Contoh: atur budget 2000000 per bulan")
 
-    def format_currency(self, amount: float) -> str:
+    def format_currency(self, amount: Union[Money, float]) -> str:
         """Format amount as Indonesian Rupiah"""
         try:
-            return f"Rp {amount:,.0f}".replace(",", ".")
+            return f"Rp {Money.parse(amount):,.0f}".replace(",", ".")
         except Exception as e:
             logger.error(f"Error formatting currency: {e}")
             return str(amount)
@@ -169,31 +169,7 @@ class MessageHandler:
 
     def parse_informal_indonesian(self, text: str) -> str:
         """Convert informal Indonesian to formal command format"""
-        # Dictionary of informal to formal word mappings
-        informal_dict = {
-            "catet": "catat",
-            "duit": "uang",
-            "keluar": "pengeluaran",
-            "masuk": "pemasukan",
-            "buat": "untuk",
-            "dr": "dari",
-            "utk": "untuk",
-            "rb": "ribu",
-            "jt": "juta",
-            "bln": "bulan",
-            "mgg": "minggu",
-            "thn": "tahun"
-        }
-
-        # Convert numbers with k/m suffix
-        text = re.sub(r'(\d+)k\b', lambda m: str(int(m.group(1)) * 1000), text)
-        text = re.sub(r'(\d+)m\b', lambda m: str(int(m.group(1)) * 1000000), text)
-
-        # Replace informal words with formal ones
-        for informal, formal in informal_dict.items():
-            text = re.sub(r'\b' + informal + r'\b', formal, text)
-
-        return text
+        return informal_normalizer.normalize(text)
 
 # Create global message handler instance
 message_handler = MessageHandler()
@@ -0,0 +1,155 @@
+from typing import Dict, Any, Callable, Awaitable, Deque, List, Tuple
+from collections import deque
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+MessageHandlerFunc = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class MessagePipeline:
+    """Bounded, per-sender ordered processing of inbound messages.
+
+    Messages from one phone number are handled strictly in arrival order,
+    while different senders are handled in parallel by a fixed worker pool.
+    At most ``max_pending`` messages are queued or in flight; ``submit``
+    waits for room (backpressure) and ``try_submit`` rejects instead.
+    """
+
+    def __init__(
+        self,
+        handler: MessageHandlerFunc,
+        workers: int = 8,
+        max_pending: int = 1000,
+        key: Callable[[Dict[str, Any]], str] = lambda message: message.get('from', '')
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.key = key
+
+        self._room = asyncio.Event()
+        self._room.set()
+        self._pending: Dict[str, Deque[Tuple[Dict[str, Any], float]]] = {}
+        self._ready: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.blocked_submits = 0
+        self.busy_workers = 0
+        self.in_flight = 0
+        self.high_watermark = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def start(self) -> None:
+        """Start the worker pool"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"message-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Message pipeline started with {self.workers} workers")
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the workers, optionally waiting for queued messages first"""
+        if drain:
+            await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Message pipeline stopped")
+
+    async def join(self) -> None:
+        """Wait until every submitted message has been processed"""
+        await self._idle.wait()
+
+    async def submit(self, message: Dict[str, Any]) -> None:
+        """Queue a message, waiting while the pipeline is full"""
+        if self.in_flight >= self.max_pending:
+            self.blocked_submits += 1
+        while self.in_flight >= self.max_pending:
+            self._room.clear()
+            await self._room.wait()
+        self._enqueue(message)
+
+    def try_submit(self, message: Dict[str, Any]) -> bool:
+        """Queue a message if there is room; returns False when the pipeline is full"""
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            return False
+        self._enqueue(message)
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput and backpressure counters"""
+        return {
+            "workers": self.workers,
+            "busy_workers": self.busy_workers,
+            "in_flight": self.in_flight,
+            "max_pending": self.max_pending,
+            "high_watermark": self.high_watermark,
+            "active_senders": len(self._pending),
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "blocked_submits": self.blocked_submits,
+            "avg_wait_seconds": self.total_wait / self.processed if self.processed else 0.0,
+            "max_wait_seconds": self.max_wait,
+        }
+
+    def _enqueue(self, message: Dict[str, Any]) -> None:
+        key = self.key(message)
+        queue = self._pending.get(key)
+        if queue is None:
+            # Sender has no queued or in-flight message: schedule it
+            queue = self._pending[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append((message, time.monotonic()))
+
+        self.submitted += 1
+        self.in_flight += 1
+        self.high_watermark = max(self.high_watermark, self.in_flight)
+        self._idle.clear()
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._pending[key]
+            message, enqueued_at = queue.popleft()
+
+            wait = time.monotonic() - enqueued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+            self.busy_workers += 1
+            try:
+                await self.handler(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error in message pipeline for {key}: {e}")
+            finally:
+                self.busy_workers -= 1
+                self.processed += 1
+                self.in_flight -= 1
+                self._room.set()
+
+                # One message per turn keeps a chatty sender from starving others;
+                # the key is re-queued only after this message finished, preserving order
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._pending[key]
+                if self.in_flight == 0:
+                    self._idle.set()
@@ -1,29 +1,60 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Awaitable
 import logging
 from wa_automate_python import WhatsApp
 from datetime import datetime
 
-from config.settings import WHATSAPP_CONFIG, COMMAND_PREFIXES
+from config.settings import WHATSAPP_CONFIG, MESSAGE_WORKERS, MESSAGE_QUEUE_SIZE
 from database.db_manager import db_manager
+from .command_router import command_router
+from .message_pipeline import MessagePipeline
 
 logger = logging.getLogger(__name__)
 
+CommandHandler = Callable[[Any, str], Awaitable[None]]
+
 class WhatsAppClient:
     def __init__(self):
         self.client: Optional[WhatsApp] = None
         self.is_ready: bool = False
+        self.pipeline = MessagePipeline(
+            self.process_message,
+            workers=MESSAGE_WORKERS,
+            max_pending=MESSAGE_QUEUE_SIZE,
+        )
+        # Command type (see COMMAND_PREFIXES) -> handler taking (user, text)
+        self.handlers: Dict[str, CommandHandler] = {
+            'expense': self._handle_expense,
+            'income': self._handle_income,
+            'balance': lambda user, text: self._handle_balance(user),
+            'report': lambda user, text: self._handle_report(user),
+            'budget': self._handle_budget,
+            'help': lambda user, text: self._handle_help(user),
+            'dashboard': lambda user, text: self._handle_dashboard(user),
+        }
 
     async def initialize(self) -> None:
         """Initialize WhatsApp client"""
         try:
             # Initialize WhatsApp client with configuration
             self.client = WhatsApp(**WHATSAPP_CONFIG)
+            await self.pipeline.start()
             self.is_ready = True
             logger.info("WhatsApp client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize WhatsApp client: {e}")
             raise
 
+    async def enqueue_message(self, message: Dict[str, Any]) -> None:
+        """Hand an incoming message to the pipeline; waits while the queue is full"""
+        if not message or 'text' not in message:
+            return
+        await self.pipeline.submit(message)
+
+    async def close(self) -> None:
+        """Drain queued messages and stop the pipeline workers"""
+        await self.pipeline.stop(drain=True)
+        self.is_ready = False
+
     async def process_message(self, message: Dict[str, Any]) -> None:
         """Process incoming WhatsApp message"""
         try:
@@ -34,28 +65,17 @@ class WhatsAppClient:
             phone_number = message.get('from', '')
             text = message.get('text', '').lower().strip()
             
-            # Get or create user
-            user = await db_manager.get_user_by_phone(phone_number)
-            if not user:
-                user = await db_manager.create_user(phone_number)
-
-            # Process commands
-            if any(text.startswith(prefix) for prefix in COMMAND_PREFIXES['expense']):
-                await self._handle_expense(user, text)
-            elif any(text.startswith(prefix) for prefix in COMMAND_PREFIXES['income']):
-                await self._handle_income(user, text)
-            elif any(text.startswith(prefix) for prefix in COMMAND_PREFIXES['balance']):
-                await self._handle_balance(user)
-            elif any(text.startswith(prefix) for prefix in COMMAND_PREFIXES['report']):
-                await self._handle_report(user)
-            elif any(text.startswith(prefix) for prefix in COMMAND_PREFIXES['budget']):
-                await self._handle_budget(user, text)
-            elif any(text.startswith(prefix) for prefix in COMMAND_PREFIXES['help']):
-                await self._handle_help(user)
-            elif any(text.startswith(prefix) for prefix in COMMAND_PREFIXES['dashboard']):
-                await self._handle_dashboard(user)
-            else:
-                await self._handle_unknown_command(user)
+            command_type = command_router.classify(text)
+            with db_manager.query_metrics.scope("command", command_type or "unknown"):
+                # Get or create user
+                user = await db_manager.get_or_create_user(phone_number)
+
+                # Process commands
+                handler = self.handlers.get(command_type)
+                if handler is None:
+                    await self._handle_unknown_command(user)
+                else:
+                    await handler(user, text)
 
         except Exception as e:
             logger.error(f"Error processing message: {e}")
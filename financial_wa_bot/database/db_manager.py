@@ -1,184 +1,884 @@
-from typing import Optional, List, Any, Dict
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.exc import SQLAlchemyError
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional, List, Any, AsyncIterator, AsyncIterable, Callable, Dict, Iterable, Set, Tuple, Union
+from sqlalchemy import create_engine, inspect, insert, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 import logging
 
-from config.settings import DATABASE_URL
-from .models import Base, User, Transaction, Budget, Notification, FinancialGoal, FinancialTip
+from config.settings import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_ECHO,
+    DB_SESSION_LEAK_THRESHOLD,
+    DB_SLOW_QUERY_SECONDS,
+    BULK_INSERT_CHUNK_SIZE,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+)
+from . import migrations, queries
+from .money import Money, ZERO
+from .rows import (
+    BUDGET_COLUMNS,
+    NOTIFICATION_COLUMNS,
+    PENDING_BUDGET_CHECK_COLUMNS,
+    TRANSACTION_COLUMNS,
+    BudgetRow,
+    NotificationRow,
+    PendingBudgetCheckRow,
+    TransactionRow,
+)
+from .query_metrics import QueryMetrics
+from .session_tracking import SessionTracker
+from .user_cache import LRUCache
+from .models import (
+    Base,
+    User,
+    Transaction,
+    TransactionType,
+    UserBalance,
+    Budget,
+    Notification,
+    PendingBudgetCheck,
+    FinancialGoal,
+    FinancialTip,
+)
 
 logger = logging.getLogger(__name__)
 
+# Called after a commit that changed a user's transactions, budgets or
+# notifications; None means any user may have changed
+WriteListener = Callable[[Optional[int]], None]
+# Called after a commit that inserted transactions for a user, with the new
+# rows (id, date, type, category, amount), or None when they were not tracked
+# one by one (bulk imports)
+TransactionListener = Callable[[int, Optional[List[Dict[str, Any]]]], None]
+
+async def _chunks(
+    rows: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+    size: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Group a sync or async stream of rows into lists of at most ``size``."""
+    chunk: List[Dict[str, Any]] = []
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    else:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def _async_engine_options(url: str) -> Dict[str, Any]:
+    """Build pool options for the async engine based on the database URL."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite only exists inside a single connection
+        return {"poolclass": StaticPool}
+
+    options: Dict[str, Any] = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+    if parsed.get_backend_name() == "sqlite":
+        # aiosqlite defaults to NullPool for file databases, reconnecting on every session
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
 class DatabaseManager:
     def __init__(self):
+        # Sync engine is kept for schema management and maintenance tooling
         self.engine = create_engine(DATABASE_URL)
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        # Async engine serves every request-path query without blocking the event loop
+        self.async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            echo=DB_ECHO,
+            **_async_engine_options(ASYNC_DATABASE_URL),
+        )
+        self.AsyncSessionLocal = async_sessionmaker(
+            self.async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self.session_tracker = SessionTracker(DB_SESSION_LEAK_THRESHOLD)
+        self.session_tracker.attach(self.async_engine.sync_engine)
+        self.query_metrics = QueryMetrics(DB_SLOW_QUERY_SECONDS)
+        self.query_metrics.attach(self.engine)
+        self.query_metrics.attach(self.async_engine.sync_engine)
+        # Detached User rows keyed by phone number for per-message identity lookups
+        self.user_cache: LRUCache[User] = LRUCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+        self._write_listeners: List[WriteListener] = []
+        self._transaction_listeners: List[TransactionListener] = []
 
     def init_db(self) -> None:
-        """Initialize the database, creating all tables."""
+        """Initialize the database, creating missing tables and applying pending migrations."""
         try:
+            fresh = not inspect(self.engine).has_table(Transaction.__tablename__)
             Base.metadata.create_all(bind=self.engine)
+            if fresh:
+                # create_all already produced the latest schema
+                migrations.stamp_head(self.engine)
+            else:
+                migrations.upgrade(self.engine)
             logger.info("Database initialized successfully")
         except SQLAlchemyError as e:
             logger.error(f"Error initializing database: {e}")
             raise
 
-    def get_db(self) -> Session:
-        """Get database session."""
-        db = self.SessionLocal()
+    async def close(self) -> None:
+        """Dispose of pooled connections."""
+        await self.async_engine.dispose()
+        self.engine.dispose()
+
+    @asynccontextmanager
+    async def unit_of_work(self, label: str = "unit_of_work") -> AsyncIterator[AsyncSession]:
+        """Open a tracked session that commits on success, rolls back on error and always closes."""
+        token = self.session_tracker.opened(label)
+        db = self.AsyncSessionLocal()
         try:
-            return db
-        except:
-            db.close()
+            yield db
+            await db.commit()
+        except BaseException:
+            await db.rollback()
             raise
+        finally:
+            await db.close()
+            self.session_tracker.closed(token)
+        self._notify_written(db.info.pop("written_users", ()))
+        self._notify_inserted(db.info.pop("inserted_transactions", ()))
+
+    def add_write_listener(self, listener: WriteListener) -> None:
+        """Call ``listener(user_id)`` after each commit that wrote user financial data."""
+        self._write_listeners.append(listener)
+
+    def _mark_written(self, db: AsyncSession, user_id: Optional[int]) -> None:
+        """Record a user whose data this unit of work changed, for listeners after commit."""
+        written: Set[Optional[int]] = db.info.setdefault("written_users", set())
+        written.add(user_id)
+
+    def _notify_written(self, user_ids: Iterable[Optional[int]]) -> None:
+        for user_id in user_ids:
+            for listener in self._write_listeners:
+                try:
+                    listener(user_id)
+                except Exception as e:
+                    logger.error(f"Error in write listener: {e}")
+
+    def add_transaction_listener(self, listener: TransactionListener) -> None:
+        """Call ``listener(user_id, rows)`` after each commit that inserted transactions."""
+        self._transaction_listeners.append(listener)
 
-    async def create_user(self, phone_number: str, name: Optional[str] = None) -> User:
+    def _mark_inserted(self, db: AsyncSession, user_id: int, rows: Optional[List[Dict[str, Any]]]) -> None:
+        """Record transactions this unit of work inserted, for listeners after commit."""
+        db.info.setdefault("inserted_transactions", []).append((user_id, rows))
+
+    def _notify_inserted(self, inserted: Iterable[Tuple[int, Optional[List[Dict[str, Any]]]]]) -> None:
+        for user_id, rows in inserted:
+            for listener in self._transaction_listeners:
+                try:
+                    listener(user_id, rows)
+                except Exception as e:
+                    logger.error(f"Error in transaction listener: {e}")
+
+    @asynccontextmanager
+    async def _session(self, session: Optional[AsyncSession], label: str) -> AsyncIterator[AsyncSession]:
+        """Join the caller's unit of work, or run in a new one."""
+        if session is not None:
+            yield session
+        else:
+            async with self.unit_of_work(label) as db:
+                yield db
+
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Pool checkout/return counters, session tracking state and user cache counters."""
+        self.session_tracker.check_leaks()
+        metrics = self.session_tracker.snapshot(self.async_engine.pool.status())
+        metrics["user_cache"] = self.user_cache.metrics()
+        return metrics
+
+    async def create_user(
+        self,
+        phone_number: str,
+        name: Optional[str] = None,
+        session: Optional[AsyncSession] = None
+    ) -> User:
         """Create a new user."""
-        db = self.get_db()
-        try:
-            user = User(phone_number=phone_number, name=name)
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+        async with self._session(session, "create_user") as db:
+            try:
+                user = User(phone_number=phone_number, name=name)
+                db.add(user)
+                await db.flush()
+                return user
+            except SQLAlchemyError as e:
+                logger.error(f"Error creating user: {e}")
+                raise
+
+    async def get_or_create_user(
+        self,
+        phone_number: str,
+        name: Optional[str] = None
+    ) -> User:
+        """Resolve a phone number to a user, registering it on first contact.
+
+        Served from the in-process cache for active users. On a miss the user
+        is inserted with upsert semantics and read back, so concurrent first
+        messages from one number resolve to the same row instead of failing on
+        the unique constraint.
+        """
+        user = self.user_cache.get(phone_number)
+        if user is not None:
             return user
-        except SQLAlchemyError as e:
-            db.rollback()
-            logger.error(f"Error creating user: {e}")
-            raise
-        finally:
-            db.close()
+        async with self.unit_of_work("get_or_create_user") as db:
+            try:
+                user = (await db.execute(queries.user_by_phone(phone_number))).scalars().first()
+                if user is None:
+                    await db.execute(queries.insert_user_if_missing(
+                        self.async_engine.dialect.name, phone_number, name
+                    ))
+                    user = (await db.execute(queries.user_by_phone(phone_number))).scalars().one()
+            except SQLAlchemyError as e:
+                logger.error(f"Error resolving user: {e}")
+                raise
+        self.user_cache.put(phone_number, user)
+        return user
+
+    def invalidate_user(self, phone_number: str) -> None:
+        """Drop a cached user, e.g. after changing or deleting its row."""
+        self.user_cache.invalidate(phone_number)
 
-    async def get_user_by_phone(self, phone_number: str) -> Optional[User]:
+    async def get_user_by_id(
+        self,
+        user_id: int,
+        session: Optional[AsyncSession] = None
+    ) -> Optional[User]:
+        """Get user by id."""
+        async with self._session(session, "get_user_by_id") as db:
+            try:
+                return await db.get(User, user_id)
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting user: {e}")
+                raise
+
+    async def get_user_by_phone(
+        self,
+        phone_number: str,
+        session: Optional[AsyncSession] = None
+    ) -> Optional[User]:
         """Get user by phone number."""
-        db = self.get_db()
-        try:
-            return db.query(User).filter(User.phone_number == phone_number).first()
-        except SQLAlchemyError as e:
-            logger.error(f"Error getting user: {e}")
-            raise
-        finally:
-            db.close()
+        async with self._session(session, "get_user_by_phone") as db:
+            try:
+                result = await db.execute(queries.user_by_phone(phone_number))
+                return result.scalars().first()
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting user: {e}")
+                raise
+
+    async def create_transaction(
+        self,
+        user_id: int,
+        transaction_data: Dict[str, Any],
+        session: Optional[AsyncSession] = None
+    ) -> Transaction:
+        """Create a new transaction; running balance, daily rollup and budget counters update in the same commit."""
+        async with self._session(session, "create_transaction") as db:
+            try:
+                data = dict(transaction_data)
+                if not isinstance(data.get("type"), TransactionType):
+                    data["type"] = TransactionType(data["type"])
+                data["amount"] = Money.parse(data["amount"])
+                transaction = Transaction(user_id=user_id, **data)
+                db.add(transaction)
+                await db.flush()
+                await self._apply_to_balance(db, user_id, transaction.type, transaction.amount)
+                if transaction.type == TransactionType.EXPENSE:
+                    await db.execute(queries.increment_budget_spent(
+                        user_id, transaction.category, transaction.date, transaction.amount
+                    ))
+                row = {
+                    "id": transaction.id,
+                    "date": transaction.date,
+                    "type": transaction.type,
+                    "category": transaction.category,
+                    "amount": transaction.amount,
+                }
+                await self._add_to_rollups(db, user_id, [row])
+                await db.flush()
+                self._mark_written(db, user_id)
+                self._mark_inserted(db, user_id, [row])
+                return transaction
+            except SQLAlchemyError as e:
+                logger.error(f"Error creating transaction: {e}")
+                raise
+
+    async def bulk_create_transactions(
+        self,
+        user_id: int,
+        rows: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        chunk_size: int = BULK_INSERT_CHUNK_SIZE
+    ) -> int:
+        """Insert many transactions for one user. Returns the number of rows inserted.
+
+        ``rows`` is consumed lazily and written in chunks of ``chunk_size``:
+        each chunk is one multi-row INSERT, one running balance update, one
+        daily rollup upsert and one grouped budget recount, committed in its
+        own unit of work. Chunks
+        committed before an error stay committed.
+        """
+        inserted = 0
+        async for chunk in _chunks(rows, chunk_size):
+            async with self.unit_of_work("bulk_create_transactions") as db:
+                try:
+                    now = datetime.utcnow()
+                    values = []
+                    income = expenses = ZERO
+                    for data in chunk:
+                        data = dict(data)
+                        if not isinstance(data.get("type"), TransactionType):
+                            data["type"] = TransactionType(data["type"])
+                        data["amount"] = Money.parse(data["amount"])
+                        data.setdefault("date", now)
+                        if data["type"] == TransactionType.INCOME:
+                            income += data["amount"]
+                        else:
+                            expenses += data["amount"]
+                        values.append({**data, "user_id": user_id, "created_at": now, "updated_at": now})
+
+                    await db.execute(insert(Transaction), values)
+                    await self._add_to_balance(db, user_id, income, expenses, len(values))
+                    await self._add_to_rollups(db, user_id, values)
+
+                    expense_dates = [v["date"] for v in values if v["type"] == TransactionType.EXPENSE]
+                    if expense_dates:
+                        await self._recount_budgets(db, user_id, min(expense_dates), max(expense_dates))
+                    self._mark_written(db, user_id)
+                    self._mark_inserted(db, user_id, None)
+                except SQLAlchemyError as e:
+                    logger.error(f"Error bulk creating transactions: {e}")
+                    raise
+            inserted += len(chunk)
+        logger.info(f"Bulk inserted {inserted} transactions for user {user_id}")
+        return inserted
+
+    async def _add_to_rollups(self, db: AsyncSession, user_id: int, rows: Iterable[Dict[str, Any]]) -> None:
+        """Add transactions to their (day, type, category) rollups in one upsert."""
+        buckets: Dict[Tuple[Any, TransactionType, str], Dict[str, Any]] = {}
+        for row in rows:
+            key = (row["date"].date(), row["type"], row["category"])
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {
+                    "user_id": user_id, "day": key[0], "type": key[1], "category": key[2],
+                    "total": ZERO, "count": 0,
+                }
+            bucket["total"] += row["amount"]
+            bucket["count"] += 1
+        await db.execute(queries.increment_daily_rollups(self.async_engine.dialect.name, list(buckets.values())))
 
-    async def create_transaction(self, user_id: int, transaction_data: Dict[str, Any]) -> Transaction:
-        """Create a new transaction."""
-        db = self.get_db()
+    async def rebuild_daily_rollups(self, user_id: Optional[int] = None) -> int:
+        """Recompute daily rollups from transactions. Returns the number of rollup rows."""
         try:
-            transaction = Transaction(user_id=user_id, **transaction_data)
-            db.add(transaction)
-            db.commit()
-            db.refresh(transaction)
-            return transaction
+            async with self.async_engine.begin() as conn:
+                count = await conn.run_sync(migrations.recompute_daily_rollups, user_id)
+            self._notify_written([user_id])
+            logger.info(f"Rebuilt {count} daily rollups")
+            return count
         except SQLAlchemyError as e:
-            db.rollback()
-            logger.error(f"Error creating transaction: {e}")
+            logger.error(f"Error rebuilding daily rollups: {e}")
             raise
-        finally:
-            db.close()
 
-    async def get_user_transactions(self, user_id: int, limit: int = 10) -> List[Transaction]:
-        """Get user's transactions."""
-        db = self.get_db()
+    async def _recount_budgets(self, db: AsyncSession, user_id: int, start: datetime, end: datetime) -> None:
+        """Recompute spent counters of the budgets overlapping [start, end] in one grouped query."""
+        budgets = list((await db.execute(queries.budgets_overlapping(user_id, start, end))).scalars().all())
+        if not budgets:
+            return
+        spent = (await db.execute(queries.budget_spent(user_id, budgets))).one()
+        for budget in budgets:
+            budget.spent_amount = getattr(spent, f"b{budget.id}")
+        await db.flush()
+
+    async def get_user_transactions(
+        self,
+        user_id: int,
+        limit: int = 10,
+        before: Optional[Tuple[datetime, int]] = None,
+        offset: int = 0,
+        session: Optional[AsyncSession] = None
+    ) -> List[Transaction]:
+        """Get user's transactions, newest first, after an optional (date, id) keyset cursor."""
+        async with self._session(session, "get_user_transactions") as db:
+            try:
+                result = await db.execute(queries.user_transactions(user_id, limit, before, offset))
+                return list(result.scalars().all())
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting transactions: {e}")
+                raise
+
+    async def get_transaction_rows(
+        self,
+        user_id: int,
+        limit: int = 10,
+        before: Optional[Tuple[datetime, int]] = None,
+        offset: int = 0,
+        session: Optional[AsyncSession] = None
+    ) -> List[TransactionRow]:
+        """Read-only projection of get_user_transactions, without ORM hydration."""
+        async with self._session(session, "get_transaction_rows") as db:
+            try:
+                result = await db.execute(
+                    queries.user_transactions(user_id, limit, before, offset, columns=TRANSACTION_COLUMNS)
+                )
+                return [TransactionRow._make(row) for row in result.tuples()]
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting transaction rows: {e}")
+                raise
+
+    async def iter_user_transactions(
+        self,
+        user_id: int,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[TransactionRow]]:
+        """Yield a user's full history as row projections in keyset-paginated batches, newest first.
+
+        Each batch runs in its own short unit of work, so slow consumers never
+        hold a pooled connection between batches.
+        """
+        before = None
+        while True:
+            batch = await self.get_transaction_rows(user_id, batch_size, before)
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+            before = (batch[-1].date, batch[-1].id)
+
+    async def get_transaction_count(self, user_id: int, session: Optional[AsyncSession] = None) -> int:
+        """Get user's transaction count from the running balance ledger."""
+        balance = await self.get_user_balance(user_id, session=session)
+        return balance.transaction_count
+
+    async def get_ledger_transaction_count(
+        self,
+        user_id: int,
+        session: Optional[AsyncSession] = None
+    ) -> Optional[int]:
+        """Get the ledger's transaction count without seeding it; None when there is no ledger row."""
+        async with self._session(session, "get_ledger_transaction_count") as db:
+            try:
+                return (await db.execute(queries.ledger_transaction_count(user_id))).scalar()
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting ledger transaction count: {e}")
+                raise
+
+    async def get_user_balance(
+        self,
+        user_id: int,
+        session: Optional[AsyncSession] = None
+    ) -> UserBalance:
+        """Get user's running balance.
+
+        Reads never write: without a ledger row (no transactions since the
+        ledger existed, or no such user) the totals are computed from history
+        and returned as an unsaved row. The write path seeds the ledger.
+        """
+        async with self._session(session, "get_user_balance") as db:
+            try:
+                balance = await db.get(UserBalance, user_id)
+                if balance is None:
+                    balance = await self._balance_from_history(db, user_id)
+                return balance
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting balance: {e}")
+                raise
+
+    async def rebuild_balances(
+        self,
+        user_id: Optional[int] = None,
+        session: Optional[AsyncSession] = None
+    ) -> int:
+        """Recompute running balances from transactions. Returns the number of rows written."""
+        async with self._session(session, "rebuild_balances") as db:
+            try:
+                rows = (await db.execute(queries.balance_totals(user_id))).all()
+                for row in rows:
+                    await db.merge(UserBalance(
+                        user_id=row.user_id,
+                        total_income=row.total_income,
+                        total_expenses=row.total_expenses,
+                        transaction_count=row.transaction_count,
+                        updated_at=datetime.utcnow(),
+                    ))
+                await db.flush()
+                self._mark_written(db, user_id)
+                logger.info(f"Rebuilt {len(rows)} user balances")
+                return len(rows)
+            except SQLAlchemyError as e:
+                logger.error(f"Error rebuilding balances: {e}")
+                raise
+
+    async def verify_balances(
+        self,
+        session: Optional[AsyncSession] = None
+    ) -> List[Dict[str, Any]]:
+        """Compare running balances against transaction history and return mismatches.
+
+        Amounts are integer minor units, so any difference at all is drift.
+        """
+        async with self._session(session, "verify_balances") as db:
+            try:
+                actual = {row.user_id: row for row in (await db.execute(queries.balance_totals())).all()}
+                stored = {b.user_id: b for b in (await db.execute(select(UserBalance))).scalars()}
+
+                mismatches = []
+                for uid in set(actual) | set(stored):
+                    expected_income = actual[uid].total_income if uid in actual else ZERO
+                    expected_expenses = actual[uid].total_expenses if uid in actual else ZERO
+                    expected_count = actual[uid].transaction_count if uid in actual else 0
+                    ledger = stored.get(uid)
+                    if ledger is None:
+                        if uid in actual:
+                            mismatches.append({"user_id": uid, "reason": "missing"})
+                        continue
+                    if (ledger.total_income != expected_income
+                            or ledger.total_expenses != expected_expenses
+                            or ledger.transaction_count != expected_count):
+                        mismatches.append({
+                            "user_id": uid,
+                            "reason": "drift",
+                            "stored": (str(ledger.total_income), str(ledger.total_expenses), ledger.transaction_count),
+                            "expected": (str(expected_income), str(expected_expenses), expected_count),
+                        })
+                return mismatches
+            except SQLAlchemyError as e:
+                logger.error(f"Error verifying balances: {e}")
+                raise
+
+    async def _apply_to_balance(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        transaction_type: TransactionType,
+        amount: Money
+    ) -> None:
+        """Add a flushed transaction to the user's running balance."""
+        if transaction_type == TransactionType.INCOME:
+            await self._add_to_balance(db, user_id, amount, ZERO, 1)
+        else:
+            await self._add_to_balance(db, user_id, ZERO, amount, 1)
+
+    async def _add_to_balance(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        income: Money,
+        expenses: Money,
+        count: int
+    ) -> None:
+        """Add the totals of flushed transactions to the user's running balance."""
+        statement = (
+            update(UserBalance)
+            .where(UserBalance.user_id == user_id)
+            .values({
+                "total_income": UserBalance.total_income + income,
+                "total_expenses": UserBalance.total_expenses + expenses,
+                "transaction_count": UserBalance.transaction_count + count,
+                "updated_at": datetime.utcnow(),
+            })
+        )
+        result = await db.execute(statement)
+        if result.rowcount == 0:
+            # First transactions since the ledger existed: seed from history, which already
+            # includes the flushed rows
+            _, created = await self._seed_balance(db, user_id)
+            if not created:
+                # Lost the seeding race; the winner's totals do not include our rows
+                await db.execute(statement)
+
+    async def _balance_from_history(self, db: AsyncSession, user_id: int) -> UserBalance:
+        """Build an unsaved ledger row from the user's full transaction history."""
+        row = (await db.execute(
+            queries.balance_totals(user_id)
+        )).first()
+        return UserBalance(
+            user_id=user_id,
+            total_income=row.total_income if row else ZERO,
+            total_expenses=row.total_expenses if row else ZERO,
+            transaction_count=row.transaction_count if row else 0,
+        )
+
+    async def _seed_balance(self, db: AsyncSession, user_id: int) -> Tuple[UserBalance, bool]:
+        """Insert a ledger row computed from the user's full history.
+
+        Returns the ledger row and whether this call created it.
+        """
+        balance = await self._balance_from_history(db, user_id)
         try:
-            return db.query(Transaction)\
-                    .filter(Transaction.user_id == user_id)\
-                    .order_by(Transaction.date.desc())\
-                    .limit(limit)\
-                    .all()
-        except SQLAlchemyError as e:
-            logger.error(f"Error getting transactions: {e}")
-            raise
-        finally:
-            db.close()
+            async with db.begin_nested():
+                db.add(balance)
+            return balance, True
+        except IntegrityError:
+            # A concurrent writer seeded the row first
+            return await db.get(UserBalance, user_id, populate_existing=True), False
 
-    async def create_budget(self, budget_data: Dict[str, Any]) -> Budget:
+    async def get_period_buckets(
+        self,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime,
+        session: Optional[AsyncSession] = None
+    ) -> List[Any]:
+        """Get (day, type, category) totals for a date range."""
+        async with self._session(session, "get_period_buckets") as db:
+            try:
+                return list((await db.execute(
+                    queries.period_buckets(user_id, start_date, end_date)
+                )).all())
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting period buckets: {e}")
+                raise
+
+    async def get_transaction_columns(
+        self,
+        user_id: int,
+        session: Optional[AsyncSession] = None
+    ) -> List[Tuple[int, datetime, TransactionType, str, int]]:
+        """Get (id, date, type, category, amount in minor units) for all of a user's transactions."""
+        async with self._session(session, "get_transaction_columns") as db:
+            try:
+                return list((await db.execute(queries.transaction_columns(user_id))).tuples())
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting transaction columns: {e}")
+                raise
+
+    async def create_budget(
+        self,
+        budget_data: Dict[str, Any],
+        session: Optional[AsyncSession] = None
+    ) -> Budget:
         """Create a new budget."""
-        db = self.get_db()
-        try:
-            budget = Budget(**budget_data)
-            db.add(budget)
-            db.commit()
-            db.refresh(budget)
-            return budget
-        except SQLAlchemyError as e:
-            db.rollback()
-            logger.error(f"Error creating budget: {e}")
-            raise
-        finally:
-            db.close()
+        async with self._session(session, "create_budget") as db:
+            try:
+                budget = Budget(**{**budget_data, "amount": Money.parse(budget_data["amount"])})
+                db.add(budget)
+                await db.flush()
+                # Count expenses already recorded inside the new budget's window
+                spent = (await db.execute(queries.budget_spent(budget.user_id, [budget]))).one()
+                budget.spent_amount = getattr(spent, f"b{budget.id}")
+                await db.flush()
+                self._mark_written(db, budget.user_id)
+                return budget
+            except SQLAlchemyError as e:
+                logger.error(f"Error creating budget: {e}")
+                raise
 
-    async def get_user_budgets(self, user_id: int) -> List[Budget]:
+    async def get_user_budgets(
+        self,
+        user_id: int,
+        session: Optional[AsyncSession] = None
+    ) -> List[Budget]:
         """Get user's budgets."""
-        db = self.get_db()
+        async with self._session(session, "get_user_budgets") as db:
+            try:
+                result = await db.execute(queries.user_budgets(user_id))
+                return list(result.scalars().all())
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting budgets: {e}")
+                raise
+
+    async def get_active_budgets(
+        self,
+        user_id: int,
+        at: Optional[datetime] = None,
+        category: Optional[str] = None,
+        session: Optional[AsyncSession] = None
+    ) -> List[Budget]:
+        """Get user's budgets whose period covers ``at`` (default: now)."""
+        async with self._session(session, "get_active_budgets") as db:
+            try:
+                result = await db.execute(queries.active_budgets(user_id, at or datetime.now(), category))
+                return list(result.scalars().all())
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting active budgets: {e}")
+                raise
+
+    async def get_active_budget_rows(
+        self,
+        user_id: int,
+        at: Optional[datetime] = None,
+        category: Optional[str] = None,
+        session: Optional[AsyncSession] = None
+    ) -> List[BudgetRow]:
+        """Read-only projection of get_active_budgets, without ORM hydration."""
+        async with self._session(session, "get_active_budget_rows") as db:
+            try:
+                result = await db.execute(
+                    queries.active_budgets(user_id, at or datetime.now(), category, columns=BUDGET_COLUMNS)
+                )
+                return [BudgetRow._make(row) for row in result.tuples()]
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting active budget rows: {e}")
+                raise
+
+    async def rebuild_budget_counters(self, user_id: Optional[int] = None) -> int:
+        """Recompute budget spent counters from transactions. Returns the number of budgets."""
         try:
-            return db.query(Budget)\
-                    .filter(Budget.user_id == user_id)\
-                    .all()
+            async with self.async_engine.begin() as conn:
+                count = await conn.run_sync(migrations.recompute_budget_counters, user_id)
+            self._notify_written([user_id])
+            logger.info(f"Rebuilt {count} budget counters")
+            return count
         except SQLAlchemyError as e:
-            logger.error(f"Error getting budgets: {e}")
+            logger.error(f"Error rebuilding budget counters: {e}")
             raise
-        finally:
-            db.close()
 
-    async def create_notification(self, notification_data: Dict[str, Any]) -> Notification:
+    async def create_pending_budget_check(
+        self,
+        user_id: int,
+        date: datetime,
+        category: str,
+        session: Optional[AsyncSession] = None
+    ) -> None:
+        """Queue a committed expense for budget alert evaluation by the insight scheduler."""
+        async with self._session(session, "create_pending_budget_check") as db:
+            try:
+                db.add(PendingBudgetCheck(user_id=user_id, date=date, category=category))
+                await db.flush()
+            except SQLAlchemyError as e:
+                logger.error(f"Error queueing budget check: {e}")
+                raise
+
+    async def get_pending_budget_checks(
+        self,
+        session: Optional[AsyncSession] = None
+    ) -> List[PendingBudgetCheckRow]:
+        """Queued budget checks, oldest first."""
+        async with self._session(session, "get_pending_budget_checks") as db:
+            try:
+                result = await db.execute(queries.pending_budget_checks(PENDING_BUDGET_CHECK_COLUMNS))
+                return [PendingBudgetCheckRow._make(row) for row in result.tuples()]
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting pending budget checks: {e}")
+                raise
+
+    async def claim_pending_budget_check(
+        self,
+        check_id: int,
+        session: Optional[AsyncSession] = None
+    ) -> bool:
+        """Delete a queued check; False when another worker already claimed it.
+
+        Claim inside the unit of work that creates the check's alerts, so both
+        commit together or the check stays queued.
+        """
+        async with self._session(session, "claim_pending_budget_check") as db:
+            try:
+                return (await db.execute(queries.delete_pending_budget_check(check_id))).rowcount == 1
+            except SQLAlchemyError as e:
+                logger.error(f"Error claiming budget check: {e}")
+                raise
+
+    async def create_notification(
+        self,
+        notification_data: Dict[str, Any],
+        session: Optional[AsyncSession] = None
+    ) -> Notification:
         """Create a new notification."""
-        db = self.get_db()
-        try:
-            notification = Notification(**notification_data)
-            db.add(notification)
-            db.commit()
-            db.refresh(notification)
-            return notification
-        except SQLAlchemyError as e:
-            db.rollback()
-            logger.error(f"Error creating notification: {e}")
-            raise
-        finally:
-            db.close()
+        async with self._session(session, "create_notification") as db:
+            try:
+                notification = Notification(**notification_data)
+                db.add(notification)
+                await db.flush()
+                self._mark_written(db, notification.user_id)
+                return notification
+            except SQLAlchemyError as e:
+                logger.error(f"Error creating notification: {e}")
+                raise
 
-    async def get_user_notifications(self, user_id: int, unread_only: bool = False) -> List[Notification]:
+    async def get_user_notifications(
+        self,
+        user_id: int,
+        unread_only: bool = False,
+        session: Optional[AsyncSession] = None
+    ) -> List[Notification]:
         """Get user's notifications."""
-        db = self.get_db()
-        try:
-            query = db.query(Notification)\
-                     .filter(Notification.user_id == user_id)
-            if unread_only:
-                query = query.filter(Notification.is_read == 0)
-            return query.order_by(Notification.created_at.desc()).all()
-        except SQLAlchemyError as e:
-            logger.error(f"Error getting notifications: {e}")
-            raise
-        finally:
-            db.close()
+        async with self._session(session, "get_user_notifications") as db:
+            try:
+                result = await db.execute(queries.user_notifications(user_id, unread_only))
+                return list(result.scalars().all())
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting notifications: {e}")
+                raise
+
+    async def get_notification_rows(
+        self,
+        user_id: int,
+        unread_only: bool = False,
+        session: Optional[AsyncSession] = None
+    ) -> List[NotificationRow]:
+        """Read-only projection of get_user_notifications, without ORM hydration."""
+        async with self._session(session, "get_notification_rows") as db:
+            try:
+                result = await db.execute(
+                    queries.user_notifications(user_id, unread_only, columns=NOTIFICATION_COLUMNS)
+                )
+                return [NotificationRow._make(row) for row in result.tuples()]
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting notification rows: {e}")
+                raise
 
-    async def create_financial_goal(self, goal_data: Dict[str, Any]) -> FinancialGoal:
+    async def create_financial_goal(
+        self,
+        goal_data: Dict[str, Any],
+        session: Optional[AsyncSession] = None
+    ) -> FinancialGoal:
         """Create a new financial goal."""
-        db = self.get_db()
-        try:
-            goal = FinancialGoal(**goal_data)
-            db.add(goal)
-            db.commit()
-            db.refresh(goal)
-            return goal
-        except SQLAlchemyError as e:
-            db.rollback()
-            logger.error(f"Error creating financial goal: {e}")
-            raise
-        finally:
-            db.close()
+        async with self._session(session, "create_financial_goal") as db:
+            try:
+                data = dict(goal_data)
+                for field in ("target_amount", "current_amount"):
+                    if data.get(field) is not None:
+                        data[field] = Money.parse(data[field])
+                goal = FinancialGoal(**data)
+                db.add(goal)
+                await db.flush()
+                return goal
+            except SQLAlchemyError as e:
+                logger.error(f"Error creating financial goal: {e}")
+                raise
 
-    async def get_financial_tips(self, category: Optional[str] = None) -> List[FinancialTip]:
+    async def get_financial_tips(
+        self,
+        category: Optional[str] = None,
+        session: Optional[AsyncSession] = None
+    ) -> List[FinancialTip]:
         """Get financial tips, optionally filtered by category."""
-        db = self.get_db()
-        try:
-            query = db.query(FinancialTip)
-            if category:
-                query = query.filter(FinancialTip.category == category)
-            return query.all()
-        except SQLAlchemyError as e:
-            logger.error(f"Error getting financial tips: {e}")
-            raise
-        finally:
-            db.close()
+        async with self._session(session, "get_financial_tips") as db:
+            try:
+                query = select(FinancialTip)
+                if category:
+                    query = query.filter(FinancialTip.category == category)
+                result = await db.execute(query)
+                return list(result.scalars().all())
+            except SQLAlchemyError as e:
+                logger.error(f"Error getting financial tips: {e}")
+                raise
 
 # Create global database manager instance
 db_manager = DatabaseManager()
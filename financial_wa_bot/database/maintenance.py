@@ -0,0 +1,138 @@
+"""Database maintenance commands.
+
+Run from the financial_wa_bot directory:
+
+    python -m database.maintenance init-db
+    python -m database.maintenance migrate
+    python -m database.maintenance check-indexes
+    python -m database.maintenance rebuild-balances [--user-id ID]
+    python -m database.maintenance verify-balances
+    python -m database.maintenance rebuild-budgets [--user-id ID]
+    python -m database.maintenance rebuild-rollups [--user-id ID]
+    python -m database.maintenance import-transactions --user-id ID FILE [--format csv|ofx]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from config.settings import LOG_LEVEL, LOG_FORMAT, BULK_INSERT_CHUNK_SIZE
+from database import migrations
+from database.db_manager import db_manager
+from database.query_plans import check_query_plans
+from features.transaction_import import PARSERS, TransactionImportError
+
+logger = logging.getLogger(__name__)
+
+async def _rebuild_balances(args: argparse.Namespace) -> int:
+    count = await db_manager.rebuild_balances(args.user_id)
+    print(f"Rebuilt {count} balance rows")
+    return 0
+
+async def _verify_balances(args: argparse.Namespace) -> int:
+    mismatches = await db_manager.verify_balances()
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"{len(mismatches)} balance mismatches found")
+    return 1 if mismatches else 0
+
+async def _rebuild_budgets(args: argparse.Namespace) -> int:
+    count = await db_manager.rebuild_budget_counters(args.user_id)
+    print(f"Rebuilt {count} budget counters")
+    return 0
+
+async def _rebuild_rollups(args: argparse.Namespace) -> int:
+    count = await db_manager.rebuild_daily_rollups(args.user_id)
+    print(f"Rebuilt {count} daily rollups")
+    return 0
+
+async def _import_transactions(args: argparse.Namespace) -> int:
+    file_format = args.format or os.path.splitext(args.file)[1].lstrip(".").lower()
+    if file_format not in PARSERS:
+        print(f"Unknown import format {file_format!r}; use --format {'/'.join(PARSERS)}")
+        return 2
+    if await db_manager.get_user_by_id(args.user_id) is None:
+        print(f"User {args.user_id} not found")
+        return 1
+    with open(args.file, encoding=args.encoding, newline="") as f:
+        try:
+            count = await db_manager.bulk_create_transactions(
+                args.user_id, PARSERS[file_format](f), chunk_size=args.chunk_size
+            )
+        except TransactionImportError as e:
+            print(f"Import stopped at {e}; earlier chunks were committed")
+            return 1
+    print(f"Imported {count} transactions")
+    return 0
+
+async def _init_db(args: argparse.Namespace) -> int:
+    db_manager.init_db()
+    return 0
+
+async def _migrate(args: argparse.Namespace) -> int:
+    applied = migrations.upgrade(db_manager.engine)
+    print(f"Applied migrations: {applied or 'none'}")
+    return 0
+
+async def _check_indexes(args: argparse.Namespace) -> int:
+    results = check_query_plans(db_manager.engine)
+    for result in results:
+        status = "ok" if result["ok"] else "NO INDEX"
+        print(f"{result['query']:<28} {status:<9} {', '.join(result['indexes'])}")
+        if args.verbose or not result["ok"]:
+            print("    " + result["plan"].replace("\n", "\n    "))
+    return 0 if all(r["ok"] for r in results) else 1
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m database.maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init-db", help="Create missing tables").set_defaults(func=_init_db)
+
+    commands.add_parser("migrate", help="Apply pending schema migrations").set_defaults(func=_migrate)
+
+    check = commands.add_parser("check-indexes", help="EXPLAIN hot queries and verify index usage")
+    check.add_argument("--verbose", action="store_true", help="Print every query plan")
+    check.set_defaults(func=_check_indexes)
+
+    rebuild = commands.add_parser("rebuild-balances", help="Recompute running balances from transactions")
+    rebuild.add_argument("--user-id", type=int, default=None)
+    rebuild.set_defaults(func=_rebuild_balances)
+
+    commands.add_parser(
+        "verify-balances", help="Report users whose running balance drifted from their transactions"
+    ).set_defaults(func=_verify_balances)
+
+    budgets = commands.add_parser("rebuild-budgets", help="Recompute budget spent counters from transactions")
+    budgets.add_argument("--user-id", type=int, default=None)
+    budgets.set_defaults(func=_rebuild_budgets)
+
+    rollups = commands.add_parser("rebuild-rollups", help="Recompute daily report rollups from transactions")
+    rollups.add_argument("--user-id", type=int, default=None)
+    rollups.set_defaults(func=_rebuild_rollups)
+
+    importer = commands.add_parser("import-transactions", help="Bulk import a CSV or OFX statement")
+    importer.add_argument("file")
+    importer.add_argument("--user-id", type=int, required=True)
+    importer.add_argument("--format", choices=sorted(PARSERS), default=None,
+                          help="Defaults to the file extension")
+    importer.add_argument("--encoding", default="utf-8")
+    importer.add_argument("--chunk-size", type=int, default=BULK_INSERT_CHUNK_SIZE)
+    importer.set_defaults(func=_import_transactions)
+
+    return parser
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        return await args.func(args)
+    finally:
+        await db_manager.close()
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+    args = build_parser().parse_args(argv)
+    return asyncio.run(_run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
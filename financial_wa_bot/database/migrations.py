@@ -0,0 +1,214 @@
+"""Versioned schema migrations for existing databases.
+
+Fresh databases are created at the latest schema by ``Base.metadata.create_all``
+and stamped with the head version. Databases created by an older release are
+brought forward by running every migration newer than their recorded version.
+Each migration receives a sync connection inside a transaction.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import logging
+
+from sqlalchemy import Column, Table, delete, func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from . import queries
+from .money import MINOR_UNITS, MoneyType
+from .models import (
+    Base, Budget, DailyRollup, FinancialGoal, PendingBudgetCheck, SchemaVersion, Transaction, UserBalance
+)
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+def _create_indexes(*names: str) -> Callable[[Connection], None]:
+    """Migration step creating model-declared indexes that are not present yet."""
+    def apply(conn: Connection) -> None:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in names:
+                    index.create(bind=conn, checkfirst=True)
+    return apply
+
+def _add_budget_spent_counters(conn: Connection) -> None:
+    """Add budgets.spent_amount and backfill it from existing expenses."""
+    columns = {column["name"] for column in inspect(conn).get_columns(Budget.__tablename__)}
+    if "spent_amount" not in columns:
+        conn.execute(text("ALTER TABLE budgets ADD COLUMN spent_amount FLOAT NOT NULL DEFAULT 0"))
+    recompute_budget_counters(conn)
+
+def recompute_budget_counters(conn: Connection, user_id: Optional[int] = None) -> int:
+    """Recompute budgets.spent_amount from transactions, one grouped query per user."""
+    query = select(Budget.id, Budget.user_id, Budget.category, Budget.period_start, Budget.period_end)
+    if user_id is not None:
+        query = query.filter(Budget.user_id == user_id)
+    budgets_by_user: Dict[int, list] = defaultdict(list)
+    for budget in conn.execute(query):
+        budgets_by_user[budget.user_id].append(budget)
+
+    for uid, budgets in budgets_by_user.items():
+        spent = conn.execute(queries.budget_spent(uid, budgets)).one()
+        for budget in budgets:
+            conn.execute(
+                update(Budget)
+                .where(Budget.id == budget.id)
+                .values(spent_amount=getattr(spent, f"b{budget.id}"))
+            )
+    return sum(len(budgets) for budgets in budgets_by_user.values())
+
+def _add_balance_transaction_count(conn: Connection) -> None:
+    """Add user_balances.transaction_count and backfill it."""
+    columns = {column["name"] for column in inspect(conn).get_columns(UserBalance.__tablename__)}
+    if "transaction_count" not in columns:
+        conn.execute(text(
+            "ALTER TABLE user_balances ADD COLUMN transaction_count INTEGER NOT NULL DEFAULT 0"
+        ))
+    for row in conn.execute(queries.balance_totals()):
+        conn.execute(
+            update(UserBalance)
+            .where(UserBalance.user_id == row.user_id)
+            .values(transaction_count=row.transaction_count)
+        )
+
+def _add_daily_rollups(conn: Connection) -> None:
+    """Create daily_rollups and backfill it from existing transactions."""
+    DailyRollup.__table__.create(bind=conn, checkfirst=True)
+    recompute_daily_rollups(conn)
+
+def recompute_daily_rollups(conn: Connection, user_id: Optional[int] = None) -> int:
+    """Rebuild daily_rollups from transactions with one grouped INSERT ... SELECT."""
+    clear = delete(DailyRollup)
+    if user_id is not None:
+        clear = clear.where(DailyRollup.user_id == user_id)
+    conn.execute(clear)
+    buckets = queries.transaction_buckets(user_id)
+    result = conn.execute(DailyRollup.__table__.insert().from_select(
+        ["user_id", "day", "type", "category", "total", "count"], buckets
+    ))
+    return result.rowcount
+
+def _add_pending_budget_checks(conn: Connection) -> None:
+    """Create the queue of expenses awaiting budget alert evaluation."""
+    PendingBudgetCheck.__table__.create(bind=conn, checkfirst=True)
+
+def _money_to_minor_units(conn: Connection) -> None:
+    """Convert FLOAT rupiah columns to BIGINT minor units, then rebuild the derived totals."""
+    dialect = conn.dialect.name
+    for table in (Transaction.__table__, Budget.__table__, UserBalance.__table__,
+                  DailyRollup.__table__, FinancialGoal.__table__):
+        if not inspect(conn).has_table(table.name):
+            continue
+        columns = [column for column in table.columns if isinstance(column.type, MoneyType)]
+        if dialect == "sqlite":
+            _rebuild_sqlite_table(conn, table, columns)
+        elif dialect == "postgresql":
+            for column in columns:
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE BIGINT "
+                    f"USING ROUND({column.name} * {MINOR_UNITS})::BIGINT"
+                ))
+        elif dialect in ("mysql", "mariadb"):
+            for column in columns:
+                for statement in _mysql_minor_units_statements(table, column):
+                    conn.execute(text(statement))
+        else:
+            raise NotImplementedError(f"No money column conversion for dialect {dialect!r}")
+    # Earlier migrations may have summed the old rupiah values through the new column type
+    recompute_budget_counters(conn)
+    recompute_daily_rollups(conn)
+
+def _mysql_minor_units_statements(table: Table, column: Column) -> List[str]:
+    """Convert one MySQL FLOAT money column through a new BIGINT column.
+
+    Writing sen back into the FLOAT column first would round-trip them
+    through float precision, so the rounded values go straight into a
+    BIGINT column that then replaces the old one.
+    """
+    minor = f"{column.name}_minor"
+    return [
+        f"ALTER TABLE {table.name} ADD COLUMN {minor} BIGINT",
+        f"UPDATE {table.name} SET {minor} = ROUND({column.name} * {MINOR_UNITS})",
+        f"ALTER TABLE {table.name} DROP COLUMN {column.name}",
+        f"ALTER TABLE {table.name} CHANGE COLUMN {minor} {column.name} BIGINT"
+        + ("" if column.nullable else " NOT NULL"),
+    ]
+
+def _rebuild_sqlite_table(conn: Connection, table: Table, money_columns: List[Column]) -> None:
+    """SQLite cannot change a column type in place: copy the rows into a table created from the model."""
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for index in table.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    conn.execute(text(f"ALTER TABLE {table.name} RENAME TO _old_{table.name}"))
+    table.create(bind=conn)
+    names = [column.name for column in table.columns if column.name in existing]
+    values = [
+        f"CAST(ROUND({column.name} * {MINOR_UNITS}) AS INTEGER)" if column in money_columns else column.name
+        for column in table.columns if column.name in existing
+    ]
+    conn.execute(text(
+        f"INSERT INTO {table.name} ({', '.join(names)}) SELECT {', '.join(values)} FROM _old_{table.name}"
+    ))
+    conn.execute(text(f"DROP TABLE _old_{table.name}"))
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Composite indexes for transaction, budget and notification access paths",
+        _create_indexes(
+            "ix_transactions_user_date",
+            "ix_transactions_user_type_category_date",
+            "ix_budgets_user_period",
+            "ix_notifications_user_read_created",
+        ),
+    ),
+    Migration(2, "Materialized budget spent counters", _add_budget_spent_counters),
+    Migration(3, "Transaction count on the running balance ledger", _add_balance_transaction_count),
+    Migration(4, "Daily per-category rollups for reports", _add_daily_rollups),
+    Migration(5, "Money columns as integer minor units", _money_to_minor_units),
+    Migration(6, "Durable queue of pending budget alert checks", _add_pending_budget_checks),
+]
+
+HEAD = max(m.version for m in MIGRATIONS)
+
+def current_version(conn: Connection) -> int:
+    """Highest applied migration, 0 for databases that predate migrations."""
+    SchemaVersion.__table__.create(bind=conn, checkfirst=True)
+    return conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+
+def upgrade(engine: Engine) -> List[int]:
+    """Apply pending migrations in order. Returns the versions that were applied."""
+    applied = []
+    with engine.begin() as conn:
+        version = current_version(conn)
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        with engine.begin() as conn:
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            migration.apply(conn)
+            conn.execute(SchemaVersion.__table__.insert().values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.utcnow(),
+            ))
+        applied.append(migration.version)
+    return applied
+
+def stamp_head(engine: Engine) -> None:
+    """Record every migration as applied without running it."""
+    with engine.begin() as conn:
+        version = current_version(conn)
+        for migration in MIGRATIONS:
+            if migration.version > version:
+                conn.execute(SchemaVersion.__table__.insert().values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.utcnow(),
+                ))
@@ -1,10 +1,12 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import enum
 
+from .money import MoneyType
+
 Base = declarative_base()
 
 class TransactionType(enum.Enum):
@@ -25,6 +27,7 @@ class User(Base):
     transactions = relationship("Transaction", back_populates="user")
     budgets = relationship("Budget", back_populates="user")
     notifications = relationship("Notification", back_populates="user")
+    balance = relationship("UserBalance", back_populates="user", uselist=False)
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -32,7 +35,7 @@ class Transaction(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     type = Column(Enum(TransactionType), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(MoneyType, nullable=False)
     category = Column(String(50), nullable=False)
     description = Column(Text)
     date = Column(DateTime, default=datetime.utcnow)
@@ -42,13 +45,45 @@ class Transaction(Base):
     # Relationships
     user = relationship("User", back_populates="transactions")
 
+    __table_args__ = (
+        # History listings and date-bounded reports
+        Index("ix_transactions_user_date", "user_id", "date"),
+        # Balance, budget and category aggregates
+        Index("ix_transactions_user_type_category_date", "user_id", "type", "category", "date"),
+    )
+
+class UserBalance(Base):
+    """Running income/expense totals per user, maintained on every transaction insert"""
+    __tablename__ = "user_balances"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_income = Column(MoneyType, nullable=False, default=0)
+    total_expenses = Column(MoneyType, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    user = relationship("User", back_populates="balance")
+
+class DailyRollup(Base):
+    """Per-day totals per (type, category), maintained on every transaction insert"""
+    __tablename__ = "daily_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    type = Column(Enum(TransactionType), primary_key=True)
+    category = Column(String(50), primary_key=True)
+    total = Column(MoneyType, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
 class Budget(Base):
     __tablename__ = "budgets"
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     category = Column(String(50), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(MoneyType, nullable=False)
+    spent_amount = Column(MoneyType, nullable=False, default=0)  # maintained on expense insert
     period_start = Column(DateTime, nullable=False)
     period_end = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -57,6 +92,10 @@ class Budget(Base):
     # Relationships
     user = relationship("User", back_populates="budgets")
 
+    __table_args__ = (
+        Index("ix_budgets_user_period", "user_id", "period_end"),
+    )
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -71,19 +110,41 @@ class Notification(Base):
     # Relationships
     user = relationship("User", back_populates="notifications")
 
+    __table_args__ = (
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
+
+class PendingBudgetCheck(Base):
+    """A committed expense whose budget alerts the insight scheduler has not evaluated yet"""
+    __tablename__ = "pending_budget_checks"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    date = Column(DateTime, nullable=False)
+    category = Column(String(50), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class FinancialGoal(Base):
     __tablename__ = "financial_goals"
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     name = Column(String(100), nullable=False)
-    target_amount = Column(Float, nullable=False)
-    current_amount = Column(Float, default=0.0)
+    target_amount = Column(MoneyType, nullable=False)
+    current_amount = Column(MoneyType, default=0)
     deadline = Column(DateTime)
     status = Column(String(20), default="active")  # 'active', 'completed', 'cancelled'
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class SchemaVersion(Base):
+    """Applied schema migrations, see database/migrations.py"""
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    description = Column(String(200), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
 class FinancialTip(Base):
     __tablename__ = "financial_tips"
 
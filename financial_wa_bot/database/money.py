@@ -0,0 +1,169 @@
+"""Exact money amounts stored as integer minor units.
+
+``Money`` holds an amount as an integer number of sen (1/100 rupiah), so
+sums and differences are exact; the database stores the same integer in a
+BIGINT column through ``MoneyType``. Amounts enter the system through
+``Money.parse`` (user input, imports, API payloads) and leave it through
+``to_json``/``format``.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import total_ordering
+from typing import Any, Union
+
+from sqlalchemy.types import BigInteger, TypeDecorator
+
+MINOR_UNITS = 100  # sen per rupiah
+
+# Largest amount one transaction may carry: a trillion rupiah in sen leaves room
+# for about 90,000 such transactions in a BIGINT ledger or rollup total
+MAX_TRANSACTION_MINOR = 10 ** 12 * MINOR_UNITS
+
+Number = Union[int, float, Decimal, str]
+
+@total_ordering
+class Money:
+    """An immutable amount of rupiah, held as an integer number of minor units."""
+
+    __slots__ = ("minor",)
+
+    def __init__(self, minor: int = 0):
+        if not isinstance(minor, int) or isinstance(minor, bool):
+            raise TypeError(f"Money takes integer minor units, got {type(minor).__name__}")
+        object.__setattr__(self, "minor", minor)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Money is immutable")
+
+    @classmethod
+    def parse(cls, value: Union["Money", Number]) -> "Money":
+        """Convert an amount in rupiah, rounding half up to whole minor units.
+
+        Floats go through their shortest repr, so ``0.1`` is exactly 10 sen.
+        Raises ValueError for anything that is not a finite number.
+        """
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, bool):
+            raise ValueError(f"invalid amount {value!r}")
+        if isinstance(value, int):
+            return cls(value * MINOR_UNITS)
+        try:
+            amount = Decimal(value if isinstance(value, (Decimal, str)) else repr(value))
+        except (InvalidOperation, TypeError):
+            raise ValueError(f"invalid amount {value!r}")
+        if not amount.is_finite():
+            raise ValueError(f"invalid amount {value!r}")
+        return cls(int((amount * MINOR_UNITS).to_integral_value(ROUND_HALF_UP)))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.minor) / MINOR_UNITS
+
+    def to_json(self) -> Union[int, float]:
+        """JSON number in rupiah: an int for whole amounts, which is exact at any size."""
+        whole, fraction = divmod(self.minor, MINOR_UNITS)
+        return whole if fraction == 0 else self.minor / MINOR_UNITS
+
+    def __add__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor + other.minor)
+
+    def __radd__(self, other: Any) -> "Money":
+        # Lets sum() start from its default 0
+        if other == 0 and not isinstance(other, Money):
+            return self
+        return NotImplemented
+
+    def __sub__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor - other.minor)
+
+    def __mul__(self, factor: Union[int, Decimal, float]) -> "Money":
+        if isinstance(factor, int) and not isinstance(factor, bool):
+            return Money(self.minor * factor)
+        if isinstance(factor, (Decimal, float)):
+            scaled = Decimal(self.minor) * (factor if isinstance(factor, Decimal) else Decimal(repr(factor)))
+            return Money(int(scaled.to_integral_value(ROUND_HALF_UP)))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: "Money") -> float:
+        """Ratio of two amounts, e.g. the used fraction of a budget"""
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor / other.minor
+
+    def __neg__(self) -> "Money":
+        return Money(-self.minor)
+
+    def __abs__(self) -> "Money":
+        return Money(abs(self.minor))
+
+    def __bool__(self) -> bool:
+        return self.minor != 0
+
+    def __float__(self) -> float:
+        return self.minor / MINOR_UNITS
+
+    def _comparable(self, other: Any) -> Any:
+        if isinstance(other, Money):
+            return other.minor
+        if isinstance(other, (int, float, Decimal)) and not isinstance(other, bool):
+            # Plain numbers are rupiah, e.g. ``balance < 0``
+            return Decimal(other if not isinstance(other, float) else repr(other)) * MINOR_UNITS
+        return NotImplemented
+
+    def __eq__(self, other: Any) -> bool:
+        value = self._comparable(other)
+        return value if value is NotImplemented else self.minor == value
+
+    def __lt__(self, other: Any) -> bool:
+        value = self._comparable(other)
+        return value if value is NotImplemented else self.minor < value
+
+    def __hash__(self) -> int:
+        # Equal to the hash of the same amount as a number, since they compare equal
+        return hash(self.to_decimal())
+
+    def __format__(self, spec: str) -> str:
+        return format(self.to_decimal(), spec)
+
+    def __str__(self) -> str:
+        return str(self.to_decimal())
+
+    def __repr__(self) -> str:
+        return f"Money('{self.to_decimal()}')"
+
+    def __reduce__(self):
+        return (Money, (self.minor,))
+
+ZERO = Money(0)
+
+def json_default(value: Any) -> Any:
+    """``default`` hook for json.dumps"""
+    if isinstance(value, Money):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class MoneyType(TypeDecorator):
+    """BIGINT column of minor units, read and written as Money.
+
+    Plain numbers bound to it are taken as rupiah, so literals like the
+    ``0`` in ``coalesce(sum(amount), 0)`` need no wrapping.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Any:
+        if value is None:
+            return None
+        return Money.parse(value).minor
+
+    def process_result_value(self, value: Any, dialect: Any) -> Any:
+        if value is None:
+            return None
+        # SUM over BIGINT comes back as Decimal on PostgreSQL and MySQL
+        return Money(int(value))
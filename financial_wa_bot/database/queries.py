@@ -0,0 +1,231 @@
+"""Statement builders for the hot query paths.
+
+DatabaseManager and FinancialProcessor build their statements here so that
+database/query_plans.py can EXPLAIN exactly the SQL that runs in production.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+from sqlalchemy import BigInteger, Delete, Executable, Select, Update, delete, select, update, func, case, and_, tuple_, type_coerce
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from .money import Money
+from .models import (
+    Transaction, TransactionType, Budget, DailyRollup, Notification, PendingBudgetCheck, User, UserBalance
+)
+
+def user_by_phone(phone_number: str) -> Select:
+    return select(User).filter(User.phone_number == phone_number)
+
+def insert_user_if_missing(dialect: str, phone_number: str, name: Optional[str] = None) -> Executable:
+    """Insert a user unless the phone number is already registered.
+
+    Uses the dialect's upsert form so concurrent first messages from the same
+    number never fail on the unique constraint; the loser's insert is a no-op.
+    """
+    # Core inserts skip ORM column defaults, so spell them out
+    now = datetime.utcnow()
+    values = dict(phone_number=phone_number, name=name, language_preference="id",
+                  created_at=now, updated_at=now)
+    if dialect == "postgresql":
+        return postgresql.insert(User).values(**values).on_conflict_do_nothing(
+            index_elements=[User.phone_number]
+        )
+    if dialect == "sqlite":
+        return sqlite.insert(User).values(**values).on_conflict_do_nothing(
+            index_elements=[User.phone_number]
+        )
+    if dialect in ("mysql", "mariadb"):
+        return mysql.insert(User).values(**values).prefix_with("IGNORE")
+    raise NotImplementedError(f"No upsert form for dialect {dialect!r}")
+
+def user_transactions(
+    user_id: int,
+    limit: int = 10,
+    before: Optional[Tuple[datetime, int]] = None,
+    offset: int = 0,
+    columns: Optional[Sequence[Any]] = None
+) -> Select:
+    """Newest-first page of a user's transactions.
+
+    ``before`` is a keyset cursor: the (date, id) of the last row of the
+    previous page. Keyset pages cost the same at any depth; ``offset`` is
+    kept for callers that still page by position. With ``columns``, only
+    those columns are selected (see database/rows.py).
+    """
+    query = select(*columns) if columns else select(Transaction)
+    query = query.filter(Transaction.user_id == user_id)
+    if before is not None:
+        query = query.filter(tuple_(Transaction.date, Transaction.id) < tuple_(*before))
+    query = query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit)
+    if offset:
+        query = query.offset(offset)
+    return query
+
+def user_budgets(user_id: int) -> Select:
+    return select(Budget).filter(Budget.user_id == user_id)
+
+def user_notifications(
+    user_id: int,
+    unread_only: bool = False,
+    columns: Optional[Sequence[Any]] = None
+) -> Select:
+    query = (select(*columns) if columns else select(Notification)).filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == 0)
+    return query.order_by(Notification.created_at.desc())
+
+def balance_totals(user_id: Optional[int] = None) -> Select:
+    """Single-pass income/expense totals per user straight from the transactions table."""
+    query = select(
+        Transaction.user_id,
+        func.coalesce(func.sum(case(
+            (Transaction.type == TransactionType.INCOME, Transaction.amount), else_=0
+        )), 0).label("total_income"),
+        func.coalesce(func.sum(case(
+            (Transaction.type == TransactionType.EXPENSE, Transaction.amount), else_=0
+        )), 0).label("total_expenses"),
+        func.count().label("transaction_count"),
+    ).group_by(Transaction.user_id)
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    return query
+
+def active_budgets(
+    user_id: int,
+    at: datetime,
+    category: Optional[str] = None,
+    columns: Optional[Sequence[Any]] = None
+) -> Select:
+    """Budgets whose period covers ``at``; with a category, only budgets that apply to it."""
+    query = (select(*columns) if columns else select(Budget)).filter(
+        Budget.user_id == user_id,
+        Budget.period_end >= at,
+        Budget.period_start <= at
+    )
+    if category is not None:
+        query = query.filter(Budget.category.in_(['all', category]))
+    return query.order_by(Budget.id)
+
+def budget_spent(user_id: int, budgets: Sequence[Budget]) -> Select:
+    """Spent amount for many budgets in one pass over the user's expenses.
+
+    Produces one conditional SUM column per budget, labelled ``b<budget id>``,
+    over the union of the budget windows.
+    """
+    columns = []
+    for budget in budgets:
+        condition = Transaction.date.between(budget.period_start, budget.period_end)
+        if budget.category != 'all':
+            condition = and_(condition, Transaction.category == budget.category)
+        columns.append(
+            func.coalesce(func.sum(case((condition, Transaction.amount), else_=0)), 0)
+            .label(f"b{budget.id}")
+        )
+    return select(*columns).filter(
+        Transaction.user_id == user_id,
+        Transaction.type == TransactionType.EXPENSE,
+        Transaction.date.between(
+            min(b.period_start for b in budgets),
+            max(b.period_end for b in budgets)
+        )
+    )
+
+def budgets_overlapping(user_id: int, start: datetime, end: datetime) -> Select:
+    """Budgets whose period intersects [start, end]."""
+    return select(Budget).filter(
+        Budget.user_id == user_id,
+        Budget.period_end >= start,
+        Budget.period_start <= end
+    ).order_by(Budget.id)
+
+def increment_budget_spent(user_id: int, category: str, date: datetime, amount: Money) -> Update:
+    """Add an expense to the counters of every budget whose window and category cover it."""
+    return (
+        update(Budget)
+        .where(
+            Budget.user_id == user_id,
+            Budget.period_start <= date,
+            Budget.period_end >= date,
+            Budget.category.in_(['all', category])
+        )
+        .values(spent_amount=Budget.spent_amount + amount)
+    )
+
+def pending_budget_checks(columns: Sequence[Any]) -> Select:
+    """Queued budget alert checks, oldest first."""
+    return select(*columns).order_by(PendingBudgetCheck.id)
+
+def delete_pending_budget_check(check_id: int) -> Delete:
+    """Remove one queued check; its rowcount tells whether this caller claimed it."""
+    return delete(PendingBudgetCheck).where(PendingBudgetCheck.id == check_id)
+
+def period_buckets(user_id: int, start_date: datetime, end_date: datetime) -> Select:
+    """Daily (day, type, category) rollups for the calendar days of a date range, oldest first.
+
+    Reads one pre-aggregated row per bucket instead of scanning transactions;
+    category totals and the daily summary are both rolled up from these rows.
+    """
+    return (
+        select(DailyRollup.day, DailyRollup.type, DailyRollup.category, DailyRollup.total, DailyRollup.count)
+        .filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.day.between(start_date.date(), end_date.date())
+        )
+        .order_by(DailyRollup.day)
+    )
+
+def ledger_transaction_count(user_id: int) -> Select:
+    """The running balance ledger's transaction count for a user (primary key lookup)."""
+    return select(UserBalance.transaction_count).filter(UserBalance.user_id == user_id)
+
+def transaction_columns(user_id: int) -> Select:
+    """(id, date, type, category, amount) of every transaction of a user, for the columnar analytics cache.
+
+    The amount is read as raw minor units, skipping Money construction for
+    rows that only end up in an int64 array.
+    """
+    return select(
+        Transaction.id,
+        Transaction.date,
+        Transaction.type,
+        Transaction.category,
+        type_coerce(Transaction.amount, BigInteger).label("amount"),
+    ).filter(Transaction.user_id == user_id)
+
+def transaction_buckets(user_id: Optional[int] = None) -> Select:
+    """(user, day, type, category) totals straight from the transactions table."""
+    day = func.date(Transaction.date).label("day")
+    query = select(
+        Transaction.user_id,
+        day,
+        Transaction.type,
+        Transaction.category,
+        func.sum(Transaction.amount).label("total"),
+        func.count().label("count"),
+    ).group_by(Transaction.user_id, day, Transaction.type, Transaction.category)
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    return query
+
+def increment_daily_rollups(dialect: str, rows: Sequence[Dict[str, Any]]) -> Executable:
+    """Add (user_id, day, type, category, total, count) rows onto their daily rollups.
+
+    A single multi-row upsert: missing buckets are inserted, existing ones
+    incremented, so concurrent writers to the same day never conflict.
+    """
+    if dialect in ("postgresql", "sqlite"):
+        insert = (postgresql if dialect == "postgresql" else sqlite).insert(DailyRollup).values(list(rows))
+        return insert.on_conflict_do_update(
+            index_elements=[DailyRollup.user_id, DailyRollup.day, DailyRollup.type, DailyRollup.category],
+            set_={
+                "total": DailyRollup.total + insert.excluded.total,
+                "count": DailyRollup.count + insert.excluded.count,
+            },
+        )
+    if dialect in ("mysql", "mariadb"):
+        insert = mysql.insert(DailyRollup).values(list(rows))
+        return insert.on_duplicate_key_update(
+            total=DailyRollup.total + insert.inserted.total,
+            count=DailyRollup.count + insert.inserted.count,
+        )
+    raise NotImplementedError(f"No upsert form for dialect {dialect!r}")
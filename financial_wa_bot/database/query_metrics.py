@@ -0,0 +1,201 @@
+"""Per-route and per-command SQL statement counting and slow-query reporting.
+
+Engine events time every statement and attribute it to the scope (an API
+route or a bot command) active in the current context. Closing a scope
+folds its counts into per-scope totals, logs one structured summary line
+and, through ``render_prometheus``, feeds the ``/metrics`` endpoint, where
+``render_gauges`` adds the counters of caches and pools.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import re
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class QueryScope:
+    kind: str
+    name: str
+    queries: int = 0
+    db_seconds: float = 0.0
+    slow_queries: int = 0
+
+@dataclass
+class ScopeTotals:
+    scopes: int = 0
+    queries: int = 0
+    db_seconds: float = 0.0
+    slow_queries: int = 0
+    max_queries: int = 0
+
+@dataclass
+class SlowQuery:
+    kind: str
+    name: str
+    statement: str
+    parameters: str
+    seconds: float
+    at: float = field(default_factory=time.time)
+
+_current_scope: ContextVar[Optional[QueryScope]] = ContextVar("query_scope", default=None)
+
+def _redact(parameters: Any, executemany: bool) -> str:
+    """Describe bound parameters without their values"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return f"<{len(parameters)} parameters: {', '.join(sorted(parameters))}>"
+    if isinstance(parameters, (list, tuple)):
+        return f"<{len(parameters)} parameters>"
+    return "<none>"
+
+class QueryMetrics:
+    """Counts statements and DB time per scope and keeps the most recent slow statements.
+
+    Statements running outside any scope (startup, background jobs) are
+    attributed to kind ``none``. Parameters are never recorded, only their
+    number and names.
+    """
+
+    def __init__(self, slow_query_seconds: float, keep_slow: int = 50):
+        self.slow_query_seconds = slow_query_seconds
+        self.totals: Dict[Tuple[str, str], ScopeTotals] = {}
+        self.slow: Deque[SlowQuery] = deque(maxlen=keep_slow)
+
+    def attach(self, engine: Engine) -> None:
+        """Listen to statement events on a (sync or async-wrapped) engine."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+
+    @contextmanager
+    def scope(self, kind: str, name: str) -> Iterator[QueryScope]:
+        """Attribute statements run inside the block to (kind, name).
+
+        The name may be changed while the scope is open, e.g. once a
+        request has been routed.
+        """
+        current = QueryScope(kind, name)
+        token = _current_scope.set(current)
+        started = time.perf_counter()
+        try:
+            yield current
+        finally:
+            _current_scope.reset(token)
+            self._close(current, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-scope totals and recent slow statements, suitable for logging."""
+        return {
+            "scopes": [
+                {"kind": kind, "name": name, **vars(totals)}
+                for (kind, name), totals in sorted(self.totals.items())
+            ],
+            "slow_queries": [vars(slow) for slow in self.slow],
+        }
+
+    def render_prometheus(self) -> str:
+        """Render per-scope counters in the Prometheus text exposition format."""
+        metrics = [
+            ("db_scope_total", "counter", "Requests or commands observed", "scopes"),
+            ("db_queries_total", "counter", "SQL statements executed", "queries"),
+            ("db_query_seconds_total", "counter", "Time spent executing SQL statements", "db_seconds"),
+            ("db_slow_queries_total", "counter", "Statements slower than the slow query threshold", "slow_queries"),
+            ("db_max_queries_per_scope", "gauge", "Most statements issued by a single request or command", "max_queries"),
+        ]
+        lines: List[str] = []
+        for metric, metric_type, help_text, attribute in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for (kind, name), totals in sorted(self.totals.items()):
+                labels = f'kind="{_label(kind)}",name="{_label(name)}"'
+                lines.append(f"{metric}{{{labels}}} {getattr(totals, attribute)}")
+        return "\n".join(lines) + "\n"
+
+    def _close(self, scope: QueryScope, elapsed: float) -> None:
+        totals = self.totals.setdefault((scope.kind, scope.name), ScopeTotals())
+        totals.scopes += 1
+        totals.queries += scope.queries
+        totals.db_seconds += scope.db_seconds
+        totals.slow_queries += scope.slow_queries
+        totals.max_queries = max(totals.max_queries, scope.queries)
+        logger.info(json.dumps({
+            "event": "db_scope",
+            "kind": scope.kind,
+            "name": scope.name,
+            "queries": scope.queries,
+            "db_ms": round(scope.db_seconds * 1000, 2),
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "slow_queries": scope.slow_queries,
+        }))
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        seconds = time.perf_counter() - conn.info["query_started_at"].pop()
+        scope = _current_scope.get()
+        if scope is None:
+            # Unscoped statements still count, as one scope per statement
+            scope = QueryScope("none", "-")
+            self._record(scope, statement, parameters, executemany, seconds)
+            self._fold_unscoped(scope)
+            return
+        self._record(scope, statement, parameters, executemany, seconds)
+
+    def _on_error(self, context) -> None:
+        started = context.connection.info.get("query_started_at") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    def _record(self, scope: QueryScope, statement: str, parameters: Any, executemany: bool, seconds: float) -> None:
+        scope.queries += 1
+        scope.db_seconds += seconds
+        if seconds < self.slow_query_seconds:
+            return
+        scope.slow_queries += 1
+        slow = SlowQuery(scope.kind, scope.name, " ".join(statement.split())[:500],
+                         _redact(parameters, executemany), round(seconds, 4))
+        self.slow.append(slow)
+        logger.warning(json.dumps({"event": "slow_query", **vars(slow)}))
+
+    def _fold_unscoped(self, scope: QueryScope) -> None:
+        totals = self.totals.setdefault((scope.kind, scope.name), ScopeTotals())
+        totals.queries += scope.queries
+        totals.db_seconds += scope.db_seconds
+        totals.slow_queries += scope.slow_queries
+
+def render_gauges(prefix: str, values: Dict[str, Any]) -> str:
+    """Render the numeric entries of a (nested) metrics dict as Prometheus gauges.
+
+    Used for the cache, pool and fan-out counters that components expose as
+    plain dicts; names join the prefix and the key path with underscores and
+    non-numeric entries are skipped.
+    """
+    lines: List[str] = []
+    for name, value in _numeric_entries(prefix, values):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+def _numeric_entries(prefix: str, values: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    for key, value in values.items():
+        name = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', str(key))}"
+        if isinstance(value, dict):
+            yield from _numeric_entries(name, value)
+        elif isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
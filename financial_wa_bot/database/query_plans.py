@@ -0,0 +1,104 @@
+"""EXPLAIN-based verification that hot queries use their indexes.
+
+Each entry in HOT_QUERIES builds the same statement DatabaseManager or
+FinancialProcessor executes and names the indexes the planner may pick for it.
+Run through ``python -m database.maintenance check-indexes``.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Any, Tuple
+import logging
+
+from sqlalchemy import Select
+from sqlalchemy.engine import Engine
+
+from . import queries
+from .models import Budget
+from .rows import BUDGET_COLUMNS, NOTIFICATION_COLUMNS, TRANSACTION_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+_TRANSACTION_INDEXES = ("ix_transactions_user_date", "ix_transactions_user_type_category_date")
+_NOW = datetime(2024, 1, 31)
+_SAMPLE_BUDGETS = [
+    Budget(id=1, category="all", period_start=_NOW - timedelta(days=30), period_end=_NOW),
+    Budget(id=2, category="Belanja", period_start=_NOW - timedelta(days=7), period_end=_NOW),
+]
+
+HOT_QUERIES: Dict[str, Tuple[Callable[[], Select], Tuple[str, ...]]] = {
+    "user_by_phone": (
+        lambda: queries.user_by_phone("6281200000000"),
+        ("sqlite_autoindex_users_1", "users_phone_number_key"),
+    ),
+    "user_transactions": (
+        lambda: queries.user_transactions(1, 10),
+        ("ix_transactions_user_date",),
+    ),
+    "user_transactions_keyset": (
+        lambda: queries.user_transactions(1, 10, before=(_NOW, 1000)),
+        ("ix_transactions_user_date",),
+    ),
+    "transaction_rows_keyset": (
+        lambda: queries.user_transactions(1, 10, before=(_NOW, 1000), columns=TRANSACTION_COLUMNS),
+        ("ix_transactions_user_date",),
+    ),
+    "balance_totals": (
+        lambda: queries.balance_totals(1),
+        _TRANSACTION_INDEXES,
+    ),
+    "active_budgets": (
+        lambda: queries.active_budgets(1, _NOW, "Belanja"),
+        ("ix_budgets_user_period",),
+    ),
+    "active_budget_rows": (
+        lambda: queries.active_budgets(1, _NOW, columns=BUDGET_COLUMNS),
+        ("ix_budgets_user_period",),
+    ),
+    "budget_spent": (
+        lambda: queries.budget_spent(1, _SAMPLE_BUDGETS),
+        _TRANSACTION_INDEXES,
+    ),
+    "period_buckets": (
+        lambda: queries.period_buckets(1, _NOW - timedelta(days=30), _NOW),
+        ("sqlite_autoindex_daily_rollups_1", "daily_rollups_pkey", "PRIMARY"),
+    ),
+    "transaction_columns": (
+        lambda: queries.transaction_columns(1),
+        _TRANSACTION_INDEXES,
+    ),
+    "user_budgets": (
+        lambda: queries.user_budgets(1),
+        ("ix_budgets_user_period",),
+    ),
+    "user_notifications": (
+        lambda: queries.user_notifications(1),
+        ("ix_notifications_user_read_created",),
+    ),
+    "user_notifications_unread": (
+        lambda: queries.user_notifications(1, unread_only=True),
+        ("ix_notifications_user_read_created",),
+    ),
+    "notification_rows": (
+        lambda: queries.user_notifications(1, columns=NOTIFICATION_COLUMNS),
+        ("ix_notifications_user_read_created",),
+    ),
+}
+
+def explain(engine: Engine, statement: Select) -> str:
+    """Return the database's query plan for a statement as plain text."""
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + sql).fetchall()
+    # SQLite puts the plan text in the last column, PostgreSQL/MySQL in the only one
+    return "\n".join(str(row[-1]) for row in rows)
+
+def check_query_plans(engine: Engine) -> List[Dict[str, Any]]:
+    """EXPLAIN every hot query and report whether one of its expected indexes is used."""
+    results = []
+    for name, (build, expected) in HOT_QUERIES.items():
+        plan = explain(engine, build())
+        used = [index for index in expected if index in plan]
+        results.append({"query": name, "ok": bool(used), "indexes": used, "plan": plan})
+        if not used:
+            logger.warning(f"Query {name} does not use any of {expected}:\n{plan}")
+    return results
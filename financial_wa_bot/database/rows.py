@@ -0,0 +1,75 @@
+"""Read-only row projections for listing endpoints.
+
+Listings only copy a handful of columns into response dicts, so they select
+exactly those columns and return them as named tuples: no identity map,
+no change tracking, no lazy relationships, and a fraction of the memory of
+a hydrated ORM instance. Each ``*_COLUMNS`` tuple matches its row type's
+field order. Rows are snapshots; use the ORM methods to modify anything.
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from .money import Money
+from .models import Budget, Notification, PendingBudgetCheck, Transaction, TransactionType
+
+class TransactionRow(NamedTuple):
+    id: int
+    type: TransactionType
+    amount: Money
+    category: str
+    description: Optional[str]
+    date: datetime
+
+TRANSACTION_COLUMNS = (
+    Transaction.id,
+    Transaction.type,
+    Transaction.amount,
+    Transaction.category,
+    Transaction.description,
+    Transaction.date,
+)
+
+class NotificationRow(NamedTuple):
+    id: int
+    type: str
+    message: str
+    is_read: int
+    created_at: datetime
+
+NOTIFICATION_COLUMNS = (
+    Notification.id,
+    Notification.type,
+    Notification.message,
+    Notification.is_read,
+    Notification.created_at,
+)
+
+class BudgetRow(NamedTuple):
+    id: int
+    category: str
+    amount: Money
+    spent_amount: Money
+    period_start: datetime
+    period_end: datetime
+
+BUDGET_COLUMNS = (
+    Budget.id,
+    Budget.category,
+    Budget.amount,
+    Budget.spent_amount,
+    Budget.period_start,
+    Budget.period_end,
+)
+
+class PendingBudgetCheckRow(NamedTuple):
+    id: int
+    user_id: int
+    date: datetime
+    category: str
+
+PENDING_BUDGET_CHECK_COLUMNS = (
+    PendingBudgetCheck.id,
+    PendingBudgetCheck.user_id,
+    PendingBudgetCheck.date,
+    PendingBudgetCheck.category,
+)
@@ -0,0 +1,119 @@
+"""Connection pool metrics and session leak detection for DatabaseManager."""
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+import asyncio
+import itertools
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PoolMetrics:
+    connects: int = 0
+    checkouts: int = 0
+    checkins: int = 0
+    invalidations: int = 0
+    checked_out: int = 0
+    max_checked_out: int = 0
+
+@dataclass
+class _OpenSession:
+    label: str
+    task: str
+    opened_at: float
+    reported: bool = False
+
+class SessionTracker:
+    """Counts pool checkouts/returns and reports sessions held past a threshold.
+
+    Every unit of work registers itself on open and unregisters on close.
+    Sessions still open after ``leak_threshold`` seconds are logged once as
+    suspected leaks, with the label and task that opened them.
+    """
+
+    def __init__(self, leak_threshold: float):
+        self.leak_threshold = leak_threshold
+        self.pool = PoolMetrics()
+        self.sessions_opened = 0
+        self.sessions_closed = 0
+        self.leaks_detected = 0
+        self._open: Dict[int, _OpenSession] = {}
+        self._ids = itertools.count(1)
+
+    def attach(self, engine: Engine) -> None:
+        """Listen to pool events on a (sync or async-wrapped) engine."""
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def opened(self, label: str) -> int:
+        """Register a new session and run the leak check."""
+        self.check_leaks()
+        task = asyncio.current_task()
+        token = next(self._ids)
+        self._open[token] = _OpenSession(
+            label=label,
+            task=task.get_name() if task else "-",
+            opened_at=time.monotonic(),
+        )
+        self.sessions_opened += 1
+        return token
+
+    def closed(self, token: int) -> None:
+        """Unregister a session, logging it if it was held too long."""
+        session = self._open.pop(token, None)
+        if session is None:
+            return
+        self.sessions_closed += 1
+        held = time.monotonic() - session.opened_at
+        if held > self.leak_threshold:
+            logger.warning(f"Session '{session.label}' ({session.task}) was held for {held:.1f}s")
+
+    def check_leaks(self) -> List[Dict[str, Any]]:
+        """Log sessions open longer than the threshold; each one is reported once."""
+        now = time.monotonic()
+        leaks = []
+        for session in self._open.values():
+            held = now - session.opened_at
+            if held <= self.leak_threshold:
+                continue
+            leaks.append({"label": session.label, "task": session.task, "held_seconds": round(held, 1)})
+            if not session.reported:
+                session.reported = True
+                self.leaks_detected += 1
+                logger.warning(
+                    f"Possible session leak: '{session.label}' opened by {session.task} "
+                    f"held for {held:.1f}s"
+                )
+        return leaks
+
+    def snapshot(self, pool_status: Optional[str] = None) -> Dict[str, Any]:
+        """Current counters, suitable for logging or a metrics endpoint."""
+        return {
+            "pool": asdict(self.pool),
+            "pool_status": pool_status,
+            "sessions_open": len(self._open),
+            "sessions_opened": self.sessions_opened,
+            "sessions_closed": self.sessions_closed,
+            "leaks_detected": self.leaks_detected,
+        }
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.pool.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.pool.checkouts += 1
+        self.pool.checked_out += 1
+        self.pool.max_checked_out = max(self.pool.max_checked_out, self.pool.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        self.pool.checkins += 1
+        self.pool.checked_out = max(self.pool.checked_out - 1, 0)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.pool.invalidations += 1
@@ -0,0 +1,337 @@
+"""Per-user columnar transaction cache for reports and trend charts.
+
+A user's transactions are loaded once into parallel NumPy arrays (day,
+amount in minor units, income flag, category code) ordered by day; after
+that, committed inserts are appended in place through a DatabaseManager
+transaction listener, so reports for any period are computed without a
+database round trip: a date window is two binary searches, category totals
+one ``bincount`` and the daily summary one ``reduceat``.
+
+Writes this process did not see (another worker, the CLI importer) are
+caught on each hit by comparing the row count with the running balance
+ledger's ``transaction_count``, a primary key read; ANALYTICS_CACHE_TTL
+bounds the age of anything that check cannot see.
+
+Users are kept in an LRU bounded by ANALYTICS_CACHE_MB. numpy is optional;
+without it (or with ANALYTICS_ENGINE=sql) ReportEngine reads the SQL daily
+rollups instead.
+"""
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import ANALYTICS_CACHE_MB, ANALYTICS_CACHE_TTL, ANALYTICS_ENGINE
+from database.db_manager import db_manager
+from database.models import TransactionType
+from database.money import Money
+
+try:
+    import numpy as np
+except ImportError:  # optional: reports fall back to the SQL daily rollups
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# float64 accumulation in bincount is exact while the summed magnitudes stay below 2**53
+_EXACT_FLOAT_SUM = 2 ** 53
+# Rough fixed cost of a cached user besides its arrays
+_ENTRY_OVERHEAD = 512
+
+class UserColumns:
+    """One user's transactions as parallel arrays ordered by day.
+
+    ``days`` is datetime64[D], ``amounts`` int64 minor units, ``income`` a
+    bool mask and ``codes`` an index into ``categories``. Arrays keep spare
+    capacity so appends do not copy; only the first ``size`` entries are
+    live. A back-dated append marks the arrays unsorted and they are
+    re-sorted before the next query.
+    """
+
+    def __init__(self, capacity: int = 0):
+        capacity = max(capacity, 16)
+        self.size = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.days = np.empty(capacity, dtype="datetime64[D]")
+        self.amounts = np.empty(capacity, dtype=np.int64)
+        self.income = np.empty(capacity, dtype=bool)
+        self.codes = np.empty(capacity, dtype=np.int32)
+        self.categories: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+        self._max_id = 0
+        self._sorted = True
+        self.expires_at = float("inf")
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple[int, datetime, TransactionType, str, int]]) -> "UserColumns":
+        """Build from (id, date, type, category, amount in minor units) tuples"""
+        columns = cls(len(rows))
+        if rows:
+            ids, dates, types, categories, amounts = zip(*rows)
+            columns._fill(ids, dates, types, categories, amounts)
+        return columns
+
+    def append(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """Add committed transactions (dicts with id, date, type, category and Money amount)"""
+        # The load that built these arrays may already have seen a just-committed row
+        new = [row for row in rows if not self._contains(row["id"])]
+        if not new:
+            return
+        self._fill(
+            [row["id"] for row in new],
+            [row["date"] for row in new],
+            [row["type"] for row in new],
+            [row["category"] for row in new],
+            [Money.parse(row["amount"]).minor for row in new],
+        )
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.ids, self.days, self.amounts, self.income, self.codes)
+        return sum(a.nbytes for a in arrays) + 64 * len(self.categories) + _ENTRY_OVERHEAD
+
+    def category_totals(self, start: date, end: date) -> Dict[str, Dict[str, Money]]:
+        """Income and expense totals per category for the days in [start, end]"""
+        window = self._window(start, end)
+        # One bucket per (category, income flag)
+        keys = self.codes[window].astype(np.int64) * 2 + self.income[window]
+        buckets = 2 * len(self.categories)
+        counts = np.bincount(keys, minlength=buckets)
+        totals = _sum_by_key(keys, self.amounts[window], buckets)
+        summary: Dict[str, Dict[str, Money]] = {
+            TransactionType.INCOME.value: {},
+            TransactionType.EXPENSE.value: {}
+        }
+        for key in np.flatnonzero(counts).tolist():
+            code, income = divmod(key, 2)
+            kind = TransactionType.INCOME if income else TransactionType.EXPENSE
+            summary[kind.value][self.categories[code]] = Money(int(totals[key]))
+        return summary
+
+    def daily_totals(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """One {"date", "income", "expense"} entry per day with transactions in [start, end], oldest first"""
+        window = self._window(start, end)
+        days = self.days[window]
+        if not len(days):
+            return []
+        starts = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+        amounts = self.amounts[window]
+        income = self.income[window]
+        income_totals = np.add.reduceat(np.where(income, amounts, 0), starts).tolist()
+        expense_totals = np.add.reduceat(np.where(income, 0, amounts), starts).tolist()
+        return [
+            {"date": day, "income": Money(income_total), "expense": Money(expense_total)}
+            for day, income_total, expense_total in zip(
+                np.datetime_as_string(days[starts]).tolist(), income_totals, expense_totals
+            )
+        ]
+
+    def _window(self, start: date, end: date) -> slice:
+        if not self._sorted:
+            self._sort()
+        days = self.days[:self.size]
+        lo = int(np.searchsorted(days, np.datetime64(start, "D"), side="left"))
+        hi = int(np.searchsorted(days, np.datetime64(end, "D"), side="right"))
+        return slice(lo, hi)
+
+    def _contains(self, transaction_id: int) -> bool:
+        # Ids only grow, so a scan is needed just for ids at or below the largest seen
+        return transaction_id <= self._max_id and bool((self.ids[:self.size] == transaction_id).any())
+
+    def _fill(
+        self,
+        ids: Sequence[int],
+        dates: Sequence[Optional[datetime]],
+        types: Sequence[TransactionType],
+        categories: Sequence[str],
+        amounts: Sequence[int]
+    ) -> None:
+        count = len(ids)
+        self._reserve(self.size + count)
+        new = slice(self.size, self.size + count)
+        self.ids[new] = ids
+        # Calendar day of the stored (naive) datetime, the same day the SQL rollups use
+        self.days[new] = np.array(dates, dtype="datetime64[us]").astype("datetime64[D]")
+        self.amounts[new] = amounts
+        self.income[new] = [t == TransactionType.INCOME for t in types]
+        self.codes[new] = [self._category_code(c) for c in categories]
+        # The new rows plus the last old one: any step back in time means a re-sort is due
+        tail = self.days[max(self.size - 1, 0):self.size + count]
+        if (tail[1:] < tail[:-1]).any():
+            self._sorted = False
+        self.size += count
+        self._max_id = max(self._max_id, max(ids))
+
+    def _category_code(self, category: str) -> int:
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _reserve(self, needed: int) -> None:
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in ("ids", "days", "amounts", "income", "codes"):
+            old = getattr(self, name)
+            grown = np.empty(capacity, dtype=old.dtype)
+            grown[:self.size] = old[:self.size]
+            setattr(self, name, grown)
+
+    def _sort(self) -> None:
+        live = slice(0, self.size)
+        # Stable on (day, id); NaT days sort last and so fall outside every window
+        order = np.lexsort((self.ids[live], self.days[live]))
+        for name in ("ids", "days", "amounts", "income", "codes"):
+            array = getattr(self, name)
+            array[live] = array[live][order]
+        self._sorted = True
+
+def _sum_by_key(keys: Any, amounts: Any, buckets: int) -> Any:
+    """Exact int64 sums of ``amounts`` per key"""
+    if int(np.abs(amounts).sum()) < _EXACT_FLOAT_SUM:
+        return np.rint(np.bincount(keys, weights=amounts, minlength=buckets)).astype(np.int64)
+    totals = np.zeros(buckets, dtype=np.int64)
+    np.add.at(totals, keys, amounts)
+    return totals
+
+def _select_engine(name: str) -> bool:
+    if name not in ("auto", "columnar", "sql"):
+        raise ValueError(f"Unknown analytics engine {name!r}; expected auto, columnar or sql")
+    if name == "columnar" and np is None:
+        raise ValueError("ANALYTICS_ENGINE=columnar but numpy is not installed")
+    return name != "sql" and np is not None
+
+class ColumnarAnalytics:
+    """LRU of UserColumns bounded by total array memory.
+
+    Columns are loaded on first use, one load per user at a time, and kept
+    current by appending rows from DatabaseManager transaction listeners.
+    Bulk imports do not report their rows, so they drop the user's columns
+    instead; a load that raced with any insert for its user is used once
+    but not cached. A hit whose row count no longer matches the ledger, or
+    that is older than ``ttl`` seconds, is reloaded.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, enabled: bool):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._users: "OrderedDict[int, UserColumns]" = OrderedDict()
+        self._bytes = 0
+        self._loading: Dict[int, "asyncio.Future[UserColumns]"] = {}
+        # Users whose in-flight load may have missed an insert
+        self._stale: Set[int] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.reloads = 0
+        if enabled:
+            db_manager.add_transaction_listener(self._on_insert)
+
+    async def columns(self, user_id: int, session: Optional[AsyncSession] = None) -> Optional[UserColumns]:
+        """The user's columns, loading them on a miss; None when the engine is disabled.
+
+        A hit's version check runs in the caller's ``session`` when given, so a
+        caller holding a connection never waits on the pool for another.
+        """
+        if not self.enabled:
+            return None
+        columns = self._users.get(user_id)
+        if columns is not None:
+            if columns.expires_at <= time.monotonic():
+                self.expirations += 1
+                self.invalidate(user_id)
+            elif await self._changed_elsewhere(user_id, columns, session):
+                self.reloads += 1
+                self.invalidate(user_id)
+            else:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return columns
+        self.misses += 1
+        load = self._loading.get(user_id)
+        if load is None:
+            load = self._loading[user_id] = asyncio.ensure_future(self._load(user_id))
+            load.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        # A cancelled caller must not cancel the load other callers are waiting on
+        return await asyncio.shield(load)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's columns; an in-flight load for the user is not cached"""
+        if user_id in self._loading:
+            self._stale.add(user_id)
+        columns = self._users.pop(user_id, None)
+        if columns is not None:
+            self._bytes -= columns.nbytes
+
+    def clear(self) -> None:
+        self._stale.update(self._loading)
+        self._users.clear()
+        self._bytes = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Cache size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "users": len(self._users),
+            "rows": sum(columns.size for columns in self._users.values()),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "reloads": self.reloads,
+        }
+
+    async def _changed_elsewhere(
+        self, user_id: int, columns: UserColumns, session: Optional[AsyncSession]
+    ) -> bool:
+        # Every transaction write also updates the ledger; no row means none happened since it existed
+        count = await db_manager.get_ledger_transaction_count(user_id, session=session)
+        return count is not None and count != columns.size
+
+    async def _load(self, user_id: int) -> UserColumns:
+        try:
+            columns = UserColumns.from_rows(await db_manager.get_transaction_columns(user_id))
+            columns.expires_at = time.monotonic() + self.ttl
+            if user_id not in self._stale:
+                self._users[user_id] = columns
+                self._bytes += columns.nbytes
+                self._evict()
+            return columns
+        finally:
+            self._stale.discard(user_id)
+
+    def _on_insert(self, user_id: int, rows: Optional[List[Dict[str, Any]]]) -> None:
+        columns = self._users.get(user_id)
+        if rows is None or columns is None:
+            self.invalidate(user_id)
+            return
+        before = columns.nbytes
+        columns.append(rows)
+        self._bytes += columns.nbytes - before
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._users:
+            _, columns = self._users.popitem(last=False)
+            self._bytes -= columns.nbytes
+            self.evictions += 1
+            logger.debug(f"Evicted columnar analytics for a user ({columns.size} rows)")
+
+# Create global columnar analytics instance
+columnar_analytics = ColumnarAnalytics(
+    int(ANALYTICS_CACHE_MB * 1024 * 1024), ANALYTICS_CACHE_TTL, _select_engine(ANALYTICS_ENGINE)
+)
@@ -0,0 +1,82 @@
+from typing import Dict, Any, List, Optional
+import logging
+
+from config.settings import DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL
+from database.db_manager import db_manager
+from database.user_cache import LRUCache
+from features.financial_processor import financial_processor
+from features.report_engine import report_engine
+
+logger = logging.getLogger(__name__)
+
+class DashboardSnapshots:
+    """Per-user cache of everything the dashboard page renders.
+
+    A snapshot (user, balance, budget status, insights, 30-day trend) is
+    built from one unit of work, reading balance and budgets once and
+    deriving insights from them. DatabaseManager write listeners drop a user's snapshot after
+    every committed transaction, budget or notification write; the TTL only
+    bounds how long time-dependent budget windows can go stale.
+    """
+
+    def __init__(self, max_size: int = DASHBOARD_CACHE_SIZE, ttl: float = DASHBOARD_CACHE_TTL):
+        self.cache: LRUCache[Dict[str, Any]] = LRUCache(max_size, ttl)
+        # Users with a snapshot being built: [builds in flight, invalidations since the first
+        # started]. A build that saw an invalidation is not cached; idle users have no entry
+        self._building: Dict[int, List[int]] = {}
+        self._generation = 0
+        db_manager.add_write_listener(self.invalidate)
+
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Return the user's dashboard snapshot, or None if the user does not exist"""
+        snapshot = self.cache.get(user_id)
+        if snapshot is not None:
+            return snapshot
+
+        building = self._building.setdefault(user_id, [0, 0])
+        building[0] += 1
+        version = (self._generation, building[1])
+        try:
+            async with db_manager.unit_of_work("dashboard_snapshot") as db:
+                user = await db_manager.get_user_by_id(user_id, session=db)
+                if user is None:
+                    return None
+                balance = await financial_processor.get_balance(user_id, session=db)
+                budget_status = await financial_processor.check_budget_status(user_id, session=db)
+                trend = await report_engine.daily_trend(user_id, session=db)
+        except Exception as e:
+            logger.error(f"Error building dashboard snapshot: {e}")
+            raise
+        finally:
+            building[0] -= 1
+            if building[0] == 0:
+                del self._building[user_id]
+
+        snapshot = {
+            "user": user,
+            "balance": balance,
+            "budget_status": budget_status,
+            "insights": financial_processor.build_insights(balance, budget_status),
+            **trend,
+        }
+        if version == (self._generation, building[1]):
+            self.cache.put(user_id, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop one user's snapshot, or every snapshot when user_id is None"""
+        if user_id is None:
+            self._generation += 1
+            self.cache.clear()
+        else:
+            building = self._building.get(user_id)
+            if building is not None:
+                building[1] += 1
+            self.cache.invalidate(user_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Cache size and hit/miss counters"""
+        return self.cache.metrics()
+
+# Create global dashboard snapshot cache
+dashboard_snapshots = DashboardSnapshots()
@@ -1,52 +1,65 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
-import pandas as pd
-from sqlalchemy import func
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.db_manager import db_manager
-from database.models import Transaction, Budget, TransactionType
+from database.models import Transaction, TransactionType, Budget
+from database.rows import BudgetRow
+from database.money import Money
+from features.report_engine import report_engine
 from config.settings import EXPENSE_CATEGORIES, INCOME_CATEGORIES
 
 logger = logging.getLogger(__name__)
 
 class FinancialProcessor:
+    def __init__(self):
+        # Set while this process runs the insight scheduler, which evaluates queued budget checks
+        self.defer_budget_alerts = False
+
     async def process_transaction(self, user_id: int, transaction_data: Dict[str, Any]) -> Transaction:
         """Process and record a new transaction"""
         try:
-            # Create transaction
-            transaction = await db_manager.create_transaction(user_id, transaction_data)
-            
-            # Check budget alerts
-            if transaction.type == TransactionType.EXPENSE:
-                await self._check_budget_alerts(user_id, transaction)
-            
-            return transaction
+            # Create transaction; ledger and budget counters commit with it
+            async with db_manager.unit_of_work("process_transaction") as db:
+                transaction = await db_manager.create_transaction(user_id, transaction_data, session=db)
+                if transaction.type == TransactionType.EXPENSE:
+                    if self.defer_budget_alerts:
+                        # Queued in the same commit, so a crash before the next pass loses no alert
+                        await db_manager.create_pending_budget_check(
+                            user_id, transaction.date, transaction.category, session=db
+                        )
+                    else:
+                        await self.create_budget_alerts(
+                            user_id, [(transaction.date, transaction.category)], session=db
+                        )
+                return transaction
         except Exception as e:
             logger.error(f"Error processing transaction: {e}")
             raise
 
-    async def get_balance(self, user_id: int) -> Dict[str, float]:
-        """Calculate user's current balance"""
+    async def create_budget_alerts(
+        self,
+        user_id: int,
+        expenses: List[Tuple[datetime, str]],
+        session: Optional[AsyncSession] = None
+    ) -> int:
+        """Create alerts for the active budgets the expenses count towards; returns how many"""
+        budgets = await db_manager.get_active_budget_rows(user_id, session=session)
+        alerts = self.budget_alerts(user_id, budgets, expenses)
+        for alert in alerts:
+            await db_manager.create_notification(alert, session=session)
+        return len(alerts)
+
+    async def get_balance(self, user_id: int, session: Optional[AsyncSession] = None) -> Dict[str, Money]:
+        """Read user's current balance from the running balance ledger"""
         try:
-            db = db_manager.get_db()
-            
-            # Calculate total income
-            total_income = db.query(func.sum(Transaction.amount))\
-                .filter(Transaction.user_id == user_id,
-                       Transaction.type == TransactionType.INCOME)\
-                .scalar() or 0.0
-
-            # Calculate total expenses
-            total_expenses = db.query(func.sum(Transaction.amount))\
-                .filter(Transaction.user_id == user_id,
-                       Transaction.type == TransactionType.EXPENSE)\
-                .scalar() or 0.0
-
+            balance = await db_manager.get_user_balance(user_id, session=session)
             return {
-                "total_income": total_income,
-                "total_expenses": total_expenses,
-                "current_balance": total_income - total_expenses
+                "total_income": balance.total_income,
+                "total_expenses": balance.total_expenses,
+                "current_balance": balance.total_income - balance.total_expenses
             }
         except Exception as e:
             logger.error(f"Error calculating balance: {e}")
@@ -55,41 +68,8 @@ class FinancialProcessor:
     async def generate_report(self, user_id: int, period: str = "monthly") -> Dict[str, Any]:
         """Generate financial report for specified period"""
         try:
-            # Get date range based on period
             start_date = self._get_period_start_date(period)
-            
-            # Get transactions for the period
-            transactions = await db_manager.get_user_transactions(user_id)
-            
-            # Convert to DataFrame for analysis
-            df = pd.DataFrame([{
-                'amount': t.amount,
-                'type': t.type.value,
-                'category': t.category,
-                'date': t.date
-            } for t in transactions])
-
-            if df.empty:
-                return self._generate_empty_report()
-
-            # Filter by date
-            df = df[df['date'] >= start_date]
-
-            # Calculate summaries
-            summary = {
-                "period": period,
-                "start_date": start_date.strftime("%Y-%m-%d"),
-                "end_date": datetime.now().strftime("%Y-%m-%d"),
-                "total_income": float(df[df['type'] == 'income']['amount'].sum()),
-                "total_expenses": float(df[df['type'] == 'expense']['amount'].sum()),
-                "categories": {
-                    "income": self._calculate_category_summary(df, 'income'),
-                    "expense": self._calculate_category_summary(df, 'expense')
-                },
-                "daily_summary": self._calculate_daily_summary(df)
-            }
-
-            return summary
+            return await report_engine.build_report(user_id, period, start_date, datetime.now())
         except Exception as e:
             logger.error(f"Error generating report: {e}")
             raise
@@ -104,7 +84,7 @@ class FinancialProcessor:
 
             budget_info = {
                 "user_id": user_id,
-                "amount": budget_data['amount'],
+                "amount": Money.parse(budget_data['amount']),
                 "period_start": start_date,
                 "period_end": end_date,
                 "category": budget_data.get('category', 'all')
@@ -115,73 +95,55 @@ class FinancialProcessor:
             logger.error(f"Error setting budget: {e}")
             raise
 
-    async def check_budget_status(self, user_id: int) -> Dict[str, Any]:
+    async def check_budget_status(self, user_id: int, session: Optional[AsyncSession] = None) -> Dict[str, Any]:
         """Check current budget status"""
         try:
-            # Get active budgets
-            budgets = await db_manager.get_user_budgets(user_id)
-            
-            status = []
-            for budget in budgets:
-                # Calculate spent amount
-                spent = await self._calculate_spent_amount(
-                    user_id, 
-                    budget.category,
-                    budget.period_start,
-                    budget.period_end
-                )
-                
-                remaining = budget.amount - spent
-                percentage_used = (spent / budget.amount) * 100 if budget.amount > 0 else 0
-
-                status.append({
-                    "category": budget.category,
-                    "budget_amount": budget.amount,
-                    "spent_amount": spent,
-                    "remaining_amount": remaining,
-                    "percentage_used": percentage_used,
-                    "period_start": budget.period_start.strftime("%Y-%m-%d"),
-                    "period_end": budget.period_end.strftime("%Y-%m-%d")
-                })
-
-            return {"budget_status": status}
+            return self.budget_status(await db_manager.get_active_budget_rows(user_id, session=session))
         except Exception as e:
             logger.error(f"Error checking budget status: {e}")
             raise
 
+    def budget_status(self, budgets: List[BudgetRow]) -> Dict[str, Any]:
+        """Describe the consumption of already loaded budgets"""
+        return {"budget_status": [self._budget_status_entry(budget, budget.spent_amount) for budget in budgets]}
+
     async def get_financial_insights(self, user_id: int) -> List[Dict[str, Any]]:
         """Generate financial insights based on user's data"""
         try:
-            insights = []
-            
-            # Get user's financial data
-            balance = await self.get_balance(user_id)
-            budget_status = await self.check_budget_status(user_id)
-            
-            # Generate insights based on the data
-            if balance["current_balance"] < 0:
-                insights.append({
-                    "type": "warning",
-                    "message": "Saldo Anda negatif. Pertimbangkan untuk mengurangi pengeluaran."
-                })
+            # Get user's financial data in one unit of work
+            async with db_manager.unit_of_work("get_financial_insights") as db:
+                balance = await self.get_balance(user_id, session=db)
+                budget_status = await self.check_budget_status(user_id, session=db)
+            return self.build_insights(balance, budget_status)
+        except Exception as e:
+            logger.error(f"Error generating insights: {e}")
+            raise
 
-            for status in budget_status["budget_status"]:
-                if status["percentage_used"] > 80:
-                    insights.append({
-                        "type": "alert",
-                        "message": f"Budget untuk {status['category']} sudah terpakai {status['percentage_used']:.1f}%"
-                    })
+    def build_insights(self, balance: Dict[str, Money], budget_status: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Derive insights from already computed balance and budget status"""
+        insights = []
 
-            # Add general financial tips
+        # Generate insights based on the data
+        if balance["current_balance"] < 0:
             insights.append({
-                "type": "tip",
-                "message": "Simpan minimal 20% dari pendapatan Anda untuk dana darurat."
+                "type": "warning",
+                "message": "Saldo Anda negatif. Pertimbangkan untuk mengurangi pengeluaran."
             })
 
-            return insights
-        except Exception as e:
-            logger.error(f"Error generating insights: {e}")
-            raise
+        for status in budget_status["budget_status"]:
+            if status["percentage_used"] > 80:
+                insights.append({
+                    "type": "alert",
+                    "message": f"Budget untuk {status['category']} sudah terpakai {status['percentage_used']:.1f}%"
+                })
+
+        # Add general financial tips
+        insights.append({
+            "type": "tip",
+            "message": "Simpan minimal 20% dari pendapatan Anda untuk dana darurat."
+        })
+
+        return insights
 
     def _get_period_start_date(self, period: str) -> datetime:
         """Get start date based on period"""
@@ -210,90 +172,45 @@ class FinancialProcessor:
         else:
             return start_date + timedelta(days=30)  # Default to monthly
 
-    def _calculate_category_summary(self, df: pd.DataFrame, trans_type: str) -> Dict[str, float]:
-        """Calculate summary by category for given transaction type"""
-        type_df = df[df['type'] == trans_type]
-        return type_df.groupby('category')['amount'].sum().to_dict()
-
-    def _calculate_daily_summary(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Calculate daily transaction summary"""
-        daily = df.groupby(['date', 'type'])['amount'].sum().unstack(fill_value=0)
-        return [
-            {
-                "date": date.strftime("%Y-%m-%d"),
-                "income": float(row.get('income', 0)),
-                "expense": float(row.get('expense', 0))
-            }
-            for date, row in daily.iterrows()
-        ]
-
-    def _generate_empty_report(self) -> Dict[str, Any]:
-        """Generate empty report structure"""
+    def _budget_status_entry(self, budget: BudgetRow, spent: Money) -> Dict[str, Any]:
+        """Describe a budget's consumption"""
         return {
-            "period": "monthly",
-            "start_date": datetime.now().strftime("%Y-%m-%d"),
-            "end_date": datetime.now().strftime("%Y-%m-%d"),
-            "total_income": 0.0,
-            "total_expenses": 0.0,
-            "categories": {
-                "income": {},
-                "expense": {}
-            },
-            "daily_summary": []
+            "category": budget.category,
+            "budget_amount": budget.amount,
+            "spent_amount": spent,
+            "remaining_amount": budget.amount - spent,
+            "percentage_used": (spent / budget.amount) * 100 if budget.amount > 0 else 0,
+            "period_start": budget.period_start.strftime("%Y-%m-%d"),
+            "period_end": budget.period_end.strftime("%Y-%m-%d")
         }
 
-    async def _calculate_spent_amount(
-        self, 
-        user_id: int, 
-        category: str,
-        start_date: datetime,
-        end_date: datetime
-    ) -> float:
-        """Calculate amount spent for a specific category and period"""
-        try:
-            db = db_manager.get_db()
-            query = db.query(func.sum(Transaction.amount))\
-                .filter(
-                    Transaction.user_id == user_id,
-                    Transaction.type == TransactionType.EXPENSE,
-                    Transaction.date.between(start_date, end_date)
-                )
-            
-            if category != 'all':
-                query = query.filter(Transaction.category == category)
-            
-            return query.scalar() or 0.0
-        except Exception as e:
-            logger.error(f"Error calculating spent amount: {e}")
-            raise
-
-    async def _check_budget_alerts(self, user_id: int, transaction: Transaction) -> None:
-        """Check if transaction triggers any budget alerts"""
-        try:
-            # Get active budgets
-            budgets = await db_manager.get_user_budgets(user_id)
-            
-            for budget in budgets:
-                if budget.category in ['all', transaction.category]:
-                    spent = await self._calculate_spent_amount(
-                        user_id,
-                        budget.category,
-                        budget.period_start,
-                        budget.period_end
-                    )
-                    
-                    # Create alert if over 80% of budget
-                    if spent >= (budget.amount * 0.8):
-                        await db_manager.create_notification({
-                            "user_id": user_id,
-                            "type": "budget_alert",
-                            "message": f"Anda telah menggunakan {(spent/budget.amount)*100:.1f}% "
-                                     f"dari budget {budget.category}"
-                        })
-        except Exception as e:
-            logger.error(f"Error checking budget alerts: {e}")
-            # Don't raise the error to prevent transaction failure
-            pass
+    def budget_alerts(
+        self,
+        user_id: int,
+        budgets: List[BudgetRow],
+        expenses: Optional[List[Tuple[datetime, str]]]
+    ) -> List[Dict[str, Any]]:
+        """Alert notifications for budgets at 80% or more that any of the (date, category) expenses counts towards.
+
+        With ``expenses`` None every budget given is checked.
+        """
+        alerts = []
+        for budget in budgets:
+            if expenses is not None and not any(
+                budget.category in ('all', category) and budget.period_start <= date <= budget.period_end
+                for date, category in expenses
+            ):
+                continue
+            spent = budget.spent_amount
+            # Create alert if over 80% of budget
+            if budget.amount > 0 and spent >= (budget.amount * 0.8):
+                alerts.append({
+                    "user_id": user_id,
+                    "type": "budget_alert",
+                    "message": f"Anda telah menggunakan {(spent/budget.amount)*100:.1f}% "
+                             f"dari budget {budget.category}"
+                })
+        return alerts
 
 # Create global financial processor instance
 financial_processor = FinancialProcessor()
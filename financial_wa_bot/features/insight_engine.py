@@ -0,0 +1,190 @@
+from typing import Dict, List, Any, Optional, Set
+import asyncio
+import logging
+
+from config.settings import INSIGHT_BATCH_SIZE, INSIGHT_CACHE_SIZE, INSIGHT_CACHE_TTL, INSIGHT_INTERVAL
+from database.db_manager import db_manager
+from database.rows import PendingBudgetCheckRow
+from database.user_cache import LRUCache
+from features.financial_processor import financial_processor
+
+logger = logging.getLogger(__name__)
+
+class InsightEngine:
+    """Budget alerts and insights evaluated by a background scheduler, off the write path.
+
+    While the scheduler runs, FinancialProcessor queues each committed
+    expense in pending_budget_checks in the same commit instead of checking
+    alerts inline (bulk imports raise none), and a DatabaseManager listener
+    marks written users dirty. Every ``interval`` seconds the scheduler
+    reads the queue and works through the queued and dirty users in batches
+    of ``batch_size``, one unit of work per batch: balance and active
+    budgets are read once per user, queued checks are claimed, alerts are
+    inserted and the user's insights are stored. A user written many times
+    between passes is evaluated once; the alerts a batch inserts do not
+    mark their users dirty again.
+
+    The queue lives in the database, so checks left by a crash, a shutdown
+    or another worker are picked up by the next pass anywhere; a check is
+    deleted in the unit of work that creates its alerts, and only by the
+    worker whose delete removed it. The dirty set only refreshes stored
+    insights and is rebuilt empty with the cache on restart.
+
+    Stored insights are served until the next pass refreshes them, so reads
+    lag writes by at most one interval; the TTL only bounds how long
+    time-dependent budget windows can go stale. Without a running scheduler
+    expenses are checked inline, writes just drop the stored entry and
+    reads compute inline.
+    """
+
+    def __init__(
+        self,
+        interval: float = INSIGHT_INTERVAL,
+        batch_size: int = INSIGHT_BATCH_SIZE,
+        max_size: int = INSIGHT_CACHE_SIZE,
+        ttl: float = INSIGHT_CACHE_TTL
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.cache: LRUCache[List[Dict[str, Any]]] = LRUCache(max_size, ttl)
+        # Dirty users in the order they were first written, with their queued budget checks
+        self._dirty: Dict[int, List[PendingBudgetCheckRow]] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Users whose alerts a batch is committing, so their write notification is not a new write
+        self._own_writes: Set[int] = set()
+        self._computing: Dict[int, "asyncio.Future[List[Dict[str, Any]]]"] = {}
+
+        self.passes = 0
+        self.batches = 0
+        self.evaluated = 0
+        self.alerts = 0
+        self.failed = 0
+        db_manager.add_write_listener(self._on_write)
+
+    async def start(self) -> None:
+        """Start the scheduler"""
+        if self._task is not None:
+            return
+        financial_processor.defer_budget_alerts = True
+        self._task = asyncio.create_task(self._run(), name="insight-scheduler")
+        logger.info(f"Insight engine started, evaluating every {self.interval}s")
+
+    async def stop(self) -> None:
+        """Stop the scheduler after evaluating the users still dirty"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        financial_processor.defer_budget_alerts = False
+        await self.run_pending()
+        logger.info("Insight engine stopped")
+
+    async def insights(self, user_id: int) -> List[Dict[str, Any]]:
+        """The user's stored insights, computed inline on a miss; concurrent misses share one computation"""
+        insights = self.cache.get(user_id)
+        if insights is not None:
+            return insights
+        compute = self._computing.get(user_id)
+        if compute is None:
+            compute = self._computing[user_id] = asyncio.ensure_future(self._compute(user_id))
+            compute.add_done_callback(lambda _: self._computing.pop(user_id, None))
+        # A cancelled caller must not cancel the computation other callers are waiting on
+        return await asyncio.shield(compute)
+
+    async def run_pending(self) -> int:
+        """Evaluate the users dirty or with queued budget checks, in batches; returns how many were evaluated"""
+        self.passes += 1
+        for check in await db_manager.get_pending_budget_checks():
+            self._dirty.setdefault(check.user_id, []).append(check)
+        remaining = len(self._dirty)
+        evaluated = 0
+        while remaining > 0 and self._dirty:
+            user_ids = list(self._dirty)[:min(self.batch_size, remaining)]
+            jobs = {user_id: self._dirty.pop(user_id) for user_id in user_ids}
+            try:
+                await self._run_batch(jobs)
+            except Exception as e:
+                self.failed += len(jobs)
+                logger.error(f"Error evaluating insights for {len(jobs)} users: {e}")
+                for user_id in jobs:
+                    self.cache.invalidate(user_id)
+            remaining -= len(jobs)
+            evaluated += len(jobs)
+        return evaluated
+
+    def metrics(self) -> Dict[str, Any]:
+        """Scheduler counters, pending users and stored insight cache counters"""
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+            "pending_users": len(self._dirty),
+            "passes": self.passes,
+            "batches": self.batches,
+            "evaluated": self.evaluated,
+            "alerts": self.alerts,
+            "failed": self.failed,
+            "cache": self.cache.metrics(),
+        }
+
+    async def _compute(self, user_id: int) -> List[Dict[str, Any]]:
+        insights = await financial_processor.get_financial_insights(user_id)
+        # A write racing this read leaves the user dirty, so the next pass corrects it
+        self.cache.put(user_id, insights)
+        return insights
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_pending()
+            except Exception as e:
+                logger.error(f"Error in insight scheduler: {e}")
+
+    async def _run_batch(self, jobs: Dict[int, List[PendingBudgetCheckRow]]) -> None:
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        alerted: Set[int] = set()
+        alerts = 0
+        try:
+            async with db_manager.unit_of_work("insight_batch") as db:
+                for user_id, checks in jobs.items():
+                    balance = await financial_processor.get_balance(user_id, session=db)
+                    budgets = await db_manager.get_active_budget_rows(user_id, session=db)
+                    # Checks another worker claimed first are its to evaluate
+                    expenses = [
+                        (check.date, check.category) for check in checks
+                        if await db_manager.claim_pending_budget_check(check.id, session=db)
+                    ]
+                    if expenses:
+                        for alert in financial_processor.budget_alerts(user_id, budgets, expenses):
+                            await db_manager.create_notification(alert, session=db)
+                            alerted.add(user_id)
+                            alerts += 1
+                    results[user_id] = financial_processor.build_insights(
+                        balance, financial_processor.budget_status(budgets)
+                    )
+                # Write listeners run right after the commit
+                self._own_writes.update(alerted)
+        finally:
+            self._own_writes.difference_update(alerted)
+        # Only after the alerts committed
+        for user_id, insights in results.items():
+            self.cache.put(user_id, insights)
+        self.batches += 1
+        self.evaluated += len(jobs)
+        self.alerts += alerts
+
+    def _on_write(self, user_id: Optional[int]) -> None:
+        if user_id in self._own_writes:
+            # Skipped once: if another write's notification comes first, this batch's marks the user
+            self._own_writes.discard(user_id)
+        elif user_id is None:
+            self.cache.clear()
+        elif self._task is None:
+            self.cache.invalidate(user_id)
+        else:
+            self._dirty.setdefault(user_id, [])
+
+# Create global insight engine instance
+insight_engine = InsightEngine()
@@ -0,0 +1,125 @@
+from typing import Dict, List, Any, Optional
+from datetime import datetime, date, timedelta
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.db_manager import db_manager
+from database.models import TransactionType
+from database.money import Money, ZERO
+from features.columnar_analytics import columnar_analytics
+
+logger = logging.getLogger(__name__)
+
+class ReportEngine:
+    """Builds period reports from database-side aggregates.
+
+    The database returns one row per (day, type, category) bucket, so cost
+    depends on the number of buckets, not transactions. Category totals and
+    the daily summary are both rolled up from the same rows.
+
+    When the columnar analytics engine is enabled the same figures come from
+    the user's cached NumPy columns instead; once they are loaded, each hit
+    costs one primary-key lookup of the ledger's row count.
+    """
+
+    async def build_report(
+        self,
+        user_id: int,
+        period: str,
+        start_date: datetime,
+        end_date: datetime,
+        session: Optional[AsyncSession] = None
+    ) -> Dict[str, Any]:
+        """Build the report dict for transactions dated within [start_date, end_date]"""
+        try:
+            columns = await columnar_analytics.columns(user_id, session=session)
+            if columns is not None:
+                start, end = start_date.date(), end_date.date()
+                return self._report(
+                    period, start_date, end_date,
+                    columns.category_totals(start, end), columns.daily_totals(start, end)
+                )
+            rows = await db_manager.get_period_buckets(user_id, start_date, end_date, session=session)
+            return self._report_from_buckets(period, start_date, end_date, rows)
+        except Exception as e:
+            logger.error(f"Error building report: {e}")
+            raise
+
+    async def daily_trend(
+        self,
+        user_id: int,
+        days: int = 30,
+        session: Optional[AsyncSession] = None
+    ) -> Dict[str, List[Any]]:
+        """Income and expense per day for the last ``days`` days, for the dashboard trend chart"""
+        try:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days - 1)
+            columns = await columnar_analytics.columns(user_id, session=session)
+            if columns is not None:
+                daily = columns.daily_totals(start_date.date(), end_date.date())
+            else:
+                rows = await db_manager.get_period_buckets(user_id, start_date, end_date, session=session)
+                daily = self._daily_summary(rows)
+            totals = {entry["date"]: entry for entry in daily}
+            dates = [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+            return {
+                "trend_dates": dates,
+                "income_trend": [totals[d]["income"] if d in totals else ZERO for d in dates],
+                "expense_trend": [totals[d]["expense"] if d in totals else ZERO for d in dates],
+            }
+        except Exception as e:
+            logger.error(f"Error building daily trend: {e}")
+            raise
+
+    def _report_from_buckets(
+        self,
+        period: str,
+        start_date: datetime,
+        end_date: datetime,
+        rows: List[Any]
+    ) -> Dict[str, Any]:
+        """Assemble the report dict from (day, type, category, total) rows"""
+        return self._report(period, start_date, end_date, self._category_summary(rows), self._daily_summary(rows))
+
+    def _report(
+        self,
+        period: str,
+        start_date: datetime,
+        end_date: datetime,
+        categories: Dict[str, Dict[str, Money]],
+        daily_summary: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        return {
+            "period": period,
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            "total_income": sum(categories["income"].values(), ZERO),
+            "total_expenses": sum(categories["expense"].values(), ZERO),
+            "categories": categories,
+            "daily_summary": daily_summary
+        }
+
+    def _category_summary(self, rows: List[Any]) -> Dict[str, Dict[str, Money]]:
+        """Roll (type, category, total) rows up into income and expense maps"""
+        summary: Dict[str, Dict[str, Money]] = {
+            TransactionType.INCOME.value: {},
+            TransactionType.EXPENSE.value: {}
+        }
+        for row in rows:
+            totals = summary[row.type.value]
+            totals[row.category] = totals.get(row.category, ZERO) + row.total
+        return summary
+
+    def _daily_summary(self, rows: List[Any]) -> List[Dict[str, Any]]:
+        """Pivot (day, type, total) rows into one entry per day"""
+        days: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            day = row.day.strftime("%Y-%m-%d") if isinstance(row.day, date) else str(row.day)
+            entry = days.setdefault(day, {"date": day, "income": ZERO, "expense": ZERO})
+            entry[row.type.value] += row.total
+        return list(days.values())
+
+# Create global report engine instance
+report_engine = ReportEngine()
@@ -0,0 +1,38 @@
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+
+from features.dashboard_snapshot import dashboard_snapshots
+from features.financial_processor import financial_processor
+
+logger = logging.getLogger(__name__)
+
+class StatsEngine:
+    """Computes the combined /stats payload with as few queries as possible.
+
+    The period report (one bucketed aggregate over the period) and the
+    user's current state (balance and budget status, shared with the
+    dashboard snapshot cache) are independent, so they run concurrently in
+    separate units of work. A warm snapshot leaves only the report query.
+    """
+
+    async def compute(self, user_id: int, period: str = "monthly") -> Optional[Dict[str, Any]]:
+        """Return report, budget and balance for a user, or None if the user does not exist"""
+        try:
+            report, snapshot = await asyncio.gather(
+                financial_processor.generate_report(user_id, period),
+                dashboard_snapshots.get(user_id),
+            )
+            if snapshot is None:
+                return None
+            return {
+                "report": report,
+                "budget": snapshot["budget_status"],
+                "balance": snapshot["balance"]
+            }
+        except Exception as e:
+            logger.error(f"Error computing statistics: {e}")
+            raise
+
+# Create global stats engine instance
+stats_engine = StatsEngine()
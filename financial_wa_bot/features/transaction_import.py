@@ -0,0 +1,117 @@
+"""Validation and file parsers for bulk transaction imports.
+
+Every parser yields plain dicts accepted by
+``DatabaseManager.bulk_create_transactions``. CSV is read row by row, so
+large bank mutation exports are never held in memory at once.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, TextIO
+import csv
+import re
+
+from database.models import TransactionType
+from database.money import MAX_TRANSACTION_MINOR, Money
+
+DEFAULT_CATEGORY = "Lainnya"
+
+class TransactionImportError(ValueError):
+    """A row that cannot be imported; carries its 1-based position in the input"""
+
+    def __init__(self, row: int, message: str):
+        super().__init__(f"row {row}: {message}")
+        self.row = row
+
+def transaction_row(data: Any, row: int = 0) -> Dict[str, Any]:
+    """Validate one imported transaction and convert it to create_transaction fields"""
+    if not isinstance(data, dict):
+        raise TransactionImportError(row, f"expected an object, got {type(data).__name__}")
+    try:
+        transaction_type = TransactionType(str(data["type"]).strip().lower())
+        amount = Money.parse(data["amount"])
+    except KeyError as e:
+        raise TransactionImportError(row, f"missing field {e.args[0]!r}")
+    except ValueError as e:
+        raise TransactionImportError(row, str(e))
+    if amount <= 0:
+        raise TransactionImportError(row, "amount must be positive")
+    if amount.minor > MAX_TRANSACTION_MINOR:
+        raise TransactionImportError(row, f"amount must be at most {Money(MAX_TRANSACTION_MINOR)}")
+
+    date = data.get("date")
+    if isinstance(date, str):
+        try:
+            date = datetime.fromisoformat(date)
+        except ValueError:
+            raise TransactionImportError(row, f"invalid date {date!r}")
+    elif date is not None and not isinstance(date, datetime):
+        raise TransactionImportError(row, f"invalid date {date!r}")
+    if date is not None and date.tzinfo is not None:
+        # Stored dates are naive UTC
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+
+    category = data.get("category")
+    description = data.get("description")
+    for field, value in (("category", category), ("description", description)):
+        if value is not None and not isinstance(value, str):
+            raise TransactionImportError(row, f"{field} must be a string")
+
+    result = {
+        "type": transaction_type,
+        "amount": amount,
+        "category": (category or "").strip()[:50] or DEFAULT_CATEGORY,
+        "description": description or None,
+    }
+    if date is not None:
+        result["date"] = date
+    return result
+
+def parse_csv(f: TextIO) -> Iterator[Dict[str, Any]]:
+    """Read a CSV with a header row.
+
+    Columns: date, amount, category, description and optionally type. Without
+    a type column the sign of the amount decides: negative is an expense.
+    """
+    for row, record in enumerate(csv.DictReader(f), start=1):
+        record = {key.strip().lower(): (value or "").strip() for key, value in record.items() if key}
+        if not record.get("type"):
+            try:
+                amount = Money.parse(record.get("amount", ""))
+            except ValueError:
+                raise TransactionImportError(row, f"invalid amount {record.get('amount')!r}")
+            record["type"] = TransactionType.EXPENSE.value if amount < 0 else TransactionType.INCOME.value
+            record["amount"] = abs(amount)
+        yield transaction_row(record, row)
+
+_OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|(?=</BANKTRANLIST>))", re.S | re.I)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+def _ofx_date(value: str) -> Optional[datetime]:
+    digits = re.match(r"\d{8}(\d{6})?", value)
+    if not digits:
+        return None
+    return datetime.strptime(digits.group(), "%Y%m%d%H%M%S" if digits.group(1) else "%Y%m%d")
+
+def parse_ofx(f: TextIO) -> Iterator[Dict[str, Any]]:
+    """Read the STMTTRN entries of an OFX 1.x (SGML) or 2.x (XML) statement.
+
+    TRNAMT's sign decides the type; NAME and MEMO become the description.
+    """
+    for row, match in enumerate(_OFX_TRANSACTION.finditer(f.read()), start=1):
+        fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(match.group(1))}
+        try:
+            amount = Money.parse(fields["TRNAMT"].replace(",", "."))
+        except (KeyError, ValueError):
+            raise TransactionImportError(row, "missing or invalid TRNAMT")
+        description = " - ".join(v for v in (fields.get("NAME"), fields.get("MEMO")) if v)
+        yield transaction_row({
+            "type": TransactionType.EXPENSE.value if amount < 0 else TransactionType.INCOME.value,
+            "amount": abs(amount),
+            "category": DEFAULT_CATEGORY,
+            "description": description,
+            "date": _ofx_date(fields.get("DTPOSTED", "")),
+        }, row)
+
+PARSERS = {
+    "csv": parse_csv,
+    "ofx": parse_ofx,
+}
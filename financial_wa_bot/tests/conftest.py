@@ -0,0 +1,56 @@
+"""Shared fixtures: a throwaway SQLite database and one event loop for the whole run.
+
+DATABASE_URL is set before any project module is imported, so the global
+DatabaseManager and everything built on it bind to the temporary file.
+"""
+import asyncio
+import itertools
+import os
+import tempfile
+
+import pytest
+
+_DIR = tempfile.mkdtemp(prefix="financial_wa_bot_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DIR}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_DIR}/test.db"
+os.environ["WS_BROKER_DIR"] = os.path.join(_DIR, "ws_broker")
+
+_phone_numbers = itertools.count(6281200000001)
+
+@pytest.fixture(scope="session")
+def loop():
+    # Pooled aiosqlite connections belong to the loop that opened them
+    loop = asyncio.new_event_loop()
+    yield loop
+    from database.db_manager import db_manager
+    loop.run_until_complete(db_manager.close())
+    loop.close()
+
+@pytest.fixture
+def run(loop):
+    """Run a coroutine to completion on the session loop"""
+    return loop.run_until_complete
+
+@pytest.fixture(scope="session")
+def db(loop):
+    from database.db_manager import db_manager
+    db_manager.init_db()
+    return db_manager
+
+@pytest.fixture
+def user(db, run):
+    """A new user with no transactions"""
+    return run(db.get_or_create_user(str(next(_phone_numbers))))
+
+@pytest.fixture(scope="session")
+def app(db):
+    from benchmarks.load_test import install_fake_whatsapp
+    install_fake_whatsapp()
+    from web.server import app
+    return app
+
+@pytest.fixture
+def request_api(app, run):
+    """Issue one HTTP request against the app in-process; returns (status, body bytes)"""
+    from benchmarks.load_test import asgi_request
+    return lambda method, url, body=b"": run(asgi_request(app, method, url, body))
@@ -0,0 +1,44 @@
+"""Running balance ledger: maintained on insert, seeded from history, never written by reads."""
+from datetime import datetime
+
+from sqlalchemy import text
+
+from database.models import UserBalance
+from database.money import Money
+
+def test_ledger_tracks_every_insert_path(db, run, user):
+    run(db.create_transaction(user.id, {"type": "income", "amount": "1000.50", "category": "Gaji"}))
+    run(db.create_transaction(user.id, {"type": "expense", "amount": "200.25", "category": "Makanan"}))
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "expense", "amount": 50, "category": "Transportasi", "date": datetime(2026, 3, 1)},
+        {"type": "income", "amount": "0.10", "category": "Bonus", "date": datetime(2026, 3, 2)},
+    ]))
+
+    balance = run(db.get_user_balance(user.id))
+    assert (balance.total_income, balance.total_expenses, balance.transaction_count) == (
+        Money.parse("1000.60"), Money.parse("250.25"), 4
+    )
+    assert [m for m in run(db.verify_balances()) if m["user_id"] == user.id] == []
+
+def test_balance_reads_do_not_create_ledger_rows(db, run, user):
+    for user_id in (user.id, 987654):
+        balance = run(db.get_user_balance(user_id))
+        assert (balance.total_income, balance.total_expenses, balance.transaction_count) == (0, 0, 0)
+        assert run(db.get_transaction_count(user_id)) == 0
+
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT user_id FROM user_balances WHERE user_id IN (:a, :b)"), {"a": user.id, "b": 987654}
+        ).all()
+    assert rows == []
+
+def test_first_write_seeds_the_ledger_from_history(db, run, user):
+    run(db.create_transaction(user.id, {"type": "income", "amount": 300, "category": "Gaji"}))
+    # History that predates the ledger
+    with db.engine.begin() as conn:
+        conn.execute(UserBalance.__table__.delete().where(UserBalance.user_id == user.id))
+
+    run(db.create_transaction(user.id, {"type": "expense", "amount": 100, "category": "Makanan"}))
+
+    balance = run(db.get_user_balance(user.id))
+    assert (balance.total_income, balance.total_expenses, balance.transaction_count) == (300, 100, 2)
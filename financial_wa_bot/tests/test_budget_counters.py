@@ -0,0 +1,38 @@
+"""Materialized budget spent counters kept in step with every write path."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from database.money import Money
+
+def _spent(db, run, user):
+    return {budget.category: budget.spent_amount for budget in run(db.get_user_budgets(user.id))}
+
+def test_counters_follow_inserts_and_match_a_rebuild(db, run, user):
+    now = datetime.now()
+    for category in ("all", "Makanan", "Hiburan"):
+        run(db.create_budget({
+            "user_id": user.id, "category": category, "amount": 1000,
+            "period_start": now - timedelta(days=5), "period_end": now + timedelta(days=5),
+        }))
+
+    run(db.create_transaction(user.id, {"type": "expense", "amount": "12.34", "category": "Makanan", "date": now}))
+    run(db.create_transaction(user.id, {"type": "expense", "amount": 20, "category": "Belanja", "date": now}))
+    run(db.create_transaction(user.id, {"type": "income", "amount": 500, "category": "Makanan", "date": now}))
+    # Outside every window
+    run(db.create_transaction(
+        user.id, {"type": "expense", "amount": 99, "category": "Makanan", "date": now - timedelta(days=9)}
+    ))
+    # Back-dated bulk rows are recounted per chunk
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "expense", "amount": 1, "category": "Hiburan", "date": now - timedelta(days=4)},
+        {"type": "expense", "amount": 2, "category": "Makanan", "date": now - timedelta(days=3)},
+    ]))
+
+    expected = {"all": Money.parse("35.34"), "Makanan": Money.parse("14.34"), "Hiburan": Money.parse(1)}
+    assert _spent(db, run, user) == expected
+
+    with db.engine.begin() as conn:
+        conn.execute(text("UPDATE budgets SET spent_amount = 0 WHERE user_id = :u"), {"u": user.id})
+    assert run(db.rebuild_budget_counters(user.id)) == 3
+    assert _spent(db, run, user) == expected
@@ -0,0 +1,34 @@
+"""Budget status for many budgets evaluated from one grouped spending query."""
+from datetime import datetime, timedelta
+
+from database.money import Money
+from features.financial_processor import financial_processor
+
+def _budget(db, run, user, category, amount, start, end):
+    return run(db.create_budget({
+        "user_id": user.id, "category": category, "amount": amount, "period_start": start, "period_end": end,
+    }))
+
+def test_status_of_every_active_budget(db, run, user):
+    now = datetime.now()
+    start, end = now - timedelta(days=10), now + timedelta(days=20)
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "expense", "amount": 300, "category": "Makanan", "date": now - timedelta(days=1)},
+        {"type": "expense", "amount": 100, "category": "Transportasi", "date": now - timedelta(days=2)},
+        {"type": "expense", "amount": 5000, "category": "Makanan", "date": now - timedelta(days=30)},
+        {"type": "income", "amount": 9000, "category": "Gaji", "date": now - timedelta(days=1)},
+    ]))
+    _budget(db, run, user, "all", 1000, start, end)
+    _budget(db, run, user, "Makanan", 400, start, end)
+    _budget(db, run, user, "Hiburan", 50, start, end)
+    # Expired budgets are not reported
+    _budget(db, run, user, "all", 10, now - timedelta(days=40), now - timedelta(days=11))
+
+    status = run(financial_processor.check_budget_status(user.id))["budget_status"]
+
+    assert [(s["category"], s["spent_amount"], s["remaining_amount"]) for s in status] == [
+        ("all", Money.parse(400), Money.parse(600)),
+        ("Makanan", Money.parse(300), Money.parse(100)),
+        ("Hiburan", Money.parse(0), Money.parse(50)),
+    ]
+    assert [s["percentage_used"] for s in status] == [40, 75, 0]
@@ -0,0 +1,67 @@
+"""Columnar analytics: same reports as SQL, kept fresh across writes this process did not see."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from features.columnar_analytics import columnar_analytics
+from features.report_engine import report_engine
+
+pytest.importorskip("numpy")
+
+START, END = datetime(2026, 7, 1), datetime(2026, 7, 31, 23, 59)
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(columnar_analytics, "enabled", True)
+
+def _report(run, user_id):
+    return run(report_engine.build_report(user_id, "monthly", START, END))
+
+def test_columnar_report_equals_sql_report(db, run, user, monkeypatch):
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "expense" if i % 3 else "income", "amount": f"{i}.{i % 100:02d}",
+         "category": ("Makanan", "Transportasi", "Gaji")[i % 3], "date": datetime(2026, 6, 25) + timedelta(days=i % 40 // 4, hours=i % 24)}
+        for i in range(1, 300)
+    ]))
+    run(db.create_transaction(user.id, {"type": "expense", "amount": "0.01", "category": "Hiburan",
+                                        "date": datetime(2026, 7, 31, 23, 59)}))
+
+    columnar = _report(run, user.id)
+    assert user.id in columnar_analytics._users
+    monkeypatch.setattr(columnar_analytics, "enabled", False)
+    assert columnar == _report(run, user.id)
+
+def test_inserts_are_appended_in_place(db, run, user):
+    _report(run, user.id)
+    reloads = columnar_analytics.metrics()["reloads"]
+
+    run(db.create_transaction(user.id, {"type": "expense", "amount": 40, "category": "Makanan",
+                                        "date": datetime(2026, 7, 2)}))
+
+    assert _report(run, user.id)["total_expenses"] == 40
+    assert columnar_analytics.metrics()["reloads"] == reloads
+
+def test_write_by_another_process_is_picked_up(db, run, user, monkeypatch):
+    run(db.create_transaction(user.id, {"type": "expense", "amount": 10, "category": "Makanan",
+                                        "date": datetime(2026, 7, 2)}))
+    assert _report(run, user.id)["total_expenses"] == 10
+    reloads = columnar_analytics.metrics()["reloads"]
+
+    # Another worker's write updates the ledger but never reaches this process's listeners
+    monkeypatch.setattr(db, "_transaction_listeners", [])
+    run(db.create_transaction(user.id, {"type": "expense", "amount": 5, "category": "Makanan",
+                                        "date": datetime(2026, 7, 3)}))
+
+    assert _report(run, user.id)["total_expenses"] == 15
+    assert columnar_analytics.metrics()["reloads"] == reloads + 1
+
+def test_columns_expire_after_the_ttl(db, run, user, monkeypatch):
+    run(db.create_transaction(user.id, {"type": "income", "amount": 100, "category": "Gaji",
+                                        "date": datetime(2026, 7, 2)}))
+    _report(run, user.id)
+    expirations = columnar_analytics.metrics()["expirations"]
+
+    monkeypatch.setattr(columnar_analytics._users[user.id], "expires_at", 0.0)
+    assert _report(run, user.id)["total_income"] == 100
+    assert columnar_analytics.metrics()["expirations"] == expirations + 1
+    assert columnar_analytics._users[user.id].expires_at > 0
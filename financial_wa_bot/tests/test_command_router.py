@@ -0,0 +1,33 @@
+"""Compiled command router: one anchored match, longest prefix wins."""
+import pytest
+
+from config.settings import COMMAND_PREFIXES
+from core.command_router import CommandRouter, command_router
+
+@pytest.mark.parametrize("text, command", [
+    ("catat pengeluaran 50000 untuk makan", "expense"),
+    ("keluar 15000 untuk kopi", "expense"),
+    ("catat pemasukan 5000000 dari gaji", "income"),
+    ("cek saldo", "balance"),
+    ("saldo", "balance"),
+    ("laporan bulan ini", "report"),
+    ("atur budget 3000000", "budget"),
+    ("buka dashboard", "dashboard"),
+    ("tolong", "help"),
+    ("halo bot", None),
+    ("saya mau cek saldo", None),
+])
+def test_classify_matches_the_linear_prefix_scan(text, command):
+    legacy = next(
+        (name for name, prefixes in COMMAND_PREFIXES.items() if any(text.startswith(p) for p in prefixes)), None
+    )
+    assert command_router.classify(text) == command == legacy
+
+def test_longest_overlapping_prefix_wins_regardless_of_order():
+    router = CommandRouter({"dashboard": ["dashboard"], "open": ["dashboard saya"]})
+    assert router.match("dashboard saya sekarang") == ("open", "dashboard saya")
+    assert router.match("dashboard") == ("dashboard", "dashboard")
+
+def test_a_prefix_shared_by_two_commands_is_rejected():
+    with pytest.raises(ValueError):
+        CommandRouter({"balance": ["saldo"], "report": ["Saldo "]})
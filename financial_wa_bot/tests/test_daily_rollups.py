@@ -0,0 +1,50 @@
+"""Daily rollups: maintained incrementally on every insert path, equal to a rebuild from transactions."""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import select
+
+from database.models import DailyRollup, Transaction, TransactionType
+
+def _rollups(db, user_id):
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            select(DailyRollup.day, DailyRollup.type, DailyRollup.category, DailyRollup.total, DailyRollup.count)
+            .where(DailyRollup.user_id == user_id)
+        ).all()
+    return {(day, type_, category): (total, count) for day, type_, category, total, count in rows}
+
+def _from_transactions(db, user_id):
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            select(Transaction.date, Transaction.type, Transaction.category, Transaction.amount)
+            .where(Transaction.user_id == user_id)
+        ).all()
+    totals = defaultdict(lambda: [0, 0])
+    for date, type_, category, amount in rows:
+        bucket = totals[(date.date(), type_, category)]
+        bucket[0] += amount
+        bucket[1] += 1
+    return {key: tuple(value) for key, value in totals.items()}
+
+def test_incremental_rollups_match_transactions_and_rebuild(db, run, user):
+    run(db.create_transaction(
+        user.id, {"type": "expense", "amount": "10.25", "category": "Makanan", "date": datetime(2026, 4, 1, 8)}
+    ))
+    run(db.create_transaction(
+        user.id, {"type": "expense", "amount": 5, "category": "Makanan", "date": datetime(2026, 4, 1, 21)}
+    ))
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "expense", "amount": "0.75", "category": "Makanan", "date": datetime(2026, 4, 1, 12)},
+        {"type": "expense", "amount": 30, "category": "Transportasi", "date": datetime(2026, 4, 1, 9)},
+        {"type": "income", "amount": 1000, "category": "Gaji", "date": datetime(2026, 4, 2)},
+        {"type": "income", "amount": 250, "category": "Gaji", "date": datetime(2026, 4, 2, 23, 59)},
+    ]))
+
+    incremental = _rollups(db, user.id)
+    assert incremental == _from_transactions(db, user.id)
+    assert len(incremental) == 3
+    assert incremental[(datetime(2026, 4, 1).date(), TransactionType.EXPENSE, "Makanan")] == (16, 3)
+
+    run(db.rebuild_daily_rollups(user.id))
+    assert _rollups(db, user.id) == incremental
@@ -0,0 +1,60 @@
+"""Dashboard snapshots: cached per user, dropped by writes, never cached from a build a write raced."""
+import asyncio
+
+from features.dashboard_snapshot import DashboardSnapshots
+from features.financial_processor import financial_processor
+from features.report_engine import report_engine
+
+def test_snapshot_is_cached_until_the_user_writes(db, run, user):
+    snapshots = DashboardSnapshots()
+    try:
+        first = run(snapshots.get(user.id))
+        assert run(snapshots.get(user.id)) is first
+        run(financial_processor.process_transaction(user.id, {"type": "income", "amount": 50, "category": "Gaji"}))
+
+        refreshed = run(snapshots.get(user.id))
+        assert refreshed is not first
+        assert refreshed["balance"]["current_balance"] == 50
+        assert snapshots.metrics()["hits"] == 1
+    finally:
+        db._write_listeners.remove(snapshots.invalidate)
+
+def test_a_build_racing_a_write_is_not_cached_and_leaves_no_state(db, run, user, monkeypatch):
+    snapshots = DashboardSnapshots()
+    release = asyncio.Event()
+    daily_trend = report_engine.daily_trend
+
+    async def slow_daily_trend(*args, **kwargs):
+        await release.wait()
+        return await daily_trend(*args, **kwargs)
+
+    monkeypatch.setattr(report_engine, "daily_trend", slow_daily_trend)
+
+    async def scenario():
+        build = asyncio.ensure_future(snapshots.get(user.id))
+        await asyncio.sleep(0.01)
+        assert snapshots._building == {user.id: [1, 0]}
+        snapshots.invalidate(user.id)
+        release.set()
+        return await build
+
+    try:
+        assert run(scenario())["user"].id == user.id
+        assert len(snapshots.cache) == 0
+        # Writes by users without a build in flight leave nothing behind
+        for user_id in range(1000, 1100):
+            snapshots.invalidate(user_id)
+        assert snapshots._building == {}
+        assert run(snapshots.get(987651)) is None
+        assert snapshots._building == {}
+    finally:
+        db._write_listeners.remove(snapshots.invalidate)
+
+def test_cache_counters_are_exposed_on_metrics(user, request_api):
+    request_api("GET", f"/api/v1/stats/{user.id}")
+    status, body = request_api("GET", "/metrics")
+
+    assert status == 200
+    text = body.decode()
+    for gauge in ("dashboard_cache_hits", "json_cache_", "db_sessions_open", "columnar_analytics_hits"):
+        assert gauge in text
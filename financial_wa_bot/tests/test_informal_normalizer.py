@@ -0,0 +1,47 @@
+"""Single-pass informal Indonesian normalization, compared with the per-word re.sub loop it replaced."""
+import os
+
+import pytest
+
+from benchmarks.informal_normalizer import legacy_normalize
+from core.informal_normalizer import InformalNormalizer, informal_normalizer
+from core.message_handler import message_handler
+from database.money import Money
+
+@pytest.mark.parametrize("text, expected", [
+    ("catet keluar 50k buat makan siang", "catat pengeluaran 50000 untuk makan siang"),
+    ("rp50k utk makan", "rp50000 untuk makan"),
+    ("rp 50k utk makan", "rp 50000 untuk makan"),
+    ("masuk 10m dr bisnis", "pemasukan 10000000 dari bisnis"),
+    ("laporan bln ini", "laporan bulan ini"),
+    ("saldo dong", "saldo dong"),
+])
+def test_forms_the_old_loop_handled_are_unchanged(text, expected):
+    assert legacy_normalize(text) == expected
+    assert informal_normalizer.normalize(text) == expected
+
+@pytest.mark.parametrize("text, legacy, expected, amount", [
+    ("rp50rb parkir", "rp50rb parkir", "rp50000 parkir", "50000"),
+    ("rp.50.000 makan", "rp.50.000 makan", "rp.50000 makan", "50000"),
+    ("rp50.000 bensin", "rp50.000 bensin", "rp50000 bensin", "50000"),
+    ("keluar 50.000,50", "pengeluaran 50.000,50", "pengeluaran 50000.50", "50000.50"),
+    ("1.250.000 sewa", "1.250.000 sewa", "1250000 sewa", "1250000"),
+    ("12,5k roti", "12,5000 roti", "12500 roti", "12500"),
+    ("rp1,5jt servis", "rp1,5jt servis", "rp1500000 servis", "1500000"),
+    ("40 rb laundry", "40 ribu laundry", "40000 laundry", "40000"),
+])
+def test_amount_forms_the_old_loop_mangled_expand_to_plain_numbers(text, legacy, expected, amount):
+    assert legacy_normalize(text) == legacy
+    normalized = informal_normalizer.normalize(text)
+    assert normalized == expected
+    assert Money.parse(message_handler.amount_pattern.search(normalized).group(1)) == Money.parse(amount)
+
+def test_dictionary_file_is_reloaded_when_it_changes(tmp_path):
+    path = tmp_path / "words.json"
+    path.write_text('{"gpp": "tidak apa-apa"}', encoding="utf-8")
+    normalizer = InformalNormalizer(str(path), check_interval=0)
+    assert normalizer.normalize("gpp") == "tidak apa-apa"
+
+    path.write_text('{"gpp": "tidak masalah"}', encoding="utf-8")
+    os.utime(path, (1, 1))
+    assert normalizer.normalize("gpp") == "tidak masalah"
@@ -0,0 +1,100 @@
+"""Insight scheduler: queued budget checks evaluated once per user, off the write path."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from features.financial_processor import financial_processor
+from features.insight_engine import insight_engine
+
+@pytest.fixture
+def budget(db, run, user):
+    now = datetime.now()
+    run(db.create_budget({
+        "user_id": user.id, "category": "Makanan", "amount": 100,
+        "period_start": now - timedelta(days=1), "period_end": now + timedelta(days=1),
+    }))
+
+@pytest.fixture
+def scheduler(run, monkeypatch):
+    # Passes are run by the test, never by the timer
+    monkeypatch.setattr(insight_engine, "interval", 3600)
+    run(insight_engine.start())
+    run(insight_engine.run_pending())
+    yield insight_engine
+    run(insight_engine.stop())
+
+def _expense(run, user, amount):
+    return run(financial_processor.process_transaction(
+        user.id, {"type": "expense", "amount": amount, "category": "Makanan", "date": datetime.now()}
+    ))
+
+def _alerts(db, run, user):
+    return [n for n in run(db.get_notification_rows(user.id)) if n.type == "budget_alert"]
+
+def test_one_expense_is_evaluated_once(db, run, user, budget, scheduler):
+    before = scheduler.metrics()
+    _expense(run, user, 90)
+    # Deferred to the next pass
+    assert _alerts(db, run, user) == []
+
+    assert run(scheduler.run_pending()) == 1
+    # The alert the pass inserted does not make the user dirty again
+    assert run(scheduler.run_pending()) == 0
+
+    after = scheduler.metrics()
+    assert (after["evaluated"] - before["evaluated"], after["alerts"] - before["alerts"]) == (1, 1)
+    assert after["pending_users"] == 0
+    assert len(_alerts(db, run, user)) == 1
+    assert any(i["type"] == "alert" for i in run(scheduler.insights(user.id)))
+
+def test_writes_during_a_batch_still_mark_the_user_dirty(db, run, user, budget, scheduler):
+    _expense(run, user, 90)
+    # Another write's notification arriving while the batch commits
+    scheduler._own_writes.add(user.id)
+    scheduler._on_write(user.id)
+    scheduler._own_writes.discard(user.id)
+    assert run(scheduler.run_pending()) == 1
+
+    run(db.create_transaction(user.id, {"type": "income", "amount": 50, "category": "Gaji"}))
+    assert run(scheduler.run_pending()) == 1
+    assert len(_alerts(db, run, user)) == 1
+
+def test_queued_checks_survive_a_restart(db, run, user, budget, monkeypatch):
+    # Queued by a worker that stopped before its next pass
+    monkeypatch.setattr(financial_processor, "defer_budget_alerts", True)
+    _expense(run, user, 95)
+    assert _alerts(db, run, user) == []
+
+    evaluated = insight_engine.metrics()["evaluated"]
+    run(insight_engine.run_pending())
+    assert insight_engine.metrics()["evaluated"] >= evaluated + 1
+    assert len(_alerts(db, run, user)) == 1
+    assert run(db.get_pending_budget_checks()) == []
+
+def test_expenses_are_checked_inline_without_a_scheduler(db, run, user, budget):
+    _expense(run, user, 50)
+    assert _alerts(db, run, user) == []
+    _expense(run, user, 40)
+    assert len(_alerts(db, run, user)) == 1
+    assert run(db.get_pending_budget_checks()) == []
+
+def test_concurrent_misses_share_one_computation(db, run, user, monkeypatch):
+    calls = []
+
+    async def get_financial_insights(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return [{"type": "tip", "message": "Hemat"}]
+
+    monkeypatch.setattr(financial_processor, "get_financial_insights", get_financial_insights)
+    insight_engine.cache.invalidate(user.id)
+
+    async def scenario():
+        return await asyncio.gather(*(insight_engine.insights(user.id) for _ in range(5)))
+
+    results = run(scenario())
+    assert calls == [user.id]
+    assert all(result == results[0] for result in results)
+    assert run(insight_engine.insights(user.id)) is results[0]
+    assert insight_engine._computing == {}
@@ -0,0 +1,42 @@
+"""Load test baselines: only compared under the parameters they were recorded with."""
+import json
+
+from benchmarks.load_test import baseline_parameters, build_parser, check_baseline, compare
+
+def _result(scenario, queries_per_op, p95_ms):
+    return {"scenario": scenario, "queries_per_op": queries_per_op, "p95_ms": p95_ms}
+
+def _save(tmp_path, args, scenarios):
+    args.baseline = str(tmp_path / "baseline.json")
+    with open(args.baseline, "w") as f:
+        json.dump({"parameters": baseline_parameters(args), "scenarios": scenarios}, f)
+
+def test_compare_flags_query_and_latency_regressions():
+    baseline = {"a": _result("a", 2.0, 20.0), "b": _result("b", 1.0, 20.0)}
+    results = [
+        _result("a", 3.0, 25.0),    # more queries; latency within noise
+        _result("b", 1.0, 100.0),   # slower
+        _result("new", 9.0, 900.0), # not in the baseline
+    ]
+    assert compare(results, baseline, 0.5) == [
+        "a: queries/op 2.00 -> 3.00",
+        "b: p95 20.0ms -> 100.0ms",
+    ]
+
+def test_regression_against_a_matching_baseline_fails(tmp_path, capsys):
+    args = build_parser().parse_args([])
+    _save(tmp_path, args, {"a": _result("a", 1.0, 20.0)})
+
+    assert check_baseline([_result("a", 1.0, 20.0)], args) == 0
+    assert check_baseline([_result("a", 2.0, 20.0)], args) == 1
+    assert "REGRESSION a: queries/op" in capsys.readouterr().out
+
+def test_baseline_with_other_parameters_is_not_compared(tmp_path, capsys):
+    args = build_parser().parse_args([])
+    _save(tmp_path, args, {"a": _result("a", 1.0, 20.0)})
+    args.transactions = 50
+
+    assert check_baseline([_result("a", 5.0, 500.0)], args) == 0
+    out = capsys.readouterr().out
+    assert "Not comparing" in out and "transactions=50 (baseline 2000)" in out
+    assert "REGRESSION" not in out
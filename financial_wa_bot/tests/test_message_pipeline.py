@@ -0,0 +1,78 @@
+"""Per-sender ordered, cross-sender parallel message processing with backpressure."""
+import asyncio
+import random
+
+from core.message_pipeline import MessagePipeline
+
+def test_each_sender_is_processed_in_order_while_senders_overlap():
+    handled = {}
+    active = 0
+    peak = 0
+    rng = random.Random(7)
+
+    async def handler(message):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(rng.random() / 500)
+        handled.setdefault(message["from"], []).append(message["n"])
+        active -= 1
+
+    async def scenario():
+        pipeline = MessagePipeline(handler, workers=4)
+        await pipeline.start()
+        for n in range(20):
+            for sender in ("a", "b", "c", "d", "e"):
+                await pipeline.submit({"from": sender, "n": n})
+        await pipeline.stop()
+        return pipeline.metrics()
+
+    metrics = asyncio.run(scenario())
+
+    assert handled == {sender: list(range(20)) for sender in "abcde"}
+    assert 1 < peak <= 4
+    assert metrics["processed"] == 100 and metrics["in_flight"] == 0
+
+def test_a_failing_message_does_not_block_its_sender():
+    handled = []
+
+    async def handler(message):
+        if message["n"] == 1:
+            raise ValueError("boom")
+        handled.append(message["n"])
+
+    async def scenario():
+        pipeline = MessagePipeline(handler, workers=2)
+        await pipeline.start()
+        for n in range(3):
+            await pipeline.submit({"from": "a", "n": n})
+        await pipeline.stop()
+        return pipeline.metrics()
+
+    metrics = asyncio.run(scenario())
+
+    assert handled == [0, 2]
+    assert metrics["failed"] == 1
+
+def test_full_pipeline_rejects_or_blocks_new_messages():
+    release = asyncio.Event()
+
+    async def handler(message):
+        await release.wait()
+
+    async def scenario():
+        pipeline = MessagePipeline(handler, workers=1, max_pending=2)
+        await pipeline.start()
+        assert pipeline.try_submit({"from": "a"}) and pipeline.try_submit({"from": "b"})
+        assert not pipeline.try_submit({"from": "c"})
+        blocked = asyncio.create_task(pipeline.submit({"from": "c"}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        release.set()
+        await blocked
+        await pipeline.stop()
+        return pipeline.metrics()
+
+    metrics = asyncio.run(scenario())
+
+    assert (metrics["rejected"], metrics["blocked_submits"], metrics["processed"]) == (1, 1, 3)
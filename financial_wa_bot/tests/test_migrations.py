@@ -0,0 +1,89 @@
+"""Migration 5: FLOAT rupiah money columns to BIGINT minor units.
+
+Run from the financial_wa_bot directory with ``python -m pytest tests``.
+"""
+from datetime import datetime
+
+from sqlalchemy import Float, MetaData, create_engine, inspect, text
+
+from database import migrations
+from database.models import Base, Budget, SchemaVersion
+from database.money import MoneyType
+
+def _pre_money_schema(engine) -> None:
+    """Create every table as it was at migration 4, with FLOAT money columns"""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        for column in copy.columns:
+            if isinstance(column.type, MoneyType):
+                column.type = Float()
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        for migration in migrations.MIGRATIONS:
+            if migration.version < 5:
+                conn.execute(SchemaVersion.__table__.insert().values(
+                    version=migration.version, description=migration.description, applied_at=datetime.utcnow()
+                ))
+
+def _seed(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, phone_number) VALUES (1, '6281')"))
+        for i, (kind, amount, category) in enumerate([
+            ("EXPENSE", 0.1, "Makanan"),
+            ("EXPENSE", 0.2, "Makanan"),
+            ("EXPENSE", 1234.565, "Transportasi"),
+            ("INCOME", 5000000.01, "Gaji"),
+        ], start=1):
+            conn.execute(text(
+                "INSERT INTO transactions (id, user_id, type, amount, category, date) "
+                "VALUES (:id, 1, :type, :amount, :category, :date)"
+            ), {"id": i, "type": kind, "amount": amount, "category": category, "date": datetime(2024, 5, i, 12)})
+        conn.execute(text(
+            "INSERT INTO budgets (id, user_id, category, amount, spent_amount, period_start, period_end) "
+            "VALUES (1, 1, 'all', 1500000.5, 1234.865, :start, :end)"
+        ), {"start": datetime(2024, 5, 1), "end": datetime(2024, 5, 31)})
+        conn.execute(text(
+            "INSERT INTO user_balances (user_id, total_income, total_expenses, transaction_count) "
+            "VALUES (1, 5000000.01, 1234.865, 4)"
+        ))
+        conn.execute(text(
+            "INSERT INTO financial_goals (id, user_id, name, target_amount, current_amount) "
+            "VALUES (1, 1, 'Dana Darurat', 50000000, 0.3)"
+        ))
+
+def test_sqlite_money_columns_become_exact_minor_units(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/money.db")
+    _pre_money_schema(engine)
+    _seed(engine)
+
+    assert migrations.upgrade(engine) == [5, 6]
+
+    with engine.connect() as conn:
+        amounts = [row[0] for row in conn.execute(text("SELECT amount FROM transactions ORDER BY id"))]
+        assert amounts == [10, 20, 123457, 500000001]
+        assert all(isinstance(amount, int) for amount in amounts)
+        assert conn.execute(text("SELECT amount, spent_amount FROM budgets")).one() == (150000050, 123487)
+        assert conn.execute(text(
+            "SELECT total_income, total_expenses, transaction_count FROM user_balances"
+        )).one() == (500000001, 123487, 4)
+        assert conn.execute(text("SELECT target_amount, current_amount FROM financial_goals")).one() == (5000000000, 30)
+        # Derived totals are recomputed from the converted transactions
+        rollups = conn.execute(text("SELECT day, total FROM daily_rollups WHERE category = 'Makanan' ORDER BY day")).all()
+        assert [total for _, total in rollups] == [10, 20]
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("transactions")}
+    assert {"ix_transactions_user_date", "ix_transactions_user_type_category_date"} <= indexes
+    types = {column["name"]: column["type"] for column in inspect(engine).get_columns("transactions")}
+    assert "INT" in str(types["amount"]).upper()
+
+def test_mysql_conversion_never_writes_minor_units_into_float_column():
+    column = Budget.__table__.c.amount
+    statements = migrations._mysql_minor_units_statements(Budget.__table__, column)
+
+    assert statements == [
+        "ALTER TABLE budgets ADD COLUMN amount_minor BIGINT",
+        "UPDATE budgets SET amount_minor = ROUND(amount * 100)",
+        "ALTER TABLE budgets DROP COLUMN amount",
+        "ALTER TABLE budgets CHANGE COLUMN amount_minor amount BIGINT NOT NULL",
+    ]
@@ -0,0 +1,62 @@
+"""Money: exact integer minor units, half-up rounding and JSON numbers in rupiah."""
+import json
+import pickle
+from decimal import Decimal
+
+import pytest
+
+from database.money import Money, ZERO, json_default
+
+@pytest.mark.parametrize("value, minor", [
+    (15000, 1500000),
+    ("1000.60", 100060),
+    (0.1, 10),
+    (Decimal("19.99"), 1999),
+    ("0.005", 1),
+    ("-0.005", -1),
+    ("2.675", 268),
+    (2.675, 268),
+    ("1e3", 100000),
+])
+def test_parse_is_exact_and_rounds_half_up(value, minor):
+    assert Money.parse(value).minor == minor
+
+@pytest.mark.parametrize("value", ["", "abc", "1,5", "nan", "inf", float("nan"), True, None, [1]])
+def test_parse_rejects_non_numbers(value):
+    with pytest.raises(ValueError):
+        Money.parse(value)
+
+def test_constructor_takes_integer_minor_units_only():
+    for value in (1.5, "100", Decimal(1), True):
+        with pytest.raises(TypeError):
+            Money(value)
+
+def test_sums_are_exact():
+    assert sum([Money.parse(0.1)] * 10) == 1
+    assert Money.parse("0.1") + Money.parse("0.2") == Money.parse("0.3")
+    assert sum([], ZERO) == 0
+    assert Money.parse(10) * 0.15 == Money.parse("1.5")
+    assert Money.parse(40) / Money.parse(160) == 0.25
+
+def test_compares_with_rupiah_numbers():
+    amount = Money.parse("12.50")
+    assert amount == Decimal("12.5") and amount == 12.5 and amount != 12
+    assert amount > 12 and -amount < 0
+    assert hash(Money.parse(3)) == hash(3)
+
+def test_json_numbers_in_rupiah():
+    assert Money.parse(15000).to_json() == 15000
+    assert isinstance(Money.parse(15000).to_json(), int)
+    assert Money.parse("1000.60").to_json() == 1000.6
+    # Whole amounts beyond float precision stay exact
+    assert Money.parse(10 ** 17 + 1).to_json() == 10 ** 17 + 1
+    assert json.dumps({"a": Money.parse("0.5")}, default=json_default) == '{"a": 0.5}'
+    with pytest.raises(TypeError):
+        json_default(object())
+
+def test_immutable_and_picklable():
+    amount = Money.parse("7.25")
+    with pytest.raises(AttributeError):
+        amount.minor = 1
+    assert pickle.loads(pickle.dumps(amount)) == amount
+    assert (str(amount), repr(amount), f"{amount:,.0f}") == ("7.25", "Money('7.25')", "7")
@@ -0,0 +1,47 @@
+"""WebSocket pub/sub brokers: updates published by one worker reach every worker's sockets."""
+import asyncio
+
+import pytest
+
+from web.pubsub import InMemoryBroker, UnixSocketBroker, create_broker
+
+def test_in_memory_broker_delivers_to_its_own_worker():
+    received = []
+
+    async def scenario():
+        broker = InMemoryBroker()
+        await broker.start(lambda user_id, text: received.append((user_id, text)))
+        await broker.publish(7, "hello")
+        await broker.stop()
+        await broker.publish(7, "after stop")
+
+    asyncio.run(scenario())
+    assert received == [(7, "hello")]
+
+def test_unix_brokers_deliver_across_workers_and_drop_dead_peers(tmp_path):
+    directory = str(tmp_path / "broker")
+
+    async def scenario():
+        first, second = UnixSocketBroker(directory), UnixSocketBroker(directory)
+        # Both live in this process; give them distinct sockets as separate workers would have
+        second.path = second.path.replace(".sock", "-2.sock")
+        received = {"first": [], "second": []}
+        await first.start(lambda user_id, text: received["first"].append((user_id, text)))
+        await second.start(lambda user_id, text: received["second"].append((user_id, text)))
+        # A socket left behind by a worker that died
+        (tmp_path / "broker" / "999999.sock").touch()
+
+        await first.publish(3, '{"type": "balance"}')
+        await asyncio.sleep(0.05)
+        await first.stop()
+        await second.stop()
+        return received
+
+    received = asyncio.run(scenario())
+
+    assert received == {"first": [(3, '{"type": "balance"}')], "second": [(3, '{"type": "balance"}')]}
+    assert list((tmp_path / "broker").iterdir()) == []
+
+def test_unknown_broker_names_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="memory, unix"):
+        create_broker("redis", str(tmp_path))
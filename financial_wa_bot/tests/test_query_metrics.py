@@ -0,0 +1,36 @@
+"""Per-route query metrics: statements are attributed to the route, including while a response streams."""
+import re
+from datetime import datetime, timedelta
+
+EXPORT = "GET /api/v1/transactions/{user_id}/export"
+
+def _queries(request_api, kind, name):
+    status, body = request_api("GET", "/metrics")
+    assert status == 200
+    match = re.search(
+        rf'^db_queries_total{{kind="{kind}",name="{re.escape(name)}"}} (\d+)$', body.decode(), re.MULTILINE
+    )
+    return int(match.group(1)) if match else 0
+
+def test_streamed_export_queries_count_for_the_route(db, run, request_api, user):
+    start = datetime(2026, 5, 1)
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "expense", "amount": i + 1, "category": "Makanan", "date": start + timedelta(minutes=i)}
+        for i in range(1200)
+    ]))
+    route_before = _queries(request_api, "route", EXPORT)
+    unscoped_before = _queries(request_api, "none", "-")
+
+    status, body = request_api("GET", f"/api/v1/transactions/{user.id}/export")
+    assert status == 200
+    assert body.count(b"\n") == 1200
+
+    # Three 500-row batches, all read while the body streams
+    assert _queries(request_api, "route", EXPORT) - route_before == 3
+    assert _queries(request_api, "none", "-") == unscoped_before
+
+def test_requests_are_labelled_by_route_template(request_api, user):
+    request_api("GET", f"/api/v1/balance/{user.id}")
+    status, body = request_api("GET", "/metrics")
+    assert 'db_scope_total{kind="route",name="GET /api/v1/balance/{user_id}"}' in body.decode()
+    assert f"/api/v1/balance/{user.id}\"" not in body.decode()
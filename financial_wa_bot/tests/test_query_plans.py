@@ -0,0 +1,24 @@
+"""Composite indexes: every hot query is planned on one of its expected indexes."""
+from sqlalchemy import create_engine, inspect
+
+from database import migrations
+from database.models import Base
+from database.query_plans import HOT_QUERIES, check_query_plans
+
+def test_hot_queries_use_their_indexes(db):
+    results = check_query_plans(db.engine)
+    assert {result["query"] for result in results} == set(HOT_QUERIES)
+    assert [result["query"] for result in results if not result["ok"]] == []
+
+def test_upgrade_adds_indexes_to_databases_that_predate_them(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(bind=conn)
+
+    assert migrations.upgrade(engine) == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.upgrade(engine) == []
+    assert "ix_transactions_user_date" in {i["name"] for i in inspect(engine).get_indexes("transactions")}
+    assert check_query_plans(engine) and all(result["ok"] for result in check_query_plans(engine))
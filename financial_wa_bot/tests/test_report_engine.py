@@ -0,0 +1,50 @@
+"""Period reports aggregated by the database over every transaction in the window."""
+from datetime import datetime
+
+import pytest
+
+from database.money import Money
+from features.columnar_analytics import columnar_analytics
+from features.report_engine import report_engine
+
+@pytest.fixture
+def sql_engine(monkeypatch):
+    monkeypatch.setattr(columnar_analytics, "enabled", False)
+
+def test_report_covers_every_transaction_in_the_period(db, run, user, sql_engine):
+    rows = [
+        {"type": "expense", "amount": 1000 + i, "category": "Makanan" if i % 2 else "Belanja",
+         "date": datetime(2026, 4, 1 + i % 20, 12)}
+        for i in range(40)
+    ]
+    rows += [
+        {"type": "income", "amount": "2500000.50", "category": "Gaji", "date": datetime(2026, 4, 25, 9)},
+        # Outside the period
+        {"type": "expense", "amount": 999, "category": "Makanan", "date": datetime(2026, 3, 31, 23, 59)},
+        {"type": "expense", "amount": 999, "category": "Makanan", "date": datetime(2026, 5, 1)},
+    ]
+    run(db.bulk_create_transactions(user.id, rows))
+
+    report = run(report_engine.build_report(user.id, "monthly", datetime(2026, 4, 1), datetime(2026, 4, 30, 23, 59)))
+
+    assert report["total_expenses"] == Money.parse(sum(1000 + i for i in range(40)))
+    assert report["total_income"] == Money.parse("2500000.50")
+    assert report["categories"]["expense"] == {
+        "Makanan": Money.parse(sum(1000 + i for i in range(40) if i % 2)),
+        "Belanja": Money.parse(sum(1000 + i for i in range(40) if not i % 2)),
+    }
+    days = {entry["date"]: entry for entry in report["daily_summary"]}
+    assert len(days) == 21
+    assert days["2026-04-01"]["expense"] == Money.parse(1000 + 1020)
+    assert days["2026-04-25"]["income"] == Money.parse("2500000.50")
+
+def test_daily_trend_fills_days_without_transactions(db, run, user, sql_engine):
+    now = datetime.now()
+    run(db.create_transaction(user.id, {"type": "expense", "amount": 75, "category": "Makanan", "date": now}))
+
+    trend = run(report_engine.daily_trend(user.id, days=7))
+
+    assert len(trend["trend_dates"]) == 7
+    assert trend["trend_dates"][-1] == now.strftime("%Y-%m-%d")
+    assert trend["expense_trend"] == [0] * 6 + [Money.parse(75)]
+    assert trend["income_trend"] == [0] * 7
@@ -0,0 +1,55 @@
+"""Row projections: the same rows and values as their ORM counterparts, field for field."""
+from datetime import datetime, timedelta
+
+from database.rows import (
+    BUDGET_COLUMNS, NOTIFICATION_COLUMNS, TRANSACTION_COLUMNS, BudgetRow, NotificationRow, TransactionRow,
+)
+
+def _as_orm_fields(instances, row_type):
+    return [tuple(getattr(instance, field) for field in row_type._fields) for instance in instances]
+
+def test_columns_match_row_fields():
+    for row_type, columns in (
+        (TransactionRow, TRANSACTION_COLUMNS), (BudgetRow, BUDGET_COLUMNS), (NotificationRow, NOTIFICATION_COLUMNS)
+    ):
+        assert row_type._fields == tuple(column.key for column in columns)
+
+def test_transaction_rows_match_orm(db, run, user):
+    start = datetime(2026, 6, 1)
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "income", "amount": "1500.75", "category": "Gaji", "description": "gaji juni", "date": start},
+        {"type": "expense", "amount": 20, "category": "Makanan", "date": start + timedelta(hours=1)},
+        {"type": "expense", "amount": 20, "category": "Makanan", "date": start + timedelta(hours=1)},
+    ]))
+
+    rows = run(db.get_transaction_rows(user.id, limit=10))
+    assert len(rows) == 3 and all(isinstance(row, TransactionRow) for row in rows)
+    assert [tuple(row) for row in rows] == _as_orm_fields(run(db.get_user_transactions(user.id, limit=10)), TransactionRow)
+
+    # Keyset pages agree too
+    before = (rows[0].date, rows[0].id)
+    assert [tuple(row) for row in run(db.get_transaction_rows(user.id, limit=10, before=before))] == _as_orm_fields(
+        run(db.get_user_transactions(user.id, limit=10, before=before)), TransactionRow
+    )
+
+def test_budget_and_notification_rows_match_orm(db, run, user):
+    now = datetime.now()
+    run(db.create_transaction(user.id, {"type": "expense", "amount": 75, "category": "Makanan"}))
+    for category in ("all", "Makanan"):
+        run(db.create_budget({
+            "user_id": user.id, "category": category, "amount": 500,
+            "period_start": now - timedelta(days=3), "period_end": now + timedelta(days=3),
+        }))
+    run(db.create_notification({"user_id": user.id, "type": "budget_alert", "message": "Awas"}))
+    run(db.create_notification({"user_id": user.id, "type": "insight", "message": "Hemat"}))
+
+    budgets = run(db.get_active_budget_rows(user.id))
+    assert len(budgets) == 2 and budgets[0].spent_amount == 75
+    assert [tuple(row) for row in budgets] == _as_orm_fields(run(db.get_active_budgets(user.id)), BudgetRow)
+
+    for unread_only in (False, True):
+        notifications = run(db.get_notification_rows(user.id, unread_only))
+        assert len(notifications) == 2
+        assert [tuple(row) for row in notifications] == _as_orm_fields(
+            run(db.get_user_notifications(user.id, unread_only)), NotificationRow
+        )
@@ -0,0 +1,71 @@
+"""JSON encoding: the orjson and stdlib backends produce identical bytes; cached encodings are reused."""
+import importlib.util
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+import config.settings
+from database.models import TransactionType
+from database.money import Money
+from database.rows import TransactionRow
+from web import serialization
+
+PAYLOAD = {
+    "amount": Money.parse("1000.60"),
+    "whole": Money.parse(15000),
+    "huge": Money.parse(10 ** 17 + 1),
+    "date": datetime(2026, 3, 4, 5, 6, 7, 891011),
+    "aware": datetime(2026, 3, 4, 5, 6, 7, tzinfo=timezone.utc),
+    "day": date(2026, 3, 4),
+    "type": TransactionType.EXPENSE,
+    "ratio": Decimal("0.25"),
+    "text": "Kopi ☕ \"susu\"\n",
+    "rows": [TransactionRow(1, TransactionType.INCOME, Money.parse("0.1"), "Gaji", None, datetime(2026, 1, 1))],
+    "nested": {"list": [1, 2.5, True, None], "tuple": (1, 2)},
+}
+
+def _load_backend(monkeypatch, name):
+    """A separate copy of web.serialization configured for one backend"""
+    monkeypatch.setattr(config.settings, "JSON_BACKEND", name)
+    spec = importlib.util.spec_from_file_location(f"_serialization_{name}", serialization.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.BACKEND == name
+    return module
+
+def test_backends_encode_identically(monkeypatch):
+    pytest.importorskip("orjson")
+    fast, stdlib = _load_backend(monkeypatch, "orjson"), _load_backend(monkeypatch, "stdlib")
+
+    encoded = fast.dumps(PAYLOAD)
+    assert encoded == stdlib.dumps(PAYLOAD)
+    assert fast.dumps_object({"a": fast.Encoded(b"[1]"), "b": PAYLOAD}) == stdlib.dumps_object(
+        {"a": stdlib.Encoded(b"[1]"), "b": PAYLOAD}
+    )
+
+    decoded = stdlib.loads(encoded)
+    assert decoded["amount"] == 1000.6 and decoded["whole"] == 15000 and decoded["huge"] == 10 ** 17 + 1
+    assert decoded["date"] == "2026-03-04T05:06:07.891011"
+    assert decoded["aware"] == "2026-03-04T05:06:07+00:00"
+    assert (decoded["day"], decoded["type"], decoded["ratio"]) == ("2026-03-04", "expense", 0.25)
+    assert decoded["rows"] == [[1, "income", 0.1, "Gaji", None, "2026-01-01T00:00:00"]]
+
+def test_unknown_types_and_backends_are_rejected(monkeypatch):
+    with pytest.raises(TypeError):
+        serialization.dumps({"x": object()})
+    with pytest.raises(ValueError):
+        _load_backend(monkeypatch, "ujson")
+
+def test_encode_cached_reuses_bytes_per_object():
+    payload = {"balance": Money.parse(5)}
+    misses = serialization.cache_metrics()["misses"]
+
+    first = serialization.encode_cached(payload)
+    assert serialization.encode_cached(payload) is first
+    assert serialization.cache_metrics()["misses"] == misses + 1
+
+    # An equal but rebuilt payload is encoded afresh
+    rebuilt = serialization.encode_cached({"balance": Money.parse(5)})
+    assert rebuilt == first and rebuilt is not first
+    assert serialization.dumps_object({"balance": first}) == b'{"balance":{"balance":5}}'
@@ -0,0 +1,41 @@
+"""Units of work return their connections; sessions held too long are reported once."""
+import asyncio
+import logging
+
+import pytest
+
+from database.session_tracking import SessionTracker
+from features.financial_processor import financial_processor
+
+def test_processor_calls_return_every_session(db, run, user):
+    before = db.pool_metrics()
+    run(financial_processor.process_transaction(user.id, {"type": "expense", "amount": 10, "category": "Makanan"}))
+    run(financial_processor.get_balance(user.id))
+    run(financial_processor.get_financial_insights(user.id))
+    with pytest.raises(Exception):
+        run(financial_processor.process_transaction(user.id, {"type": "bogus", "amount": 10, "category": "Makanan"}))
+
+    after = db.pool_metrics()
+    assert after["sessions_open"] == 0
+    assert after["sessions_opened"] - before["sessions_opened"] >= 4
+    assert after["sessions_closed"] - before["sessions_closed"] == after["sessions_opened"] - before["sessions_opened"]
+    assert after["pool"]["checked_out"] == 0
+
+def test_leak_detector_reports_each_held_session_once(caplog):
+    tracker = SessionTracker(leak_threshold=0.01)
+
+    async def hold():
+        token = tracker.opened("held")
+        await asyncio.sleep(0.02)
+        with caplog.at_level(logging.WARNING):
+            first = tracker.check_leaks()
+            second = tracker.check_leaks()
+        tracker.closed(token)
+        return first, second
+
+    first, second = asyncio.run(hold())
+
+    assert [leak["label"] for leak in first] == ["held"] == [leak["label"] for leak in second]
+    assert tracker.leaks_detected == 1
+    assert tracker.snapshot()["sessions_open"] == 0
+    assert sum("Possible session leak" in record.message for record in caplog.records) == 1
@@ -0,0 +1,44 @@
+"""Composite /stats endpoint: report plus budget and balance from the dashboard snapshot."""
+import json
+from datetime import datetime, timedelta
+
+from features.dashboard_snapshot import dashboard_snapshots
+
+def _get(request_api, url):
+    status, body = request_api("GET", url)
+    assert status == 200, body
+    return json.loads(body)
+
+def test_stats_match_the_individual_endpoints(db, run, request_api, user):
+    now = datetime.now()
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "income", "amount": 5000, "category": "Gaji", "date": now - timedelta(days=1)},
+        {"type": "expense", "amount": "120.50", "category": "Makanan", "date": now - timedelta(days=1)},
+    ]))
+    run(db.create_budget({
+        "user_id": user.id, "category": "Makanan", "amount": 1000,
+        "period_start": now - timedelta(days=5), "period_end": now + timedelta(days=25),
+    }))
+
+    stats = _get(request_api, f"/api/v1/stats/{user.id}")
+
+    assert set(stats) == {"report", "budget", "balance"}
+    assert stats["report"] == _get(request_api, f"/api/v1/report/{user.id}")
+    assert stats["budget"] == _get(request_api, f"/api/v1/budget/{user.id}")
+    assert stats["balance"] == _get(request_api, f"/api/v1/balance/{user.id}")
+
+def test_stats_reuse_a_warm_snapshot(db, run, request_api, user):
+    run(db.create_transaction(user.id, {"type": "income", "amount": 700, "category": "Gaji"}))
+    first = _get(request_api, f"/api/v1/stats/{user.id}")
+    hits = dashboard_snapshots.metrics()["hits"]
+
+    assert _get(request_api, f"/api/v1/stats/{user.id}") == first
+    assert dashboard_snapshots.metrics()["hits"] == hits + 1
+
+    # A write drops the snapshot, so the next response reflects it
+    run(db.create_transaction(user.id, {"type": "expense", "amount": 200, "category": "Makanan"}))
+    assert _get(request_api, f"/api/v1/stats/{user.id}")["balance"] != first["balance"]
+
+def test_stats_of_unknown_user_is_404(request_api):
+    status, _ = request_api("GET", "/api/v1/stats/987652")
+    assert status == 404
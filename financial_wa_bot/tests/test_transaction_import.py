@@ -0,0 +1,74 @@
+"""Bulk transaction imports: row validation, file parsers and the bulk API route."""
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from database.money import Money
+from features.transaction_import import DEFAULT_CATEGORY, TransactionImportError, parse_csv, transaction_row
+
+@pytest.mark.parametrize("data, message", [
+    ([1], "expected an object"),
+    ({"type": "expense"}, "missing field 'amount'"),
+    ({"type": "gift", "amount": 1}, "gift"),
+    ({"type": "expense", "amount": -5}, "positive"),
+    ({"type": "expense", "amount": 1e20}, "at most"),
+    ({"type": "expense", "amount": 1, "date": 123}, "invalid date"),
+    ({"type": "expense", "amount": 1, "date": "yesterday"}, "invalid date"),
+    ({"type": "expense", "amount": 1, "category": 7}, "category must be a string"),
+])
+def test_invalid_rows_are_import_errors(data, message):
+    with pytest.raises(TransactionImportError, match=message) as error:
+        transaction_row(data, 3)
+    assert error.value.row == 3
+
+def test_aware_dates_become_naive_utc():
+    row = transaction_row({"type": "income", "amount": "10.5", "date": "2026-10-01T10:00:00+07:00"})
+    assert row["date"] == datetime(2026, 10, 1, 3, 0)
+    assert row["amount"] == Money.parse("10.5")
+
+@pytest.mark.parametrize("category, expected", [(None, DEFAULT_CATEGORY), ("   ", DEFAULT_CATEGORY), (" Makanan ", "Makanan")])
+def test_blank_categories_fall_back_to_the_default(category, expected):
+    assert transaction_row({"type": "expense", "amount": 1, "category": category})["category"] == expected
+
+def test_csv_without_a_type_column_uses_the_amount_sign():
+    rows = list(parse_csv(io.StringIO(
+        "date,amount,category,description\n"
+        "2026-01-02,-15000,Makanan,nasi\n"
+        "2026-01-03,2500000.50,Gaji,\n"
+    )))
+    assert [(row["type"].value, row["amount"]) for row in rows] == [
+        ("expense", Money.parse(15000)), ("income", Money.parse("2500000.50")),
+    ]
+
+def test_bulk_route_imports_mixed_naive_and_aware_dates(db, run, user, request_api):
+    body = json.dumps([
+        {"type": "expense", "amount": 10, "date": "2026-10-01T10:00:00+07:00"},
+        {"type": "expense", "amount": 20, "date": "2026-10-01T12:00:00"},
+    ]).encode()
+    status, response = request_api("POST", f"/api/v1/transactions/{user.id}/bulk", body)
+
+    assert (status, json.loads(response)) == (200, {"imported": 2})
+    assert sorted(row.date for row in run(db.get_transaction_rows(user.id))) == [
+        datetime(2026, 10, 1, 3), datetime(2026, 10, 1, 12),
+    ]
+
+@pytest.mark.parametrize("rows", [
+    [{"type": "expense", "amount": 1e20}],
+    [[1]],
+    [{"type": "expense", "amount": 1, "date": 123}],
+])
+def test_bulk_route_rejects_bad_rows_without_echoing_internals(run, db, user, request_api, rows):
+    status, response = request_api("POST", f"/api/v1/transactions/{user.id}/bulk", json.dumps(rows).encode())
+
+    assert status == 400
+    assert json.loads(response)["detail"].startswith("row 1:")
+    assert run(db.get_transaction_count(user.id)) == 0
+
+def test_bulk_route_returns_404_for_unknown_users(run, db, request_api):
+    body = json.dumps([{"type": "income", "amount": 1}]).encode()
+    status, _ = request_api("POST", "/api/v1/transactions/987650/bulk", body)
+
+    assert status == 404
+    assert run(db.get_transaction_count(987650)) == 0
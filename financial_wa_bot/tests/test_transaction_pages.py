@@ -0,0 +1,45 @@
+"""Keyset-paginated transaction history and the streaming export."""
+import json
+from datetime import datetime, timedelta
+
+def test_cursor_pages_visit_every_row_once_newest_first(db, run, user, request_api):
+    base = datetime(2026, 6, 1, 12)
+    # Several rows share a timestamp, so the id breaks ties
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "expense", "amount": i + 1, "category": "Makanan", "date": base + timedelta(hours=i // 3)}
+        for i in range(23)
+    ]))
+
+    seen, cursor = [], None
+    while True:
+        url = f"/api/v1/transactions/{user.id}?limit=5" + (f"&cursor={cursor}" if cursor else "")
+        status, body = request_api("GET", url)
+        assert status == 200
+        page = json.loads(body)
+        assert page["total"] == 23
+        seen += [(t["date"], t["id"]) for t in page["transactions"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 23
+    assert seen == sorted(seen, reverse=True)
+
+def test_invalid_cursor_is_a_client_error(user, request_api):
+    status, _ = request_api("GET", f"/api/v1/transactions/{user.id}?cursor=not-a-cursor")
+    assert status == 400
+
+def test_export_streams_the_full_history(db, run, user, request_api):
+    run(db.bulk_create_transactions(user.id, [
+        {"type": "income", "amount": i + 1, "category": "Gaji", "date": datetime(2026, 6, 1) + timedelta(days=i)}
+        for i in range(1203)
+    ]))
+
+    status, body = request_api("GET", f"/api/v1/transactions/{user.id}/export")
+    assert status == 200
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert [line["amount"] for line in lines] == list(range(1203, 0, -1))
+
+    status, body = request_api("GET", f"/api/v1/transactions/{user.id}/export?format=json")
+    assert status == 200
+    assert [row["amount"] for row in json.loads(body)] == list(range(1203, 0, -1))
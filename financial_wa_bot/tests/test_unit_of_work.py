@@ -0,0 +1,55 @@
+"""Async DatabaseManager: units of work commit together, roll back together and notify after commit."""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+def test_unit_of_work_commits_every_write_together(db, run, user):
+    async def scenario():
+        async with db.unit_of_work("test") as session:
+            await db.create_transaction(
+                user.id, {"type": "income", "amount": 100, "category": "Gaji", "date": datetime(2026, 1, 5)},
+                session=session,
+            )
+            await db.create_transaction(
+                user.id, {"type": "expense", "amount": 40, "category": "Makanan", "date": datetime(2026, 1, 6)},
+                session=session,
+            )
+        return await db.get_transaction_rows(user.id)
+
+    assert [row.amount for row in run(scenario())] == [40, 100]
+
+def test_unit_of_work_rolls_back_and_skips_listeners_on_error(db, run, user):
+    written = []
+    db.add_write_listener(written.append)
+
+    async def scenario():
+        async with db.unit_of_work("test") as session:
+            await db.create_transaction(
+                user.id, {"type": "expense", "amount": 10, "category": "Makanan", "date": datetime(2026, 1, 5)},
+                session=session,
+            )
+            raise RuntimeError("abort")
+
+    try:
+        with pytest.raises(RuntimeError):
+            run(scenario())
+        assert run(db.get_transaction_rows(user.id)) == []
+        assert user.id not in written
+    finally:
+        db._write_listeners.remove(written.append)
+
+def test_concurrent_units_of_work_share_the_pool(db, run, user):
+    async def scenario():
+        await asyncio.gather(*(
+            db.create_transaction(
+                user.id, {"type": "income", "amount": i + 1, "category": "Gaji", "date": datetime(2026, 2, 1)}
+            )
+            for i in range(20)
+        ))
+        return await db.get_user_balance(user.id)
+
+    balance = run(scenario())
+    assert balance.total_income == sum(range(1, 21))
+    assert balance.transaction_count == 20
+    assert db.session_tracker.snapshot()["sessions_open"] == 0
@@ -0,0 +1,42 @@
+"""Phone number -> User resolution served from a bounded LRU/TTL cache."""
+import asyncio
+import time
+
+from database.user_cache import LRUCache
+
+def test_lru_evicts_least_recently_used_and_expires_by_age(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LRUCache(max_size=2, ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    now[0] += 10
+    assert cache.get("a") is None
+    assert cache.metrics()["evictions"] == 1 and cache.metrics()["expirations"] == 1
+
+def test_repeat_lookups_hit_the_cache_and_resolve_one_user(db, run):
+    phone = "6289900000001"
+
+    async def scenario():
+        first = await asyncio.gather(*(db.get_or_create_user(phone) for _ in range(5)))
+        hits = db.user_cache.hits
+        again = await db.get_or_create_user(phone)
+        return first, again, db.user_cache.hits - hits
+
+    first, again, new_hits = run(scenario())
+
+    assert len({user.id for user in first}) == 1
+    assert again.id == first[0].id and new_hits == 1
+
+def test_invalidated_user_is_read_back_from_the_database(db, run):
+    user = run(db.get_or_create_user("6289900000002"))
+    db.invalidate_user("6289900000002")
+    misses = db.user_cache.misses
+
+    assert run(db.get_or_create_user("6289900000002")).id == user.id
+    assert db.user_cache.misses == misses + 1
@@ -0,0 +1,96 @@
+"""WebSocket fan-out: bounded per-socket queues, slow consumer policies and debounced updates."""
+import asyncio
+import gc
+import json
+
+from web.pubsub import InMemoryBroker
+from web.websocket import WebSocketManager
+
+class FakeWebSocket:
+    """Records sent frames; sends block while ``open`` is cleared, like a client that stopped reading"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+        self.open = asyncio.Event()
+        self.open.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.open.wait()
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+def _manager(policy, queue_size=2, debounce=0.01):
+    return WebSocketManager(queue_size=queue_size, slow_consumer_policy=policy, debounce=debounce,
+                            broker=InMemoryBroker())
+
+def test_slow_socket_drops_messages_without_stalling_fast_ones():
+    async def scenario():
+        manager = _manager("drop")
+        await manager.start()
+        fast, slow = FakeWebSocket(), FakeWebSocket()
+        slow.open.clear()
+        await manager.connect(fast, 1)
+        await manager.connect(slow, 1)
+        for n in range(10):
+            await manager.broadcast_to_user(1, {"n": n})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        slow.open.set()
+        await asyncio.sleep(0.01)
+        await manager.stop()
+        return manager, fast, slow
+
+    manager, fast, slow = asyncio.run(scenario())
+
+    assert [json.loads(text)["n"] for text in fast.sent] == list(range(10))
+    # One frame was already being sent when the queue filled up
+    assert len(slow.sent) == 3
+    assert manager.metrics()["messages_dropped"] == 7
+
+def test_personal_messages_follow_the_slow_consumer_policy():
+    async def scenario():
+        manager = _manager("disconnect")
+        await manager.start()
+        slow = FakeWebSocket()
+        slow.open.clear()
+        await manager.connect(slow, 1)
+        # Never blocks, even though nothing is being read
+        for n in range(5):
+            await asyncio.wait_for(manager.send_personal_message({"n": n}, slow), 0.1)
+            await asyncio.sleep(0)
+        await manager.stop()
+        return manager, slow
+
+    manager, slow = asyncio.run(scenario())
+
+    assert manager.metrics()["slow_disconnects"] == 1
+    assert manager.metrics()["connections"] == 0
+    assert slow.closed_with == 1013
+
+def test_balance_updates_are_coalesced_and_flushed_while_unreferenced():
+    async def scenario():
+        manager = _manager("drop", queue_size=8)
+        await manager.start()
+        socket = FakeWebSocket()
+        await manager.connect(socket, 1)
+        for n in range(5):
+            await manager.notify_balance_update(1, {"balance": n})
+        await manager.notify_budget_update(1, {"budget": 1})
+        await asyncio.sleep(0.02)
+        gc.collect()
+        await asyncio.sleep(0.01)
+        await manager.stop()
+        return manager, socket
+
+    manager, socket = asyncio.run(scenario())
+
+    messages = sorted((json.loads(text) for text in socket.sent), key=lambda m: m["type"])
+    assert messages == [{"type": "balance", "data": {"balance": 4}}, {"type": "budget", "data": {"budget": 1}}]
+    assert manager.metrics()["updates_coalesced"] == 4
+    assert manager._tasks == set()
@@ -1,55 +1,159 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from datetime import datetime
+import base64
+import logging
 
 from database.db_manager import db_manager
 from features.financial_processor import financial_processor
+from features.insight_engine import insight_engine
+from features.stats_engine import stats_engine
+from features.transaction_import import transaction_row
+from ..serialization import FastJSONResponse, dumps, dumps_object, encode_cached, loads
 
-router = APIRouter(prefix="/api/v1")
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1", default_response_class=FastJSONResponse)
+
+def _transaction_dict(t: Any) -> Dict[str, Any]:
+    # Enum, datetime and Money values are encoded by web/serialization.py
+    return {
+        "id": t.id,
+        "type": t.type,
+        "amount": t.amount,
+        "category": t.category,
+        "description": t.description,
+        "date": t.date
+    }
+
+def _encode_cursor(date: datetime, transaction_id: int) -> str:
+    """Opaque keyset cursor for the (date, id) of the last row on a page"""
+    raw = f"{date.isoformat()}|{transaction_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, transaction_id = raw.split("|")
+        return datetime.fromisoformat(date), int(transaction_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/transactions/{user_id}")
 async def get_transactions(
     user_id: int,
     limit: Optional[int] = 10,
-    offset: Optional[int] = 0
+    offset: Optional[int] = 0,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
-    """Get user transactions with pagination"""
+    """Get user transactions with keyset (cursor) pagination.
+
+    Pass the returned ``next_cursor`` to fetch the following page; ``offset``
+    is still honoured when no cursor is given.
+    """
+    before = _decode_cursor(cursor) if cursor else None
     try:
-        transactions = await db_manager.get_user_transactions(user_id, limit)
+        transactions = await db_manager.get_transaction_rows(
+            user_id, limit, before=before, offset=0 if before else offset
+        )
         total = await db_manager.get_transaction_count(user_id)
-        
-        return {
+
+        next_cursor = None
+        if transactions and len(transactions) == limit:
+            next_cursor = _encode_cursor(transactions[-1].date, transactions[-1].id)
+
+        return FastJSONResponse({
             "total": total,
-            "transactions": [
-                {
-                    "id": t.id,
-                    "type": t.type.value,
-                    "amount": t.amount,
-                    "category": t.category,
-                    "description": t.description,
-                    "date": t.date.isoformat()
-                }
-                for t in transactions
-            ]
-        }
+            "next_cursor": next_cursor,
+            "transactions": [_transaction_dict(t) for t in transactions]
+        })
+    except Exception as e:
+        logger.error(f"Error getting transactions: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/transactions/{user_id}/export")
+async def export_transactions(user_id: int, format: str = "ndjson") -> StreamingResponse:
+    """Stream a user's full transaction history as NDJSON or a JSON array"""
+    if format not in ("ndjson", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'json'")
+
+    async def ndjson_lines() -> AsyncIterator[bytes]:
+        async for batch in db_manager.iter_user_transactions(user_id):
+            yield b"".join(dumps(_transaction_dict(t)) + b"\n" for t in batch)
+
+    async def json_array() -> AsyncIterator[bytes]:
+        yield b"["
+        first = True
+        async for batch in db_manager.iter_user_transactions(user_id):
+            chunk = b",".join(dumps(_transaction_dict(t)) for t in batch)
+            yield chunk if first else b"," + chunk
+            first = False
+        yield b"]"
+
+    if format == "ndjson":
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+    return StreamingResponse(json_array(), media_type="application/json")
+
+@router.post("/transactions/{user_id}/bulk")
+async def bulk_create_transactions(user_id: int, request: Request) -> Dict[str, Any]:
+    """Import many transactions at once.
+
+    Accepts a JSON array, or NDJSON (``application/x-ndjson``) which is
+    consumed as it streams in. Rows are inserted in committed chunks; on an
+    invalid row the chunks before it stay imported.
+    """
+    async def ndjson_rows() -> AsyncIterator[Dict[str, Any]]:
+        buffer = b""
+        row = 0
+        async for body in request.stream():
+            buffer += body
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    row += 1
+                    yield transaction_row(loads(line), row)
+        if buffer.strip():
+            yield transaction_row(loads(buffer), row + 1)
+
+    try:
+        if await db_manager.get_user_by_id(user_id) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            rows = ndjson_rows()
+        else:
+            body = loads(await request.body())
+            if not isinstance(body, list):
+                raise HTTPException(status_code=400, detail="Expected a JSON array of transactions")
+            rows = (transaction_row(data, row) for row, data in enumerate(body, start=1))
+        imported = await db_manager.bulk_create_transactions(user_id, rows)
+        return {"imported": imported}
+    except ValueError as e:
+        # TransactionImportError and malformed JSON
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error bulk importing transactions: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/balance/{user_id}")
 async def get_balance(user_id: int) -> Dict[str, float]:
     """Get user's current balance"""
     try:
-        return await financial_processor.get_balance(user_id)
+        return FastJSONResponse(await financial_processor.get_balance(user_id))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error getting balance: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/budget/{user_id}")
 async def get_budget_status(user_id: int) -> Dict[str, Any]:
     """Get user's budget status"""
     try:
-        return await financial_processor.check_budget_status(user_id)
+        return FastJSONResponse(await financial_processor.check_budget_status(user_id))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error getting budget status: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/report/{user_id}")
 async def get_financial_report(
@@ -58,17 +162,19 @@ async def get_financial_report(
 ) -> Dict[str, Any]:
     """Get financial report for specified period"""
     try:
-        return await financial_processor.generate_report(user_id, period)
+        return FastJSONResponse(await financial_processor.generate_report(user_id, period))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error generating report: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/insights/{user_id}")
 async def get_financial_insights(user_id: int) -> List[Dict[str, Any]]:
     """Get financial insights and recommendations"""
     try:
-        return await financial_processor.get_financial_insights(user_id)
+        return FastJSONResponse(await insight_engine.insights(user_id))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error getting insights: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/notifications/{user_id}")
 async def get_notifications(
@@ -77,19 +183,20 @@ async def get_notifications(
 ) -> List[Dict[str, Any]]:
     """Get user notifications"""
     try:
-        notifications = await db_manager.get_user_notifications(user_id, unread_only)
-        return [
+        notifications = await db_manager.get_notification_rows(user_id, unread_only)
+        return FastJSONResponse([
             {
                 "id": n.id,
                 "type": n.type,
                 "message": n.message,
                 "is_read": bool(n.is_read),
-                "created_at": n.created_at.isoformat()
+                "created_at": n.created_at
             }
             for n in notifications
-        ]
+        ])
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error getting notifications: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: int) -> Dict[str, str]:
@@ -98,7 +205,8 @@ async def mark_notification_read(notification_id: int) -> Dict[str, str]:
         await db_manager.mark_notification_read(notification_id)
         return {"status": "success"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error marking notification read: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/categories")
 async def get_categories() -> Dict[str, List[str]]:
@@ -116,14 +224,15 @@ async def get_statistics(
 ) -> Dict[str, Any]:
     """Get financial statistics"""
     try:
-        report = await financial_processor.generate_report(user_id, period)
-        budget = await financial_processor.check_budget_status(user_id)
-        balance = await financial_processor.get_balance(user_id)
-        
-        return {
-            "report": report,
-            "budget": budget,
-            "balance": balance
-        }
+        stats = await stats_engine.compute(user_id, period)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error computing statistics: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    if stats is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    # Budget and balance come from the cached dashboard snapshot: encode them once per snapshot
+    return FastJSONResponse(dumps_object({
+        "report": stats["report"],
+        "budget": encode_cached(stats["budget"]),
+        "balance": encode_cached(stats["balance"]),
+    }))
@@ -0,0 +1,148 @@
+"""Pub/sub backends that carry WebSocket updates between server workers.
+
+WebSocketManager publishes every serialized update to a broker and
+delivers whatever the broker hands back to its local sockets, so an update
+produced in one uvicorn worker reaches dashboards connected to any worker.
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+import asyncio
+import errno
+import logging
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+DeliverFunc = Callable[[int, str], None]
+
+class Broker(ABC):
+    """Publishes (user_id, serialized message) pairs to every subscribed worker"""
+
+    def __init__(self):
+        self.deliver: Optional[DeliverFunc] = None
+        self.published = 0
+        self.received = 0
+
+    async def start(self, deliver: DeliverFunc) -> None:
+        """Subscribe; ``deliver`` is called for every message, including our own"""
+        self.deliver = deliver
+
+    async def stop(self) -> None:
+        self.deliver = None
+
+    @abstractmethod
+    async def publish(self, user_id: int, message: str) -> None:
+        ...
+
+    def _receive(self, user_id: int, message: str) -> None:
+        self.received += 1
+        if self.deliver is not None:
+            self.deliver(user_id, message)
+
+class InMemoryBroker(Broker):
+    """Single-process broker: delivers published messages straight back"""
+
+    async def publish(self, user_id: int, message: str) -> None:
+        self.published += 1
+        self._receive(user_id, message)
+
+class _DatagramReceiver(asyncio.DatagramProtocol):
+    def __init__(self, broker: "UnixSocketBroker"):
+        self.broker = broker
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            user_id, message = data.split(b"\n", 1)
+            self.broker._receive(int(user_id), message.decode())
+        except ValueError:
+            logger.error("Malformed WebSocket broker datagram")
+
+class UnixSocketBroker(Broker):
+    """Cross-process broker for workers on one host, built on Unix datagram sockets.
+
+    Every worker binds ``<directory>/<pid>.sock`` and publishes by sending
+    one datagram to each socket in the directory. There is no central hub:
+    sockets left behind by dead workers refuse the datagram and are removed.
+    Messages to a peer whose receive buffer is full are dropped, matching
+    the slow-consumer behaviour of the local send queues.
+    """
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self.dropped = 0
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._sender: Optional[socket.socket] = None
+
+    async def start(self, deliver: DeliverFunc) -> None:
+        await super().start(deliver)
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _DatagramReceiver(self), local_addr=self.path, family=socket.AF_UNIX
+        )
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        logger.info(f"WebSocket broker listening on {self.path}")
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
+
+    async def publish(self, user_id: int, message: str) -> None:
+        self.published += 1
+        if self._transport is None:
+            # Not subscribed yet: only this worker can be reached
+            self._receive(user_id, message)
+            return
+        data = f"{user_id}\n".encode() + message.encode()
+        # Our own socket is in the directory too, so local sockets get it the same way
+        for name in os.listdir(self.directory):
+            if not name.endswith(".sock"):
+                continue
+            peer = os.path.join(self.directory, name)
+            try:
+                self._sender.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone
+                self._remove_stale(peer)
+            except BlockingIOError:
+                self.dropped += 1
+                logger.warning(f"WebSocket broker peer {name} is full; message dropped")
+            except OSError as e:
+                if e.errno == errno.EMSGSIZE:
+                    logger.error(f"WebSocket update for user {user_id} is too large to publish")
+                    return
+                raise
+
+    def _remove_stale(self, peer: str) -> None:
+        if peer == self.path:
+            return
+        try:
+            os.unlink(peer)
+        except FileNotFoundError:
+            pass
+
+BROKERS = {
+    "memory": lambda directory: InMemoryBroker(),
+    "unix": UnixSocketBroker,
+}
+
+def create_broker(name: str, directory: str) -> Broker:
+    """Build the broker configured by WS_BROKER"""
+    try:
+        return BROKERS[name](directory)
+    except KeyError:
+        raise ValueError(f"Unknown WebSocket broker {name!r}; expected one of {', '.join(BROKERS)}")
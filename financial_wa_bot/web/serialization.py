@@ -0,0 +1,109 @@
+"""JSON encoding for API responses and WebSocket messages.
+
+Encodes with orjson when it is installed (JSON_BACKEND=auto) and with the
+stdlib json module otherwise; both produce the same compact UTF-8 JSON:
+datetimes and dates as ISO 8601, enums as their value and Money as a
+rupiah number. orjson handles datetimes and enums natively, so rows can be
+handed over without calling ``isoformat()`` or ``.value`` first.
+
+Routes return ``FastJSONResponse`` instances directly, which skips
+FastAPI's ``jsonable_encoder`` pass. Long-lived payloads, such as the
+parts of a cached dashboard snapshot, can be encoded once with
+``encode_cached`` and spliced into responses by ``dumps_object``.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Tuple
+import json
+
+from starlette.responses import JSONResponse
+
+from config.settings import DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL, JSON_BACKEND
+from database.money import Money
+from database.user_cache import LRUCache
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoding
+    orjson = None
+
+class Encoded(bytes):
+    """Already encoded JSON, spliced verbatim by dumps_object"""
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Money):
+        return value.to_json()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, tuple):
+        # Row projections; the stdlib encoder already treats tuples as arrays
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _select_backend(name: str) -> str:
+    if name not in ("auto", "orjson", "stdlib"):
+        raise ValueError(f"Unknown JSON backend {name!r}; expected auto, orjson or stdlib")
+    if name == "orjson" and orjson is None:
+        raise ValueError("JSON_BACKEND=orjson but orjson is not installed")
+    return "orjson" if name != "stdlib" and orjson is not None else "stdlib"
+
+BACKEND = _select_backend(JSON_BACKEND)
+
+if BACKEND == "orjson":
+    def dumps(value: Any) -> bytes:
+        """Encode a payload to JSON bytes"""
+        return orjson.dumps(value, default=_default)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+    def dumps(value: Any) -> bytes:
+        """Encode a payload to JSON bytes"""
+        return _encoder.encode(value).encode()
+
+    loads = json.loads
+
+def dumps_text(value: Any) -> str:
+    """Encode a payload to a JSON string, e.g. for WebSocket text frames"""
+    return dumps(value).decode()
+
+def dumps_object(members: Dict[str, Any]) -> bytes:
+    """Encode a top-level object whose Encoded members are spliced in as they are"""
+    return b"{" + b",".join(
+        dumps(key) + b":" + (value if isinstance(value, Encoded) else dumps(value))
+        for key, value in members.items()
+    ) + b"}"
+
+# id(payload) -> (payload, encoded); holding the payload keeps its id from being reused
+_encoded: LRUCache[Tuple[Any, Encoded]] = LRUCache(DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL)
+
+def encode_cached(value: Any) -> Encoded:
+    """Encode a payload that is never mutated once built, reusing the bytes while the same object is passed.
+
+    Keyed by object identity: a rebuilt snapshot is a new object and is
+    encoded afresh, so invalidation needs no extra bookkeeping.
+    """
+    entry = _encoded.get(id(value))
+    if entry is not None and entry[0] is value:
+        return entry[1]
+    encoded = Encoded(dumps(value))
+    _encoded.put(id(value), (value, encoded))
+    return encoded
+
+def cache_metrics() -> Dict[str, Any]:
+    """Counters of the encoded payload cache"""
+    return {"backend": BACKEND, **_encoded.metrics()}
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded by this module; also accepts pre-encoded bytes"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
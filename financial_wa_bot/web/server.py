@@ -1,30 +1,95 @@
 from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.requests import Request
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from database.db_manager import db_manager
+from database.money import json_default
+from database.query_metrics import render_gauges
 from features.financial_processor import financial_processor
+from features.columnar_analytics import columnar_analytics
+from features.dashboard_snapshot import dashboard_snapshots
+from features.insight_engine import insight_engine
+from .api.routes import router as api_router
+from .serialization import FastJSONResponse, cache_metrics
 from .websocket import WebSocketManager
 
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
-app = FastAPI(title="Financial Planner Dashboard")
+app = FastAPI(title="Financial Planner Dashboard", default_response_class=FastJSONResponse)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="dashboard/static"), name="static")
 
 # Initialize templates
 templates = Jinja2Templates(directory="dashboard/templates")
+# Money amounts in |tojson (chart data) render as JSON numbers
+templates.env.policies["json.dumps_kwargs"] = {"sort_keys": True, "default": json_default}
+
+# Versioned REST API
+app.include_router(api_router)
 
 # Initialize WebSocket manager
 websocket_manager = WebSocketManager()
 
+class QueryMetricsMiddleware:
+    """Attribute SQL statements issued while handling a request to its route.
+
+    A plain ASGI middleware rather than ``@app.middleware("http")``: the scope
+    stays open until the response has been sent, so statements run while a
+    StreamingResponse body is produced count for the route too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        with db_manager.query_metrics.scope("route", f"{method} {scope['path']}") as query_scope:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # Label by route template rather than the concrete path, keeping label cardinality bounded
+                route = scope.get("route")
+                query_scope.name = f"{method} {route.path}" if route is not None else f"{method} unmatched"
+
+app.add_middleware(QueryMetricsMiddleware)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-route and per-command query counters, plus pool, cache and fan-out gauges, in Prometheus text format"""
+    return PlainTextResponse(
+        db_manager.query_metrics.render_prometheus()
+        + render_gauges("db", db_manager.pool_metrics())
+        + render_gauges("dashboard_cache", dashboard_snapshots.metrics())
+        + render_gauges("json_cache", cache_metrics())
+        + render_gauges("columnar_analytics", columnar_analytics.metrics())
+        + render_gauges("insight_engine", insight_engine.metrics())
+        + render_gauges("websocket", websocket_manager.metrics()),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.on_event("startup")
+async def startup_event():
+    """Subscribe to WebSocket updates published by other workers and start the insight scheduler"""
+    await websocket_manager.start()
+    await insight_engine.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the insight scheduler, unsubscribe from WebSocket updates and release pooled database connections"""
+    await insight_engine.stop()
+    await websocket_manager.stop()
+    await db_manager.close()
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """Render dashboard homepage"""
@@ -37,26 +102,17 @@ async def root(request: Request):
 async def dashboard(request: Request, user_id: int):
     """Render user dashboard"""
     try:
-        # Get user data
-        user = await db_manager.get_user_by_id(user_id)
-        if not user:
+        # User and financial data, cached until the user's next write
+        snapshot = await dashboard_snapshots.get(user_id)
+        if snapshot is None:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # Get financial data
-        balance = await financial_processor.get_balance(user_id)
-        budget_status = await self.check_budget_status(user_id)
-        insights = await financial_processor.get_financial_insights(user_id)
-        
         return templates.TemplateResponse(
             "dashboard/main.html",
-            {
-                "request": request,
-                "user": user,
-                "balance": balance,
-                "budget_status": budget_status,
-                "insights": insights
-            }
+            {"request": request, **snapshot}
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error rendering dashboard: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -82,8 +138,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
                 break
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        if websocket in websocket_manager.active_connections:
-            websocket_manager.disconnect(websocket, user_id)
+        websocket_manager.disconnect(websocket, user_id)
 
 # API Routes
 
@@ -94,18 +149,18 @@ async def get_transactions(
 ) -> List[Dict[str, Any]]:
     """Get user transactions"""
     try:
-        transactions = await db_manager.get_user_transactions(user_id, limit)
-        return [
+        transactions = await db_manager.get_transaction_rows(user_id, limit)
+        return FastJSONResponse([
             {
                 "id": t.id,
-                "type": t.type.value,
+                "type": t.type,
                 "amount": t.amount,
                 "category": t.category,
                 "description": t.description,
-                "date": t.date.isoformat()
+                "date": t.date
             }
             for t in transactions
-        ]
+        ])
     except Exception as e:
         logger.error(f"Error getting transactions: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -114,7 +169,7 @@ async def get_transactions(
 async def get_balance(user_id: int) -> Dict[str, float]:
     """Get user balance"""
     try:
-        return await financial_processor.get_balance(user_id)
+        return FastJSONResponse(await financial_processor.get_balance(user_id))
     except Exception as e:
         logger.error(f"Error getting balance: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -123,7 +178,7 @@ async def get_balance(user_id: int) -> Dict[str, float]:
 async def get_budget_status(user_id: int) -> Dict[str, Any]:
     """Get user budget status"""
     try:
-        return await financial_processor.check_budget_status(user_id)
+        return FastJSONResponse(await financial_processor.check_budget_status(user_id))
     except Exception as e:
         logger.error(f"Error getting budget status: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -135,7 +190,7 @@ async def get_report(
 ) -> Dict[str, Any]:
     """Get financial report"""
     try:
-        return await financial_processor.generate_report(user_id, period)
+        return FastJSONResponse(await financial_processor.generate_report(user_id, period))
     except Exception as e:
         logger.error(f"Error getting report: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -144,7 +199,7 @@ async def get_report(
 async def get_insights(user_id: int) -> List[Dict[str, Any]]:
     """Get financial insights"""
     try:
-        return await financial_processor.get_financial_insights(user_id)
+        return FastJSONResponse(await insight_engine.insights(user_id))
     except Exception as e:
         logger.error(f"Error getting insights: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -156,17 +211,17 @@ async def get_notifications(
 ) -> List[Dict[str, Any]]:
     """Get user notifications"""
     try:
-        notifications = await db_manager.get_user_notifications(user_id, unread_only)
-        return [
+        notifications = await db_manager.get_notification_rows(user_id, unread_only)
+        return FastJSONResponse([
             {
                 "id": n.id,
                 "type": n.type,
                 "message": n.message,
                 "is_read": bool(n.is_read),
-                "created_at": n.created_at.isoformat()
+                "created_at": n.created_at
             }
             for n in notifications
-        ]
+        ])
     except Exception as e:
         logger.error(f"Error getting notifications: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,22 +1,99 @@
-from typing import Dict, Set, Any
+from typing import Dict, Set, Any, Coroutine, Optional, Tuple
 from fastapi import WebSocket
-import json
+import asyncio
 import logging
 
+from config.settings import (
+    WS_SEND_QUEUE_SIZE,
+    WS_SLOW_CONSUMER_POLICY,
+    WS_DEBOUNCE_SECONDS,
+    WS_BROKER,
+    WS_BROKER_DIR,
+)
+from .pubsub import Broker, create_broker
+from .serialization import dumps_text
+
 logger = logging.getLogger(__name__)
 
+class _Connection:
+    """A socket with its own bounded send queue, drained by a writer task"""
+
+    def __init__(self, websocket: WebSocket, user_id: int, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.writer = asyncio.create_task(self._write())
+
+    async def _write(self) -> None:
+        while True:
+            text = await self.queue.get()
+            await self.websocket.send_text(text)
+
 class WebSocketManager:
-    def __init__(self):
+    """Fans updates out to every socket of a user without letting one slow socket stall the rest.
+
+    A message is serialized once and put on each socket's bounded queue;
+    per-socket writer tasks send concurrently. When a queue is full the
+    socket is a slow consumer: with the ``drop`` policy the message is
+    skipped for that socket, with ``disconnect`` the socket is closed.
+    Balance and budget updates are debounced: within ``debounce`` seconds
+    only the latest payload per user is sent.
+
+    Broadcasts go through a pub/sub ``broker`` (WS_BROKER) so that sockets
+    connected to other server workers receive them too.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = WS_SEND_QUEUE_SIZE,
+        slow_consumer_policy: str = WS_SLOW_CONSUMER_POLICY,
+        debounce: float = WS_DEBOUNCE_SECONDS,
+        broker: Optional[Broker] = None
+    ):
+        if slow_consumer_policy not in ("drop", "disconnect"):
+            raise ValueError(f"Unknown slow consumer policy {slow_consumer_policy!r}")
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.debounce = debounce
+        self.broker = broker or create_broker(WS_BROKER, WS_BROKER_DIR)
+
         # Store active connections by user_id
         self.active_connections: Dict[int, Set[WebSocket]] = {}
+        self._connections: Dict[WebSocket, _Connection] = {}
+        self._pending_updates: Dict[Tuple[int, str], Any] = {}
+        self._flushes: Dict[Tuple[int, str], asyncio.TimerHandle] = {}
+        # Debounced broadcasts and slow-consumer closes still running
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.messages_queued = 0
+        self.messages_dropped = 0
+        self.slow_disconnects = 0
+        self.updates_coalesced = 0
+
+    async def start(self) -> None:
+        """Subscribe to updates published by any worker"""
+        await self.broker.start(self._deliver)
+
+    async def stop(self) -> None:
+        """Stop pending debounce timers, finish running broadcasts and unsubscribe"""
+        for handle in self._flushes.values():
+            handle.cancel()
+        self._flushes.clear()
+        self._pending_updates.clear()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.broker.stop()
 
     async def connect(self, websocket: WebSocket, user_id: int):
         """Connect a new WebSocket client"""
         try:
             await websocket.accept()
-            if user_id not in self.active_connections:
-                self.active_connections[user_id] = set()
-            self.active_connections[user_id].add(websocket)
+            connection = _Connection(websocket, user_id, self.queue_size)
+            connection.writer.add_done_callback(
+                lambda task: self._on_writer_done(task, websocket, user_id)
+            )
+            self._connections[websocket] = connection
+            self.active_connections.setdefault(user_id, set()).add(websocket)
             logger.info(f"New WebSocket connection for user {user_id}")
         except Exception as e:
             logger.error(f"Error connecting WebSocket: {e}")
@@ -25,8 +102,11 @@ class WebSocketManager:
     def disconnect(self, websocket: WebSocket, user_id: int):
         """Disconnect a WebSocket client"""
         try:
+            connection = self._connections.pop(websocket, None)
+            if connection is not None:
+                connection.writer.cancel()
             if user_id in self.active_connections:
-                self.active_connections[user_id].remove(websocket)
+                self.active_connections[user_id].discard(websocket)
                 if not self.active_connections[user_id]:
                     del self.active_connections[user_id]
             logger.info(f"WebSocket disconnected for user {user_id}")
@@ -34,30 +114,31 @@ class WebSocketManager:
             logger.error(f"Error disconnecting WebSocket: {e}")
 
     async def send_personal_message(self, message: Any, websocket: WebSocket):
-        """Send a message to a specific client"""
+        """Send a message to a connected client, subject to the slow consumer policy.
+
+        Sockets that are not connected, including ones disconnected as slow
+        consumers, are skipped instead of written to directly.
+        """
         try:
+            connection = self._connections.get(websocket)
+            if connection is None:
+                return
             if isinstance(message, (dict, list)):
-                message = json.dumps(message)
-            await websocket.send_text(message)
+                message = dumps_text(message)
+            # Queued behind broadcasts, keeping their order
+            self._enqueue(websocket, connection.user_id, message)
         except Exception as e:
             logger.error(f"Error sending personal message: {e}")
             raise
 
     async def broadcast_to_user(self, user_id: int, message: Any):
-        """Broadcast a message to all connections of a specific user"""
-        if user_id in self.active_connections:
-            try:
-                if isinstance(message, (dict, list)):
-                    message = json.dumps(message)
-                for connection in self.active_connections[user_id]:
-                    try:
-                        await connection.send_text(message)
-                    except Exception as e:
-                        logger.error(f"Error sending to connection: {e}")
-                        # Remove failed connection
-                        self.disconnect(connection, user_id)
-            except Exception as e:
-                logger.error(f"Error broadcasting to user {user_id}: {e}")
+        """Broadcast a message to all connections of a specific user, on every worker"""
+        try:
+            if isinstance(message, (dict, list)):
+                message = dumps_text(message)
+            await self.broker.publish(user_id, message)
+        except Exception as e:
+            logger.error(f"Error broadcasting to user {user_id}: {e}")
 
     async def broadcast_update(self, user_id: int, update_type: str, data: Any):
         """Broadcast a typed update to a user's connections"""
@@ -75,13 +156,97 @@ class WebSocketManager:
         await self.broadcast_update(user_id, "transaction", transaction_data)
 
     async def notify_budget_update(self, user_id: int, budget_data: Dict[str, Any]):
-        """Notify about budget updates"""
-        await self.broadcast_update(user_id, "budget", budget_data)
+        """Notify about budget updates, coalesced per debounce window"""
+        self._schedule_update(user_id, "budget", budget_data)
 
     async def notify_balance_update(self, user_id: int, balance_data: Dict[str, Any]):
-        """Notify about balance changes"""
-        await self.broadcast_update(user_id, "balance", balance_data)
+        """Notify about balance changes, coalesced per debounce window"""
+        self._schedule_update(user_id, "balance", balance_data)
 
     async def notify_notification(self, user_id: int, notification_data: Dict[str, Any]):
         """Notify about new notifications"""
         await self.broadcast_update(user_id, "notification", notification_data)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Connection counts and fan-out counters"""
+        return {
+            "users": len(self.active_connections),
+            "connections": len(self._connections),
+            "queued_messages": sum(c.queue.qsize() for c in self._connections.values()),
+            "pending_updates": len(self._pending_updates),
+            "messages_queued": self.messages_queued,
+            "messages_dropped": self.messages_dropped,
+            "slow_disconnects": self.slow_disconnects,
+            "updates_coalesced": self.updates_coalesced,
+            "broker": type(self.broker).__name__,
+            "broker_published": self.broker.published,
+            "broker_received": self.broker.received,
+        }
+
+    def _deliver(self, user_id: int, text: str) -> None:
+        """Queue a published message on this worker's sockets for the user"""
+        websockets = self.active_connections.get(user_id)
+        if not websockets:
+            return
+        # Copy: slow consumers are disconnected while iterating
+        for websocket in list(websockets):
+            self._enqueue(websocket, user_id, text)
+
+    def _enqueue(self, websocket: WebSocket, user_id: int, text: str) -> None:
+        connection = self._connections.get(websocket)
+        if connection is None:
+            return
+        try:
+            connection.queue.put_nowait(text)
+            self.messages_queued += 1
+        except asyncio.QueueFull:
+            if self.slow_consumer_policy == "drop":
+                connection.dropped += 1
+                self.messages_dropped += 1
+            else:
+                self.slow_disconnects += 1
+                logger.warning(f"Disconnecting slow WebSocket consumer for user {user_id}")
+                self.disconnect(websocket, user_id)
+                self._spawn(self._close(websocket))
+
+    def _schedule_update(self, user_id: int, update_type: str, data: Any) -> None:
+        # No local-connection check: the user's sockets may live on another worker
+        key = (user_id, update_type)
+        if key in self._pending_updates:
+            self.updates_coalesced += 1
+        self._pending_updates[key] = data
+        if key not in self._flushes:
+            self._flushes[key] = asyncio.get_running_loop().call_later(
+                self.debounce, self._flush_update, key
+            )
+
+    def _flush_update(self, key: Tuple[int, str]) -> None:
+        self._flushes.pop(key, None)
+        data = self._pending_updates.pop(key, None)
+        user_id, update_type = key
+        self._spawn(self.broadcast_update(user_id, update_type, data))
+
+    def _spawn(self, coroutine: Coroutine[Any, Any, None]) -> None:
+        # The loop only keeps weak references to tasks
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error in WebSocket background task: {task.exception()}")
+
+    def _on_writer_done(self, task: asyncio.Task, websocket: WebSocket, user_id: int) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(f"Error sending to connection: {task.exception()}")
+        # Remove failed connection
+        self.disconnect(websocket, user_id)
+
+    async def _close(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013)  # Try again later
+        except Exception:
+            pass